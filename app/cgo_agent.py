@@ -4,12 +4,20 @@ NOTREKT.AI v2.0 - Chief Governance Officer Agent
 Enhanced policy enforcement with value-based validation and structured rule processing.
 """
 
+import os
+import copy
 import json
-from typing import Dict, List, Any, Optional
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Callable, Tuple, Hashable
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 
 from .config_manager import Config, logger
+from .rule_index import RuleIndex, normalize_action_name
+from .ruleset import Ruleset, load_ruleset, parse_rules_file
 
 @dataclass
 class ValidationResult:
@@ -23,51 +31,272 @@ class ValidationResult:
     sop_reference: str
     action_id: Optional[str] = None
 
+# A compiled check appends zero or more error messages for (metadata, user_context)
+Validator = Callable[[Dict[str, Any], Optional[Dict[str, Any]], List[str]], None]
+
+@dataclass(frozen=True)
+class ValidationPlan:
+    """Validation checks compiled once from a rule's declarative fields."""
+    rule: Dict[str, Any]
+    checks: Tuple[Validator, ...]
+    # user_context keys the checks read (part of the decision cache key)
+    context_fields: Tuple[str, ...] = ()
+    # True when the outcome depends on the clock and must never be memoized
+    time_dependent: bool = False
+
+def _required_fields_check(fields: Tuple[str, ...]) -> Validator:
+    def check(metadata, user_context, errors):
+        for field in fields:
+            if not metadata.get(field):
+                errors.append(f"Missing required field: {field}")
+    return check
+
+def _user_role_check(required_role: Any) -> Validator:
+    def check(metadata, user_context, errors):
+        user_role = user_context.get("role") if user_context else None
+        if user_role != required_role:
+            errors.append(f"Action requires user role '{required_role}', but user has role '{user_role}'")
+    return check
+
+def _trusted_source_check(trusted_sources: frozenset) -> Validator:
+    def check(metadata, user_context, errors):
+        source = metadata.get("source")
+        if not source:
+            return
+        try:
+            trusted = source in trusted_sources
+        except TypeError:  # unhashable source value can never be a trusted entry
+            trusted = False
+        if not trusted:
+            errors.append(f"Source '{source}' is not in trusted sources list")
+    return check
+
+def _file_type_check(allowed_types: List[str]) -> Validator:
+    allowed = frozenset(allowed_types)
+    def check(metadata, user_context, errors):
+        file_path = metadata.get("file_path")
+        if file_path:
+            file_extension = Path(file_path).suffix.lower()
+            if file_extension not in allowed:
+                errors.append(f"File type '{file_extension}' not allowed. Allowed types: {allowed_types}")
+    return check
+
+def _data_size_check(max_size: Any) -> Validator:
+    def check(metadata, user_context, errors):
+        data_size = metadata.get("data_size_mb", 0)
+        if data_size > max_size:
+            errors.append(f"Data size {data_size}MB exceeds maximum allowed size of {max_size}MB")
+    return check
+
+def _business_hours_check(metadata, user_context, errors):
+    current_hour = datetime.now().hour
+    if current_hour < 9 or current_hour > 17:
+        errors.append("Action only allowed during business hours (9 AM - 5 PM)")
+
+def _trusted_source_set(action_name: str, trusted_sources: Any) -> frozenset:
+    """
+    The usable entries of a rule's trusted_sources. A malformed entry (an
+    object or array, which no source value can match) is skipped with a
+    warning rather than failing the whole ruleset; a bare string is one
+    entry. The check stays in place even if nothing usable is left, so a
+    malformed list trusts no source instead of every source.
+    """
+    if isinstance(trusted_sources, str):
+        entries = [trusted_sources]
+    elif isinstance(trusted_sources, (list, tuple, set, frozenset)):
+        entries = list(trusted_sources)
+    else:
+        logger.warning(f"Rule '{action_name}': trusted_sources must be a list, got {type(trusted_sources).__name__}")
+        return frozenset()
+    usable = []
+    for entry in entries:
+        try:
+            hash(entry)
+        except TypeError:
+            logger.warning(f"Rule '{action_name}': ignoring trusted_sources entry {entry!r} (not a string)")
+            continue
+        usable.append(entry)
+    return frozenset(usable)
+
+def compile_validation_plan(rule: Dict[str, Any]) -> ValidationPlan:
+    """
+    Compile a rule's required_metadata, validation_rules and trusted_sources
+    into an ordered tuple of specialized checks. Order matches the error order
+    of the original interpreted validation.
+    """
+    checks: List[Validator] = []
+    context_fields: List[str] = []
+    validation_rules = rule.get("validation_rules", {})
+    
+    required_fields = tuple(rule.get("required_metadata", []))
+    if required_fields:
+        checks.append(_required_fields_check(required_fields))
+    
+    if "user_role_required" in validation_rules:
+        checks.append(_user_role_check(validation_rules["user_role_required"]))
+        context_fields.append("role")
+    
+    # Source validation applies to research actions only
+    if rule["action_name"].upper() == "RESEARCH":
+        trusted_sources = rule.get("trusted_sources", [])
+        if trusted_sources:
+            checks.append(_trusted_source_check(_trusted_source_set(rule["action_name"], trusted_sources)))
+    
+    if "allowed_file_types" in validation_rules:
+        checks.append(_file_type_check(validation_rules["allowed_file_types"]))
+    
+    if "max_data_size_mb" in validation_rules:
+        checks.append(_data_size_check(validation_rules["max_data_size_mb"]))
+    
+    time_dependent = bool(validation_rules.get("business_hours_only"))
+    if time_dependent:
+        checks.append(_business_hours_check)
+    
+    return ValidationPlan(rule=rule, checks=tuple(checks),
+                          context_fields=tuple(context_fields), time_dependent=time_dependent)
+
+def compile_validation_plans(rules: List[Dict[str, Any]]) -> Dict[str, ValidationPlan]:
+    """Compile plans for a rule list, keyed by normalized action name (first declaration wins)."""
+    plans: Dict[str, ValidationPlan] = {}
+    for rule in rules:
+        name = normalize_action_name(rule["action_name"])
+        if name not in plans:
+            plans[name] = compile_validation_plan(rule)
+    return plans
+
+def _typed_key(value: Any) -> Any:
+    """
+    Decision cache key form of a value. Values that compare equal across
+    types (1, 1.0, True) appear differently in the reasoning text, so the
+    type is part of the key. Unhashable values are returned as-is.
+    """
+    if isinstance(value, tuple):
+        return ("tuple", tuple(_typed_key(item) for item in value))
+    if isinstance(value, frozenset):
+        return ("frozenset", frozenset(_typed_key(item) for item in value))
+    return (type(value).__name__, value)
+
+class DecisionCache:
+    """
+    Thread-safe LRU cache of validation decisions with a per-entry TTL.
+    Keys embed the ruleset version, so entries from an older ruleset can never
+    be returned; the cache is also cleared whenever a new ruleset is activated.
+    """
+    
+    def __init__(self, ttl_seconds: float, max_entries: int = 4096):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, ValidationResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable) -> Optional[ValidationResult]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: Hashable, result: ValidationResult):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+@dataclass(frozen=True)
+class RulesSnapshot:
+    """
+    Immutable, fully compiled view of one version of the ruleset.
+    Validations read a single snapshot reference, so a concurrent reload can
+    never expose a half-applied ruleset.
+    """
+    ruleset: Ruleset
+    validation_plans: Dict[str, ValidationPlan]
+
+    @classmethod
+    def from_ruleset(cls, ruleset: Ruleset) -> "RulesSnapshot":
+        plans = ruleset.derive("cgo.validation_plans", lambda rs: compile_validation_plans(rs.rules))
+        return cls(ruleset=ruleset, validation_plans=plans)
+
+    @classmethod
+    def compile(cls, rules_data: Dict[str, Any]) -> "RulesSnapshot":
+        return cls.from_ruleset(Ruleset.compile(rules_data))
+
+    @property
+    def rules_data(self) -> Dict[str, Any]:
+        return self.ruleset.rules_data
+
+    @property
+    def rule_index(self) -> RuleIndex:
+        return self.ruleset.index
+
+    @property
+    def version(self) -> str:
+        return self.ruleset.version
+
 class CGOAgent:
     """
     Chief Governance Officer Agent - Enhanced policy enforcement.
     Validates actions against structured rules with value-based checks.
     """
     
-    def __init__(self, rules_path: Optional[str] = None):
+    def __init__(self, rules_path: Optional[str] = None, worm_storage=None,
+                 decision_cache_ttl: Optional[float] = None, decision_cache_size: int = 4096):
         self.rules_path = rules_path or Config.RULES_PATH
-        self.rules_data = self._load_rules()
+        self.worm_storage = worm_storage
+        if decision_cache_ttl is None:
+            decision_cache_ttl = Config.CGO_DECISION_CACHE_TTL
+        self.decision_cache = DecisionCache(decision_cache_ttl, decision_cache_size) if decision_cache_ttl > 0 else None
+        self._snapshot = RulesSnapshot.from_ruleset(load_ruleset(self.rules_path))
+        self._reload_lock = threading.Lock()
+        # Reloads are numbered as they start; the active snapshot came from _reload_active
+        self._reload_started = 0
+        self._reload_active = 0
+        self._watcher_thread: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
         print(f"[DEBUG] CGOAgent using rules file: {self.rules_path}")
         print(f"[DEBUG] SOP_AS_LAW in rules: {self.rules_data.get('SOP_AS_LAW')}")
         logger.info(f"CGO Agent initialized with {len(self.rules_data.get('rules', []))} governance rules")
     
+    @property
+    def rules_data(self) -> Dict[str, Any]:
+        """Raw rules of the currently active snapshot."""
+        return self._snapshot.rules_data
+    
+    @property
+    def rules_version(self) -> str:
+        """Content hash of the currently active ruleset."""
+        return self._snapshot.version
+    
+    @property
+    def _rule_index(self) -> RuleIndex:
+        return self._snapshot.rule_index
+    
     def _load_rules(self) -> Dict[str, Any]:
         """Load governance rules from the JSON file."""
-        try:
-            rules_file = Path(self.rules_path)
-            if not rules_file.exists():
-                raise FileNotFoundError(f"Rules file not found: {self.rules_path}")
-            
-            with open(rules_file, 'r') as f:
-                rules = json.load(f)
-                
-            # Validate rules structure
-            if not isinstance(rules, dict):
-                raise ValueError("Rules file must contain a JSON object")
-            
-            if "rules" not in rules:
-                raise ValueError("Rules file must contain a 'rules' array")
-            
-            if not isinstance(rules["rules"], list):
-                raise ValueError("'rules' must be an array")
-            
-            logger.info(f"Loaded {len(rules['rules'])} governance rules from {self.rules_path}")
-            return rules
-            
-        except FileNotFoundError as e:
-            logger.critical(f"Rules file not found: {e}")
-            raise
-        except json.JSONDecodeError as e:
-            logger.critical(f"Invalid JSON in rules file: {e}")
-            raise
-        except Exception as e:
-            logger.critical(f"Error loading rules: {e}")
-            raise
+        return parse_rules_file(self.rules_path)
     
     def validate_action(self, action_name: str, metadata: Dict[str, Any], 
                        user_context: Optional[Dict[str, Any]] = None) -> ValidationResult:
@@ -82,10 +311,63 @@ class CGOAgent:
         Returns:
             ValidationResult with detailed validation outcome
         """
+        # Pin one snapshot for the whole validation; reloads swap the reference
+        snapshot = self._snapshot
+        
+        cache_key = self._decision_cache_key(snapshot, action_name, metadata, user_context)
+        if cache_key is None:
+            return self._evaluate_action(snapshot, action_name, metadata, user_context)
+        
+        cached = self.decision_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"CGO Agent decision cache hit for action: '{action_name}'")
+            result = copy.copy(cached)
+            result.missing_metadata = list(cached.missing_metadata)
+            return result
+        
+        result = self._evaluate_action(snapshot, action_name, metadata, user_context)
+        stored = copy.copy(result)
+        stored.missing_metadata = list(result.missing_metadata)
+        self.decision_cache.put(cache_key, stored)
+        return result
+    
+    def _decision_cache_key(self, snapshot: RulesSnapshot, action_name: str, metadata: Dict[str, Any],
+                            user_context: Optional[Dict[str, Any]]) -> Optional[Tuple]:
+        """
+        Build the memoization key for a decision, or None if it must not be cached
+        (cache disabled, enforcement disabled, time-dependent rule, or metadata
+        that cannot be normalized).
+        """
+        if self.decision_cache is None or not snapshot.rules_data.get("SOP_AS_LAW", False):
+            return None
+        rule = snapshot.rule_index.lookup(action_name)
+        context_key: Tuple = ()
+        if rule is not None:
+            plan = snapshot.validation_plans.get(normalize_action_name(rule["action_name"]))
+            if plan is None or plan.time_dependent:
+                return None
+            context = user_context or {}
+            context_key = tuple(_typed_key(context.get(field)) for field in plan.context_fields)
+        try:
+            hash(context_key)
+            try:
+                metadata_key = tuple(sorted((name, _typed_key(value)) for name, value in metadata.items()))
+                hash(metadata_key)
+            except TypeError:
+                # Nested values: fall back to a canonical JSON rendering
+                metadata_key = json.dumps(metadata, sort_keys=True, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return None
+        # action_name is kept verbatim because it appears in the cached reasoning text
+        return snapshot.version, action_name, metadata_key, context_key
+    
+    def _evaluate_action(self, snapshot: RulesSnapshot, action_name: str, metadata: Dict[str, Any],
+                         user_context: Optional[Dict[str, Any]]) -> ValidationResult:
+        """Evaluate an action against one ruleset snapshot."""
         logger.info(f"CGO Agent validating action: '{action_name}'")
         
         # Check if SOP enforcement is enabled
-        if not self.rules_data.get("SOP_AS_LAW", False):
+        if not snapshot.rules_data.get("SOP_AS_LAW", False):
             logger.warning("SOP enforcement is DISABLED - auto-approving action")
             return ValidationResult(
                 is_valid=True,
@@ -98,7 +380,7 @@ class CGOAgent:
             )
         
         # Find the matching rule for this action
-        matching_rule = self._find_matching_rule(action_name)
+        matching_rule = snapshot.rule_index.lookup(action_name)
         
         # If no specific rule found, apply default policy
         if not matching_rule:
@@ -127,7 +409,7 @@ class CGOAgent:
             )
         
         # Perform enhanced metadata validation
-        validation_errors = self._validate_metadata(matching_rule, metadata, user_context)
+        validation_errors = self._validate_metadata(matching_rule, metadata, user_context, snapshot)
         
         if validation_errors:
             logger.warning(f"Metadata validation failed for '{action_name}': {validation_errors}")
@@ -154,69 +436,25 @@ class CGOAgent:
         )
     
     def _find_matching_rule(self, action_name: str) -> Optional[Dict[str, Any]]:
-        """Find the rule that matches the given action name."""
-        for rule in self.rules_data.get("rules", []):
-            if rule["action_name"].upper() == action_name.upper():
-                return rule
-        return None
+        """Find the rule that matches the given action name via the precompiled index."""
+        return self._snapshot.rule_index.lookup(action_name)
     
     def _validate_metadata(self, rule: Dict[str, Any], metadata: Dict[str, Any], 
-                          user_context: Optional[Dict[str, Any]]) -> List[str]:
+                          user_context: Optional[Dict[str, Any]],
+                          snapshot: Optional[RulesSnapshot] = None) -> List[str]:
         """
         Enhanced metadata validation with value-based checks.
+        Runs the rule's precompiled validation plan.
         
         Returns list of validation error messages.
         """
-        errors = []
-        
-        # Check required metadata fields
-        required_fields = rule.get("required_metadata", [])
-        for field in required_fields:
-            if field not in metadata or not metadata[field]:
-                errors.append(f"Missing required field: {field}")
-        
-        # Perform value-based validation rules
-        validation_rules = rule.get("validation_rules", {})
-        
-        # Example: User role validation
-        if "user_role_required" in validation_rules:
-            required_role = validation_rules["user_role_required"]
-            user_role = (user_context or {}).get("role")
-            if user_role != required_role:
-                errors.append(f"Action requires user role '{required_role}', but user has role '{user_role}'")
-        
-        # Example: Source validation for research actions
-        if rule["action_name"].upper() == "RESEARCH":
-            source = metadata.get("source")
-            if source:
-                # Validate source against trusted sources
-                trusted_sources = rule.get("trusted_sources", [])
-                if trusted_sources and source not in trusted_sources:
-                    errors.append(f"Source '{source}' is not in trusted sources list")
-        
-        # Example: File type validation
-        if "allowed_file_types" in validation_rules:
-            file_path = metadata.get("file_path")
-            if file_path:
-                file_extension = Path(file_path).suffix.lower()
-                allowed_types = validation_rules["allowed_file_types"]
-                if file_extension not in allowed_types:
-                    errors.append(f"File type '{file_extension}' not allowed. Allowed types: {allowed_types}")
-        
-        # Example: Data size validation
-        if "max_data_size_mb" in validation_rules:
-            data_size = metadata.get("data_size_mb", 0)
-            max_size = validation_rules["max_data_size_mb"]
-            if data_size > max_size:
-                errors.append(f"Data size {data_size}MB exceeds maximum allowed size of {max_size}MB")
-        
-        # Example: Time-based validation
-        if "business_hours_only" in validation_rules and validation_rules["business_hours_only"]:
-            from datetime import datetime
-            current_hour = datetime.now().hour
-            if current_hour < 9 or current_hour > 17:
-                errors.append("Action only allowed during business hours (9 AM - 5 PM)")
-        
+        snapshot = snapshot or self._snapshot
+        plan = snapshot.validation_plans.get(normalize_action_name(rule["action_name"]))
+        if plan is None or plan.rule is not rule:
+            plan = compile_validation_plan(rule)
+        errors: List[str] = []
+        for check in plan.checks:
+            check(metadata, user_context, errors)
         return errors
     
     def _extract_missing_fields(self, error_messages: List[str]) -> List[str]:
@@ -245,6 +483,10 @@ class CGOAgent:
                 "blocked": False
             }
         
+        return self._requirements_from_rule(rule)
+    
+    def _requirements_from_rule(self, rule: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the public requirements view of a resolved rule."""
         return {
             "action_name": rule["action_name"],
             "risk_tier": rule["risk_tier"],
@@ -257,16 +499,106 @@ class CGOAgent:
     def list_all_actions(self) -> List[Dict[str, Any]]:
         """List all available actions and their requirements."""
         actions = []
-        for rule in self.rules_data.get("rules", []):
-            actions.append(self.get_action_requirements(rule["action_name"]))
+        for rule in self._snapshot.rule_index.rules:
+            actions.append(self._requirements_from_rule(rule))
         return actions
     
     def reload_rules(self) -> bool:
-        """Reload rules from file. Returns True if successful."""
+        """
+        Reload rules from file. Returns True if successful.
+        The new ruleset is parsed and compiled before it is published with a
+        single reference swap; on any error the active snapshot is kept. A
+        reload that finishes after one started later (and so read a newer
+        file) is dropped rather than swapping the older rules back in.
+        """
+        with self._reload_lock:
+            self._reload_started += 1
+            reload_number = self._reload_started
         try:
-            self.rules_data = self._load_rules()
-            logger.info("Rules reloaded successfully")
-            return True
+            snapshot = RulesSnapshot.from_ruleset(load_ruleset(self.rules_path, force=True))
         except Exception as e:
             logger.error(f"Failed to reload rules: {e}")
             return False
+        with self._reload_lock:
+            if reload_number < self._reload_active:
+                logger.info("Rules reload superseded by a newer one, keeping the active snapshot")
+                return True
+            self._reload_active = reload_number
+            previous = self._snapshot
+            self._snapshot = snapshot
+            if self.decision_cache is not None and snapshot.version != previous.version:
+                self.decision_cache.clear()
+        if snapshot.version != previous.version:
+            logger.info(f"Rules reloaded successfully (version {snapshot.version[:12]})")
+            self._log_rules_version(snapshot, previous.version)
+        else:
+            logger.info("Rules reloaded successfully (unchanged)")
+        return True
+    
+    def _log_rules_version(self, snapshot: RulesSnapshot, previous_version: str):
+        """Record the activated ruleset version in the WORM audit log."""
+        if self.worm_storage is None:
+            return
+        try:
+            self.worm_storage.log_event(
+                action_name="RULES_RELOAD",
+                status="SUCCESS",
+                metadata={
+                    "rules_path": str(self.rules_path),
+                    "rules_version": snapshot.version,
+                    "previous_version": previous_version,
+                    "rule_count": len(snapshot.rule_index)
+                },
+                risk_tier="LOW",
+                requires_approval=False
+            )
+        except Exception as e:
+            logger.error(f"Failed to log rules version to WORM storage: {e}")
+    
+    def _rules_file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.rules_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def start_rules_watcher(self, poll_interval: float = 2.0) -> bool:
+        """
+        Watch the rules file and hot-reload it when it changes.
+        Polls the file's mtime/size from a daemon thread; a change is applied
+        once the signature has been stable for one poll, so partially written
+        files are not picked up. Returns False if a watcher is already running.
+        """
+        if self._watcher_thread is not None and self._watcher_thread.is_alive():
+            return False
+        self._watcher_stop.clear()
+        self._watcher_thread = threading.Thread(
+            target=self._watch_rules, args=(poll_interval,),
+            name="cgo-rules-watcher", daemon=True
+        )
+        self._watcher_thread.start()
+        logger.info(f"Watching rules file for changes: {self.rules_path} (every {poll_interval}s)")
+        return True
+    
+    def stop_rules_watcher(self, timeout: Optional[float] = None):
+        """Stop the rules file watcher if it is running."""
+        self._watcher_stop.set()
+        if self._watcher_thread is not None:
+            self._watcher_thread.join(timeout)
+            self._watcher_thread = None
+    
+    def _watch_rules(self, poll_interval: float):
+        applied = self._rules_file_signature()
+        pending = applied
+        while not self._watcher_stop.wait(poll_interval):
+            current = self._rules_file_signature()
+            if current is None or current == applied:
+                pending = current
+                continue
+            if current != pending:
+                # Changed since the last poll: wait until the writer is done
+                pending = current
+                continue
+            # On failure the previous snapshot stays active until the next change
+            self.reload_rules()
+            applied = current
@@ -49,10 +49,71 @@ class Config:
     _default_rules_path = os.path.abspath(os.path.join(BASE_DIR, '..', 'config', 'rules.json'))
     RULES_PATH: str = os.path.abspath(os.getenv('NOTREKT_RULES_PATH', _default_rules_path))
     logger.info(f"[Config] Using RULES_PATH: {RULES_PATH}")
+    # Poll interval (seconds) for hot-reloading the rules file; 0 disables watching
+    RULES_WATCH_INTERVAL: float = float(os.getenv('NOTREKT_RULES_WATCH_INTERVAL', '0'))
+    # TTL (seconds) for memoized CGO validation decisions; 0 disables the cache
+    CGO_DECISION_CACHE_TTL: float = float(os.getenv('NOTREKT_CGO_DECISION_CACHE_TTL', '0'))
 
     # RAG System Configuration
     CORPUS_PATH: str = os.path.abspath(os.getenv('NOTREKT_CORPUS_PATH', os.path.join(BASE_DIR, '..', 'trusted_knowledge_corpus')))
     VECTOR_DB_PATH: str = os.path.abspath(os.getenv('NOTREKT_VECTOR_DB_PATH', os.path.join(BASE_DIR, '..', 'data', 'vector_store')))
+    # Sentence-transformers model shared by all agents (see app/model_registry.py)
+    EMBEDDING_MODEL: str = os.getenv('NOTREKT_EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+    # Load the embedding model and vector store when the API server starts
+    WARMUP_ON_STARTUP: bool = os.getenv('NOTREKT_WARMUP_ON_STARTUP', 'true').lower() == 'true'
+    # LRU cache of query embeddings (0 disables); persisted between restarts if a dir is set
+    QUERY_CACHE_BYTES: int = int(os.getenv('NOTREKT_QUERY_CACHE_BYTES', str(32 * 1024 * 1024)))
+    QUERY_CACHE_DIR: str = os.getenv('NOTREKT_QUERY_CACHE_DIR', '')
+    # Persistent content-addressed cache of chunk embeddings (next to the vector index)
+    CHUNK_EMBEDDING_CACHE: bool = os.getenv('NOTREKT_CHUNK_EMBEDDING_CACHE', 'true').lower() == 'true'
+    CHUNK_EMBEDDING_CACHE_DTYPE: str = os.getenv('NOTREKT_CHUNK_EMBEDDING_CACHE_DTYPE', 'float32')
+    # Chunk size and sentence overlap, in characters or in tokens of the embedding model's tokenizer
+    CHUNK_SIZE: int = int(os.getenv('NOTREKT_CHUNK_SIZE', '500'))
+    CHUNK_OVERLAP: int = int(os.getenv('NOTREKT_CHUNK_OVERLAP', '0'))
+    CHUNK_UNIT: str = os.getenv('NOTREKT_CHUNK_UNIT', 'chars')
+    # Number of chunks encoded per embedding forward pass during indexing
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv('NOTREKT_EMBEDDING_BATCH_SIZE', '64'))
+    # Processes used to hash/extract/chunk corpus files (1 = in-process)
+    INGEST_WORKERS: int = int(os.getenv('NOTREKT_INGEST_WORKERS', '1'))
+    # Seconds one file may spend in extraction in the worker pool before it is abandoned (0 = no limit)
+    EXTRACT_TIMEOUT: float = float(os.getenv('NOTREKT_EXTRACT_TIMEOUT', '120'))
+    # FAISS index type: flat (exact), fp16, sq8, ivf_flat, ivf_pq or hnsw (see app/vector_index.py)
+    VECTOR_INDEX_TYPE: str = os.getenv('NOTREKT_VECTOR_INDEX_TYPE', 'flat')
+    # Approximate indexes are only built once the corpus has this many chunks
+    VECTOR_INDEX_MIN_VECTORS: int = int(os.getenv('NOTREKT_VECTOR_INDEX_MIN_VECTORS', '4096'))
+    VECTOR_INDEX_NLIST: int = int(os.getenv('NOTREKT_VECTOR_INDEX_NLIST', '0'))  # 0 = auto
+    VECTOR_INDEX_PQ_M: int = int(os.getenv('NOTREKT_VECTOR_INDEX_PQ_M', '0'))  # 0 = auto
+    VECTOR_INDEX_HNSW_M: int = int(os.getenv('NOTREKT_VECTOR_INDEX_HNSW_M', '32'))
+    VECTOR_INDEX_TRAIN_SAMPLE: int = int(os.getenv('NOTREKT_VECTOR_INDEX_TRAIN_SAMPLE', '100000'))
+    # Query-time search breadth for IVF (nprobe) and HNSW (efSearch) indexes
+    VECTOR_SEARCH_NPROBE: int = int(os.getenv('NOTREKT_VECTOR_SEARCH_NPROBE', '16'))
+    VECTOR_SEARCH_EF: int = int(os.getenv('NOTREKT_VECTOR_SEARCH_EF', '64'))
+    # Quantized indexes fetch k * factor candidates and re-rank them with exact vectors
+    # kept in faiss_rerank.bin (0 = no re-ranking and no exact copy of the vectors)
+    VECTOR_RERANK_FACTOR: int = int(os.getenv('NOTREKT_VECTOR_RERANK_FACTOR', '4'))
+    # Serving processes memory-map the saved index read-only and share its pages;
+    # corpus syncs must then run in a separate (writable) process
+    VECTOR_STORE_READ_ONLY: bool = os.getenv('NOTREKT_VECTOR_STORE_READ_ONLY', 'false').lower() == 'true'
+    # Index versions kept on disk after a rebuild (the live one plus older ones to fall back on)
+    INDEX_VERSIONS_KEPT: int = int(os.getenv('NOTREKT_INDEX_VERSIONS_KEPT', '2'))
+    # Index shards the corpus is partitioned into by source path (1 = a single VectorStore)
+    VECTOR_STORE_SHARDS: int = int(os.getenv('NOTREKT_VECTOR_STORE_SHARDS', '1'))
+    # Worker processes serving the shards read-only (0 = search shards on threads in-process)
+    SHARD_PROCESSES: int = int(os.getenv('NOTREKT_SHARD_PROCESSES', '0'))
+    # BM25 index kept next to the vector index (needed for lexical/hybrid search)
+    LEXICAL_INDEX: bool = os.getenv('NOTREKT_LEXICAL_INDEX', 'true').lower() == 'true'
+    # Default search mode: dense (vector only), lexical (BM25 only) or hybrid (rank fusion)
+    SEARCH_MODE: str = os.getenv('NOTREKT_SEARCH_MODE', 'dense')
+    # Candidates taken from each ranking before reciprocal-rank fusion, and the RRF constant
+    HYBRID_CANDIDATES: int = int(os.getenv('NOTREKT_HYBRID_CANDIDATES', '50'))
+    HYBRID_RRF_K: int = int(os.getenv('NOTREKT_HYBRID_RRF_K', '60'))
+    # Cross-encoder re-ranking of ResearchAgent's top dense candidates (CPU, batched)
+    RERANK_ENABLED: bool = os.getenv('NOTREKT_RERANK', 'false').lower() == 'true'
+    RERANK_MODEL: str = os.getenv('NOTREKT_RERANK_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+    RERANK_CANDIDATES: int = int(os.getenv('NOTREKT_RERANK_CANDIDATES', '20'))
+    RERANK_BATCH_SIZE: int = int(os.getenv('NOTREKT_RERANK_BATCH_SIZE', '16'))
+    # Per-query time for re-ranking before falling back to the dense ranking (0 = no limit)
+    RERANK_BUDGET_MS: float = float(os.getenv('NOTREKT_RERANK_BUDGET_MS', '150'))
     
     # API Configuration
     API_HOST: str = os.getenv('NOTREKT_API_HOST', 'localhost')
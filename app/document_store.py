@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Document Store
+Chunk documents of the trusted knowledge corpus, addressed by FAISS vector id (SOP-RAG-001).
+
+The vector index is ID-mapped, so search results come back as stable vector
+ids rather than list positions. DocumentStore resolves those ids to Document
+objects and supports removing the chunks of changed or deleted files.
+
+On disk the store is columnar rather than a pickle of every Document:
+
+    documents.bin       UTF-8 chunk texts, concatenated
+    documents.idx.npy   one row per chunk, sorted by vector id:
+                        (vector_id, offset, length, file, chunk)
+    documents.sqlite    one row per indexed file version: doc_id, source_path,
+                        title stem, hash, indexed_at and metadata JSON
+
+The text blob and the chunk table are memory-mapped read-only, so opening a
+store is near-instant, pages are shared between worker processes, and only
+the chunks a caller actually asks for are materialized as Documents.
+Chunks added after opening live in memory until the next save. Chunk ids and
+titles follow the "<doc_id>_<n>" / "<stem>_chunk<n>" convention used by
+VectorStore, which is how they are rebuilt from the file table.
+"""
+
+import os
+import json
+import mmap
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Callable, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - rag_system reports missing dependencies
+    np = None
+
+FORMAT_VERSION = 1
+TEXT_FILE = "documents.bin"
+INDEX_FILE = "documents.idx.npy"
+META_FILE = "documents.sqlite"
+
+# Row layout of documents.idx.npy
+CHUNK_FIELDS = [
+    ("vector_id", "<i8"),
+    ("offset", "<i8"),
+    ("length", "<i8"),
+    ("file", "<i4"),
+    ("chunk", "<i4"),
+]
+
+
+class _Segment:
+    """Read-only, memory-mapped view of a saved document store."""
+
+    def __init__(self, directory: Path, factory: Callable[..., Any]):
+        self.factory = factory
+        conn = sqlite3.connect(f"file:{directory / META_FILE}?mode=ro", uri=True)
+        try:
+            info = dict(conn.execute("SELECT key, value FROM info"))
+            self.files = conn.execute(
+                "SELECT doc_id, source_path, title_stem, hash, indexed_at, metadata FROM files ORDER BY file"
+            ).fetchall()
+        finally:
+            conn.close()
+        if int(info.get("format_version", -1)) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported document store format: {info.get('format_version')}")
+
+        self.chunks = np.load(directory / INDEX_FILE, mmap_mode="r")
+        if len(self.chunks) != int(info["chunks"]):
+            raise ValueError("Document store chunk table does not match its metadata")
+        # Column views of the mapped table (no copies)
+        self.vector_ids = self.chunks["vector_id"]
+        self._offsets = self.chunks["offset"]
+        self._lengths = self.chunks["length"]
+        self._file_rows = self.chunks["file"]
+        self._chunk_numbers = self.chunks["chunk"]
+        # The map keeps its own reference to the file, so the handle is closed right away
+        with open(directory / TEXT_FILE, "rb") as text_file:
+            text_size = os.fstat(text_file.fileno()).st_size
+            if text_size != int(info["text_bytes"]):
+                raise ValueError("Document store text blob does not match its metadata")
+            # mmap cannot map an empty file
+            self.text = mmap.mmap(text_file.fileno(), 0, access=mmap.ACCESS_READ) if text_size else b""
+        self._metadata_cache: Dict[int, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def position(self, vector_id: int) -> int:
+        """Row of a vector id in the chunk table, or -1."""
+        ids = self.vector_ids
+        row = int(ids.searchsorted(vector_id))
+        if row < len(ids) and ids[row] == vector_id:
+            return row
+        return -1
+
+    def raw_text(self, row: int) -> bytes:
+        offset = int(self._offsets[row])
+        return self.text[offset:offset + int(self._lengths[row])]
+
+    def file_values(self, row: int) -> Tuple[Any, ...]:
+        return tuple(self.files[int(self._file_rows[row])])
+
+    def chunk_number(self, row: int) -> int:
+        return int(self._chunk_numbers[row])
+
+    def materialize(self, row: int) -> Any:
+        file_row = int(self._file_rows[row])
+        chunk = int(self._chunk_numbers[row])
+        doc_id, source_path, title_stem, file_hash, indexed_at, metadata_json = self.files[file_row]
+        metadata = self._metadata_cache.get(file_row)
+        if metadata is None:
+            metadata = json.loads(metadata_json)
+            self._metadata_cache[file_row] = metadata
+        return self.factory(
+            id=f"{doc_id}_{chunk}",
+            title=f"{title_stem}_chunk{chunk}",
+            content=self.raw_text(row).decode("utf-8"),
+            source_path=source_path,
+            metadata=metadata,
+            hash=file_hash,
+            indexed_at=indexed_at,
+            vector_id=int(self.vector_ids[row]),
+        )
+
+    def close(self):
+        if isinstance(self.text, mmap.mmap):
+            self.text.close()
+
+
+class DocumentStore:
+    """Mapping of vector id -> Document, iterated in id order."""
+
+    def __init__(self, documents: Iterable[Any] = ()):
+        self._docs: Dict[int, Any] = {}
+        self._segment: Optional[_Segment] = None
+        self._removed: Set[int] = set()
+        self.add(documents)
+
+    @staticmethod
+    def exists(directory) -> bool:
+        directory = Path(directory)
+        return all((directory / name).exists() for name in (TEXT_FILE, INDEX_FILE, META_FILE))
+
+    @classmethod
+    def open(cls, directory, factory: Callable[..., Any]) -> "DocumentStore":
+        """Open a saved store; factory builds a document from Document's fields."""
+        store = cls()
+        store._segment = _Segment(Path(directory), factory)
+        return store
+
+    def copy(self) -> "DocumentStore":
+        """
+        An independent store with the same documents. The mapped segment is
+        shared; only the changes made since it was written are copied.
+        """
+        clone = DocumentStore()
+        clone._segment = self._segment
+        clone._docs = dict(self._docs)
+        clone._removed = set(self._removed)
+        return clone
+
+    def __len__(self) -> int:
+        on_disk = len(self._segment) - len(self._removed) if self._segment is not None else 0
+        return on_disk + len(self._docs)
+
+    def __iter__(self) -> Iterator[Any]:
+        for vector_id in self.ids():
+            yield self[vector_id]
+
+    def __contains__(self, vector_id: int) -> bool:
+        return self._locate(int(vector_id)) is not None
+
+    def __getitem__(self, vector_id: int) -> Any:
+        document = self.get(vector_id)
+        if document is None:
+            raise KeyError(vector_id)
+        return document
+
+    def _locate(self, vector_id: int) -> Optional[Tuple[str, int]]:
+        if vector_id in self._docs:
+            return ("memory", vector_id)
+        if self._segment is not None and vector_id not in self._removed:
+            row = self._segment.position(vector_id)
+            if row >= 0:
+                return ("disk", row)
+        return None
+
+    def get(self, vector_id: int, default: Optional[Any] = None) -> Optional[Any]:
+        """Return the document for a vector id, materializing it from disk if needed."""
+        vector_id = int(vector_id)
+        document = self._docs.get(vector_id)
+        if document is not None:
+            return document
+        location = self._locate(vector_id)
+        if location is None:
+            return default
+        return self._segment.materialize(location[1])
+
+    def add(self, documents: Iterable[Any]):
+        """Add documents; each must carry its assigned vector_id."""
+        for document in documents:
+            self._docs[document.vector_id] = document
+
+    def remove(self, vector_ids: Iterable[int]) -> int:
+        """Remove documents by vector id. Returns the number removed."""
+        removed = 0
+        for vector_id in vector_ids:
+            vector_id = int(vector_id)
+            if self._docs.pop(vector_id, None) is not None:
+                removed += 1
+            elif self._segment is not None and vector_id not in self._removed and self._segment.position(vector_id) >= 0:
+                self._removed.add(vector_id)
+                removed += 1
+        return removed
+
+    def ids(self) -> List[int]:
+        """All vector ids in the store, ascending."""
+        in_memory = np.fromiter(self._docs, dtype="int64", count=len(self._docs))
+        if self._segment is None:
+            return np.sort(in_memory).tolist()
+        on_disk = self._segment.vector_ids
+        if self._removed:
+            on_disk = np.setdiff1d(on_disk, np.fromiter(self._removed, dtype="int64", count=len(self._removed)),
+                                   assume_unique=True)
+        return np.union1d(on_disk, in_memory).tolist()
+
+    def max_id(self) -> int:
+        """
+        Largest vector id the store holds or has held since it was saved, or
+        -1 when empty. Removed ids still count, so they are never reissued.
+        """
+        on_disk = int(self._segment.vector_ids[-1]) if self._segment is not None and len(self._segment) else -1
+        return max(on_disk, max(self._docs, default=-1))
+
+    def save(self, directory, factory: Callable[..., Any]):
+        """
+        Write the store in columnar form and reopen it from the new files.
+        Chunk text already on disk is copied as bytes without decoding. The
+        files are written under temporary names and moved into place, the
+        SQLite table last.
+        """
+        directory = Path(directory)
+        file_rows: Dict[Tuple[str, str, str, str], int] = {}
+        files: List[Tuple[Any, ...]] = []
+        records = []
+        text_tmp = directory / (TEXT_FILE + ".tmp")
+        offset = 0
+        with open(text_tmp, "wb") as text_out:
+            for vector_id in self.ids():
+                location = self._locate(vector_id)
+                if location[0] == "memory":
+                    document = self._docs[vector_id]
+                    data = document.content.encode("utf-8")
+                    doc_id, chunk = document.id.rsplit("_", 1)
+                    title_stem = document.title.rsplit("_chunk", 1)[0]
+                    metadata_json = json.dumps(document.metadata, sort_keys=True, default=str)
+                    file_key = (doc_id, document.source_path, document.hash, document.indexed_at)
+                    file_values = (doc_id, document.source_path, title_stem, document.hash,
+                                   document.indexed_at, metadata_json)
+                else:
+                    row = location[1]
+                    data = self._segment.raw_text(row)
+                    chunk = self._segment.chunk_number(row)
+                    file_values = self._segment.file_values(row)
+                    file_key = (file_values[0], file_values[1], file_values[3], file_values[4])
+                file_row = file_rows.get(file_key)
+                if file_row is None:
+                    file_row = file_rows[file_key] = len(files)
+                    files.append(file_values)
+                records.append((vector_id, offset, len(data), file_row, int(chunk)))
+                text_out.write(data)
+                offset += len(data)
+
+        index_tmp = directory / (INDEX_FILE + ".tmp.npy")
+        np.save(index_tmp, np.array(records, dtype=np.dtype(CHUNK_FIELDS)))
+        meta_tmp = directory / (META_FILE + ".tmp")
+        if meta_tmp.exists():
+            meta_tmp.unlink()
+        conn = sqlite3.connect(meta_tmp)
+        try:
+            conn.execute("CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute(
+                "CREATE TABLE files (file INTEGER PRIMARY KEY, doc_id TEXT, source_path TEXT, "
+                "title_stem TEXT, hash TEXT, indexed_at TEXT, metadata TEXT)"
+            )
+            conn.executemany("INSERT INTO info VALUES (?, ?)", [
+                ("format_version", str(FORMAT_VERSION)),
+                ("chunks", str(len(records))),
+                ("text_bytes", str(offset)),
+            ])
+            conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [(row, *values) for row, values in enumerate(files)])
+            conn.commit()
+        finally:
+            conn.close()
+
+        os.replace(text_tmp, directory / TEXT_FILE)
+        os.replace(index_tmp, directory / INDEX_FILE)
+        os.replace(meta_tmp, directory / META_FILE)
+        # The old segment may be shared with a copy(); it is unmapped once no
+        # store refers to it
+        self._docs, self._removed = {}, set()
+        self._segment = _Segment(directory, factory)
+
+    def close(self):
+        """Release the memory maps and drop all documents from this store object."""
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        self._docs = {}
+        self._removed = set()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Embedding Caches
+Caches that let retrieval skip the transformer for text it has already embedded (SOP-RAG-001).
+
+QueryEmbeddingCache: in-memory LRU of normalized query embeddings shared by
+all searches in a process. Research questions and verifier claims repeat often (retries, boilerplate
+sentences), and each repeat would otherwise run the transformer again.
+Entries are keyed by a hash of model name + text, so a model change can never
+return stale vectors, and the cache is bounded by the bytes its vectors use.
+If NOTREKT_QUERY_CACHE_DIR is set each model's cache is saved there at
+process exit and reloaded on start.
+
+ChunkEmbeddingCache: persistent, content-addressed store of chunk
+embeddings (SHA-256 of model name + chunk text -> vector) kept next to the
+vector index, so rebuilds and re-chunking only embed text that is new.
+"""
+
+import os
+import atexit
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .config_manager import Config, logger
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - rag_system reports missing dependencies
+    np = None
+
+
+def query_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class QueryEmbeddingCache:
+    """Thread-safe, byte-bounded LRU cache of query embeddings for one model."""
+
+    def __init__(self, model_name: str, max_bytes: int, persist_path: Optional[str] = None):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, texts: List[str]) -> List[Optional["np.ndarray"]]:
+        """Cached vector (or None) per text, in order."""
+        keys = [query_key(self.model_name, text) for text in texts]
+        found: List[Optional["np.ndarray"]] = []
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                found.append(vector)
+        return found
+
+    def put_many(self, texts: List[str], vectors: "np.ndarray"):
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                self._put(query_key(self.model_name, text), np.array(vector, dtype="float32"))
+
+    def _put(self, key: str, vector: "np.ndarray"):
+        if vector.nbytes > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        vector.setflags(write=False)
+        self._entries[key] = vector
+        self._bytes += vector.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def save(self, path: Optional[str] = None):
+        """Write the cache (in LRU order) to an .npz file."""
+        path = path or self.persist_path
+        if not path:
+            return
+        with self._lock:
+            keys = list(self._entries)
+            vectors = np.stack(list(self._entries.values())) if keys else np.zeros((0, 0), dtype="float32")
+        try:
+            tmp_path = f"{path}.tmp.npz"
+            np.savez(tmp_path, model=np.array(self.model_name), keys=np.array(keys), vectors=vectors)
+            os.replace(tmp_path, path)
+            logger.info(f"Saved {len(keys)} query embeddings to {path}")
+        except Exception as e:
+            logger.error(f"Failed to save query embedding cache: {e}")
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Load entries saved for the same model. Returns the number loaded."""
+        path = path or self.persist_path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["model"]) != self.model_name:
+                    logger.info(f"Ignoring query embedding cache for another model: {path}")
+                    return 0
+                keys, vectors = list(data["keys"]), data["vectors"]
+        except Exception as e:
+            logger.warning(f"Failed to load query embedding cache: {e}")
+            return 0
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._put(str(key), np.array(vector, dtype="float32"))
+        return len(keys)
+
+
+_caches: Dict[str, QueryEmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_query_cache(model_name: str = "") -> Optional[QueryEmbeddingCache]:
+    """
+    Process-wide query embedding cache for a model, or None if disabled
+    (NOTREKT_QUERY_CACHE_BYTES=0). Loaded from and saved to
+    NOTREKT_QUERY_CACHE_DIR when that is set.
+    """
+    if Config.QUERY_CACHE_BYTES <= 0 or np is None:
+        return None
+    model_name = model_name or Config.EMBEDDING_MODEL
+    cache = _caches.get(model_name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(model_name)
+            if cache is None:
+                persist_path = _persist_path(model_name)
+                cache = QueryEmbeddingCache(model_name, Config.QUERY_CACHE_BYTES, persist_path)
+                if persist_path:
+                    cache.load()
+                    atexit.register(cache.save)
+                _caches[model_name] = cache
+    return cache
+
+
+def _persist_path(model_name: str) -> Optional[str]:
+    if not Config.QUERY_CACHE_DIR:
+        return None
+    os.makedirs(Config.QUERY_CACHE_DIR, exist_ok=True)
+    digest = hashlib.sha256(model_name.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(Config.QUERY_CACHE_DIR, f"query_embeddings_{digest}.npz")
+
+
+def clear_query_caches():
+    """Drop all process-wide caches (mainly for tests)."""
+    with _caches_lock:
+        _caches.clear()
+
+
+class ChunkEmbeddingCache:
+    """
+    SQLite-backed map of content hash -> normalized chunk embedding.
+    Vectors are stored as float32 or float16 (half the size; decoded back to
+    float32). Entries written for another model name or dtype are dropped
+    when the cache is opened.
+    """
+
+    # SQLite host-parameter limit for "IN (...)" lookups
+    LOOKUP_BATCH = 500
+
+    def __init__(self, path: str, model_name: str, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported chunk embedding cache dtype: {dtype}")
+        self.path = str(path)
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+        info = dict(self._conn.execute("SELECT key, value FROM info"))
+        if info.get("model") != model_name or info.get("dtype") != self.dtype.name:
+            if info:
+                logger.info(f"Chunk embedding cache was built for {info.get('model')}/{info.get('dtype')}, clearing it")
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.executemany("INSERT OR REPLACE INTO info VALUES (?, ?)",
+                                   [("model", model_name), ("dtype", self.dtype.name)])
+        self._conn.commit()
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, texts: List[str]) -> List[Optional["np.ndarray"]]:
+        """Cached float32 vector (or None) per text, in order."""
+        keys = [self.key(text) for text in texts]
+        found: Dict[bytes, bytes] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), self.LOOKUP_BATCH):
+                batch = unique[start:start + self.LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ))
+        vectors = [
+            np.frombuffer(found[key], dtype=self.dtype).astype("float32") if key in found else None
+            for key in keys
+        ]
+        hits = sum(vector is not None for vector in vectors)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, texts: List[str], vectors: "np.ndarray"):
+        rows = [(self.key(text), np.asarray(vector, dtype=self.dtype).tobytes())
+                for text, vector in zip(texts, vectors)]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def prune(self, keep_texts: List[str]) -> int:
+        """Delete every entry whose text is not in keep_texts. Returns entries deleted."""
+        with self._lock:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep (key BLOB PRIMARY KEY)")
+            self._conn.execute("DELETE FROM keep")
+            self._conn.executemany("INSERT OR IGNORE INTO keep VALUES (?)",
+                                   ((self.key(text),) for text in keep_texts))
+            deleted = self._conn.execute("DELETE FROM embeddings WHERE key NOT IN (SELECT key FROM keep)").rowcount
+            self._conn.execute("DELETE FROM keep")
+            self._conn.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
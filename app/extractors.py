@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Document Extractors
+Registry of per-format text extractors for the trusted knowledge corpus (SOP-RAG-001).
+
+An extractor opens one file and returns (text blocks, metadata): the blocks
+are produced lazily so text_extraction can chunk large files as they are
+read. Extractors are registered by file suffix. Backends that need a
+third-party package name it in `requires`; the package is only imported
+when a file of that type is opened, and the suffix is only reported as
+supported when the package is installed.
+
+    .txt .md        plain text, read in blocks
+    .json           parsed, rendered as indented JSON piece by piece
+    .html .htm      visible text via the standard library HTML parser
+    .pdf            page text via pypdf                (pip install pypdf)
+    .docx           paragraphs and tables via python-docx (pip install python-docx)
+
+Extractors marked `isolate` (the binary formats, whose parsers can be slow
+or blow up on malformed input) are always run in the ingestion worker pool,
+under the per-file NOTREKT_EXTRACT_TIMEOUT, so one bad document cannot stall
+or crash indexing of the rest.
+"""
+
+import json
+import threading
+import importlib.util
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+
+OpenResult = Tuple[Iterator[str], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class Extractor:
+    """Text extractor for a set of file suffixes."""
+    name: str
+    suffixes: Tuple[str, ...]
+    # open(file_path, block_chars) -> (text blocks, metadata)
+    open: Callable[[Path, int], OpenResult]
+    # Modules imported by open(); the extractor is unavailable without them
+    requires: Tuple[str, ...] = ()
+    # Run in the ingestion worker pool under the per-file timeout
+    isolate: bool = False
+
+    def missing_modules(self) -> Tuple[str, ...]:
+        return tuple(module for module in self.requires if importlib.util.find_spec(module) is None)
+
+    def available(self) -> bool:
+        return not self.missing_modules()
+
+
+_registry: Dict[str, Extractor] = {}
+_registry_lock = threading.Lock()
+
+
+def register_extractor(extractor: Extractor):
+    """Register (or replace) the extractor for each of its suffixes."""
+    with _registry_lock:
+        for suffix in extractor.suffixes:
+            _registry[suffix.lower()] = extractor
+
+
+def get_extractor(file_path: Path) -> Optional[Extractor]:
+    """Extractor registered for a file's suffix, installed or not."""
+    return _registry.get(Path(file_path).suffix.lower())
+
+
+def supported_extensions() -> Set[str]:
+    """Suffixes whose extractor can run in this environment."""
+    with _registry_lock:
+        extractors = dict(_registry)
+    return {suffix for suffix, extractor in extractors.items() if extractor.available()}
+
+
+def unavailable_extensions() -> Dict[str, Tuple[str, ...]]:
+    """Registered suffixes whose backend is not installed -> missing modules."""
+    with _registry_lock:
+        extractors = dict(_registry)
+    missing = {suffix: extractor.missing_modules() for suffix, extractor in extractors.items()}
+    return {suffix: modules for suffix, modules in missing.items() if modules}
+
+
+def needs_isolation(file_path: Path) -> bool:
+    extractor = get_extractor(file_path)
+    return extractor is not None and extractor.isolate
+
+
+def _file_metadata(file_path: Path, file_type: str) -> Dict[str, Any]:
+    stat = file_path.stat()
+    return {
+        "file_type": file_type,
+        "size_bytes": stat.st_size,
+        "last_modified": stat.st_mtime
+    }
+
+
+# Plain text and JSON
+
+def _read_blocks(file_path: Path, block_chars: int) -> Iterator[str]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for block in iter(lambda: f.read(block_chars), ""):
+            yield block
+
+
+def open_plain_text(file_path: Path, block_chars: int) -> OpenResult:
+    return _read_blocks(file_path, block_chars), _file_metadata(file_path, file_path.suffix.lower())
+
+
+def open_json(file_path: Path, block_chars: int) -> OpenResult:
+    """JSON is parsed up front (for its keys) and rendered in indented form piece by piece."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    metadata = _file_metadata(file_path, "json")
+    metadata["json_keys"] = list(data.keys()) if isinstance(data, dict) else []
+    return json.JSONEncoder(indent=2).iterencode(data), metadata
+
+
+# HTML
+
+class _HTMLText(HTMLParser):
+    """Collects the visible text of an HTML document as it is fed."""
+
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+    BLOCK_TAGS = {
+        "p", "div", "br", "li", "tr", "td", "th", "h1", "h2", "h3", "h4", "h5", "h6",
+        "section", "article", "header", "footer", "blockquote", "pre", "table", "ul", "ol", "hr",
+    }
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.title = ""
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title += data
+        else:
+            self.parts.append(data)
+
+    def take(self) -> str:
+        text, self.parts = "".join(self.parts), []
+        return text
+
+
+def open_html(file_path: Path, block_chars: int) -> OpenResult:
+    """Visible text of an HTML page; metadata["title"] is filled in once the <title> has been read."""
+    metadata = _file_metadata(file_path, "html")
+
+    def blocks() -> Iterator[str]:
+        parser = _HTMLText()
+        for block in _read_blocks(file_path, block_chars):
+            parser.feed(block)
+            text = parser.take()
+            if text:
+                yield text
+        parser.close()
+        text = parser.take()
+        if text:
+            yield text
+        if parser.title.strip():
+            metadata["title"] = " ".join(parser.title.split())
+
+    return blocks(), metadata
+
+
+# PDF (pypdf)
+
+def open_pdf(file_path: Path, block_chars: int) -> OpenResult:
+    """Text of each page, one block per page."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(str(file_path))
+    if reader.is_encrypted and not reader.decrypt(""):
+        raise ValueError("PDF is encrypted")
+    metadata = _file_metadata(file_path, "pdf")
+    metadata["pages"] = len(reader.pages)
+    info = reader.metadata
+    if info is not None and info.title:
+        metadata["title"] = str(info.title)
+
+    def pages() -> Iterator[str]:
+        for page in reader.pages:
+            text = page.extract_text() or ""
+            if text.strip():
+                yield text + "\n\n"
+
+    return pages(), metadata
+
+
+# DOCX (python-docx)
+
+def open_docx(file_path: Path, block_chars: int) -> OpenResult:
+    """Body paragraphs, then the text of each table row."""
+    import docx
+
+    document = docx.Document(str(file_path))
+    metadata = _file_metadata(file_path, "docx")
+    title = document.core_properties.title
+    if title:
+        metadata["title"] = title
+
+    def paragraphs() -> Iterator[str]:
+        for paragraph in document.paragraphs:
+            if paragraph.text.strip():
+                yield paragraph.text + "\n"
+        for table in document.tables:
+            for row in table.rows:
+                cells = [cell.text.strip() for cell in row.cells if cell.text.strip()]
+                if cells:
+                    yield " | ".join(cells) + "\n"
+
+    return paragraphs(), metadata
+
+
+for _extractor in (
+    Extractor("text", (".txt", ".md"), open_plain_text),
+    Extractor("json", (".json",), open_json),
+    Extractor("html", (".html", ".htm"), open_html),
+    Extractor("pdf", (".pdf",), open_pdf, requires=("pypdf",), isolate=True),
+    Extractor("docx", (".docx",), open_docx, requires=("docx",), isolate=True),
+):
+    register_extractor(_extractor)
@@ -8,15 +8,28 @@
 import json
 from pathlib import Path
 
+from .ruleset import load_ruleset
+
 class GovernanceCore:
     """
-    Loads and caches rules.json in memory for fast access.
     Provides rule lookup and validation for actions.
+    Rules come from the process-wide shared Ruleset (see ruleset.py), so
+    rules.json is parsed once per process no matter how many consumers exist.
     """
     def __init__(self, rules_path):
-        with open(rules_path, 'r') as f:
-            self.rules_data = json.load(f)
-        self.rules_by_action = {r['action_name']: r for r in self.rules_data['rules']}
+        self.ruleset = load_ruleset(rules_path)
+
+    @property
+    def rules_data(self):
+        return self.ruleset.rules_data
+
+    @property
+    def rules_by_action(self):
+        # Exact, case-sensitive names (last declaration wins), as before
+        return self.ruleset.derive(
+            "governance.rules_by_action",
+            lambda rs: {r['action_name']: r for r in rs.rules}
+        )
 
     def get_rule_for_action(self, action_name):
         return self.rules_by_action.get(action_name)
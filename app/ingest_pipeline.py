@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Corpus Ingestion Pipeline
+Staged, parallel ingestion of the trusted knowledge corpus into the vector store (SOP-RAG-001).
+
+Stages, connected by bounded queues so a slow stage applies back-pressure
+instead of buffering the whole corpus in memory:
+
+    discovery -> prepare (hash/extract/chunk) -> embed (batched) -> write (single writer)
+
+With workers > 1 the prepare stage runs in a process pool using the
+module-level functions in text_extraction; otherwise it runs in-process via
+VectorStore._prepare_document, except for formats whose extractor is marked
+isolate (PDF, DOCX), which always go through the pool. A file whose
+extraction takes longer than NOTREKT_EXTRACT_TIMEOUT seconds is abandoned
+and counted as failed: the pool's workers are terminated and the other
+in-flight files resubmitted to a fresh pool. Embedding runs in one or more threads that
+encode chunks from several files per forward pass. Only the writer thread
+touches the FAISS index and the document store.
+"""
+
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Iterable, Tuple
+
+from .config_manager import Config, logger
+from .text_extraction import calculate_file_hash, chunk_file
+from .extractors import needs_isolation
+
+# Marks the end of a stage's output on a queue
+_DONE = object()
+
+
+@dataclass
+class ExtractedFile:
+    """Plain-data result of preparing one file in a worker process."""
+    source_path: str
+    hash: str
+    chunks: Optional[List[str]] = None
+    metadata: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def extract_file(source_path: str, known_hash: Optional[str] = None) -> ExtractedFile:
+    """
+    Hash, extract and chunk one corpus file. Runs in a worker process.
+    If the content hash equals known_hash the file is not read further and
+    chunks is left as None.
+    """
+    try:
+        file_path = Path(source_path)
+        file_hash = calculate_file_hash(file_path)
+        if known_hash is not None and file_hash == known_hash:
+            return ExtractedFile(source_path, file_hash)
+        chunks, metadata = chunk_file(file_path)
+        return ExtractedFile(source_path, file_hash, chunks=list(chunks), metadata=metadata)
+    except Exception as e:
+        return ExtractedFile(source_path, "", error=str(e))
+
+
+class ExtractionPool:
+    """
+    Process pool running extract_file whose workers can be replaced when a
+    file hangs or kills its worker. ProcessPoolExecutor cannot cancel a
+    call that is already running, so restart() terminates the workers and
+    the next submit starts a new pool.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def submit(self, file_path: Path, known_hash: Optional[str]) -> Future:
+        if self._pool is None:
+            # spawn, not fork: the parent already runs embedding threads and holds the model
+            context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._pool.submit(extract_file, str(file_path), known_hash)
+
+    def restart(self):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    def close(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+@dataclass
+class IngestMetrics:
+    """Progress and throughput counters for one pipeline run."""
+    files_total: int = 0
+    files_prepared: int = 0
+    files_added: int = 0
+    files_changed: int = 0
+    files_unchanged: int = 0
+    files_failed: int = 0
+    files_timed_out: int = 0
+    chunks_embedded: int = 0
+    chunks_written: int = 0
+    chunks_replaced: int = 0
+    embed_batches: int = 0
+    prepare_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files_prepared / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks_written / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.__dict__,
+            "files_per_second": round(self.files_per_second, 2),
+            "chunks_per_second": round(self.chunks_per_second, 2),
+        }
+
+
+class IngestPipeline:
+    """
+    Runs one ingestion pass of a list of files into a VectorStore.
+
+    progress, if given, is called from the writer thread with the running
+    IngestMetrics after every written batch and once at the end.
+    extract_timeout bounds the seconds spent extracting one file in the
+    worker pool (default Config.EXTRACT_TIMEOUT; 0 = no limit).
+    """
+
+    def __init__(self, store, workers: Optional[int] = None, embed_workers: int = 1,
+                 batch_size: Optional[int] = None, queue_size: int = 8,
+                 progress: Optional[Callable[[IngestMetrics], None]] = None,
+                 extract_timeout: Optional[float] = None):
+        self.store = store
+        self.workers = max(1, workers if workers is not None else Config.INGEST_WORKERS)
+        self.extract_timeout = extract_timeout if extract_timeout is not None else Config.EXTRACT_TIMEOUT
+        self.embed_workers = max(1, embed_workers)
+        self.batch_size = max(1, batch_size or store.embedding_batch_size)
+        self.queue_size = max(1, queue_size)
+        self.progress = progress
+        self.metrics = IngestMetrics()
+        self._lock = threading.Lock()
+
+    def run(self, files: Iterable[Path]) -> IngestMetrics:
+        files = list(files)
+        self.metrics = IngestMetrics(files_total=len(files))
+        if not files:
+            return self.metrics
+        started = time.perf_counter()
+
+        prepared_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        write_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        embedders = [
+            threading.Thread(target=self._embed_stage, args=(prepared_queue, write_queue),
+                             name=f"ingest-embed-{i}", daemon=True)
+            for i in range(self.embed_workers)
+        ]
+        writer = threading.Thread(target=self._write_stage, args=(write_queue,),
+                                  name="ingest-writer", daemon=True)
+        for thread in embedders:
+            thread.start()
+        writer.start()
+
+        try:
+            self._prepare_stage(files, prepared_queue)
+        finally:
+            for _ in embedders:
+                prepared_queue.put(_DONE)
+            for thread in embedders:
+                thread.join()
+            write_queue.put(_DONE)
+            writer.join()
+
+        self.metrics.elapsed_seconds = time.perf_counter() - started
+        if self.progress:
+            self.progress(self.metrics)
+        logger.info(
+            f"Ingested {self.metrics.files_prepared}/{self.metrics.files_total} files, "
+            f"{self.metrics.chunks_written} chunks in {self.metrics.elapsed_seconds:.2f}s "
+            f"({self.metrics.chunks_per_second:.1f} chunks/s, workers={self.workers})"
+        )
+        return self.metrics
+
+    # Prepare stage (runs on the calling thread)
+
+    def _prepare_stage(self, files: List[Path], out: "queue.Queue"):
+        if self.workers > 1:
+            self._prepare_in_pool(files, out)
+            return
+        isolated = []
+        for file_path in files:
+            if needs_isolation(file_path):
+                isolated.append(file_path)
+                continue
+            started = time.perf_counter()
+            try:
+                prepared = self.store._prepare_document(file_path)
+            except Exception as e:
+                logger.error(f"Failed to index document {file_path}: {e}")
+                prepared = None
+            self.metrics.prepare_seconds += time.perf_counter() - started
+            self._dispatch(file_path, prepared, out)
+        if isolated:
+            self._prepare_in_pool(isolated, out)
+
+    def _prepare_in_pool(self, files: List[Path], out: "queue.Queue"):
+        # Files whose mtime/size match the manifest never reach the pool;
+        # at most workers * 2 files are in flight so results stay bounded.
+        max_in_flight = self.workers * 2
+        in_flight: "deque[Tuple[Path, os.stat_result, Optional[str], Future]]" = deque()
+        pool = ExtractionPool(self.workers)
+        try:
+            for file_path in files:
+                try:
+                    stat = file_path.stat()
+                except OSError as e:
+                    logger.error(f"Failed to index document {file_path}: {e}")
+                    self._dispatch(file_path, None, out)
+                    continue
+                unchanged = self.store._unchanged_by_stat(file_path, stat)
+                if unchanged is not None:
+                    self._dispatch(file_path, unchanged, out)
+                    continue
+                entry = self.store.manifest.get(str(file_path))
+                known_hash = entry.hash if entry else None
+                in_flight.append((file_path, stat, known_hash, pool.submit(file_path, known_hash)))
+                if len(in_flight) >= max_in_flight:
+                    self._collect(in_flight, pool, out)
+            while in_flight:
+                self._collect(in_flight, pool, out)
+        finally:
+            pool.close()
+
+    def _collect(self, in_flight: "deque", pool: ExtractionPool, out: "queue.Queue"):
+        """Wait for the oldest in-flight file, abandoning it after extract_timeout seconds."""
+        file_path, stat, _, future = in_flight.popleft()
+        started = time.perf_counter()
+        try:
+            extracted: ExtractedFile = future.result(timeout=self.extract_timeout or None)
+        except (FutureTimeout, BrokenProcessPool) as e:
+            if isinstance(e, FutureTimeout):
+                error = f"extraction timed out after {self.extract_timeout:g}s"
+                with self._lock:
+                    self.metrics.files_timed_out += 1
+            else:
+                error = "extraction worker died"
+            extracted = ExtractedFile(str(file_path), "", error=error)
+            # The pool is stuck or broken; the other in-flight files start over in a new one
+            pool.restart()
+            for i, (path, path_stat, known_hash, _) in enumerate(in_flight):
+                in_flight[i] = (path, path_stat, known_hash, pool.submit(path, known_hash))
+        except Exception as e:
+            extracted = ExtractedFile(str(file_path), "", error=str(e))
+        self.metrics.prepare_seconds += time.perf_counter() - started
+        self._dispatch(file_path, self._from_extracted(file_path, stat, extracted), out)
+
+    def _from_extracted(self, file_path: Path, stat: os.stat_result, extracted: ExtractedFile):
+        if extracted.error is not None:
+            logger.error(f"Failed to index document {file_path}: {extracted.error}")
+            return None
+        if extracted.chunks is None:
+            return self.store._unchanged_by_hash(file_path, extracted.hash, stat)
+        if not extracted.chunks:
+            logger.warning(f"No content extracted from {file_path}")
+            return None
+        return self.store._build_prepared(file_path, extracted.hash, stat,
+                                          extracted.chunks, extracted.metadata or {})
+
+    def _dispatch(self, file_path: Path, prepared, out: "queue.Queue"):
+        with self._lock:
+            self.metrics.files_prepared += 1
+            if prepared is None:
+                self.metrics.files_failed += 1
+                return
+            if not prepared.documents:
+                self.metrics.files_unchanged += 1
+                return
+            previous = self.store.manifest.get(prepared.source_path)
+            if previous is not None:
+                self.metrics.files_changed += 1
+                self.metrics.chunks_replaced += previous.chunk_end - previous.chunk_start
+            else:
+                self.metrics.files_added += 1
+        logger.info(f"Indexed document: {file_path} (ID: {prepared.doc_id}) with {len(prepared.documents)} chunks")
+        out.put(prepared)
+
+    # Embed stage
+
+    def _embed_stage(self, inbox: "queue.Queue", out: "queue.Queue"):
+        pending: List[Any] = []
+        pending_chunks = 0
+        while True:
+            prepared = inbox.get()
+            if prepared is _DONE:
+                break
+            pending.append(prepared)
+            pending_chunks += len(prepared.documents)
+            if pending_chunks >= self.batch_size:
+                self._embed_batch(pending, out)
+                pending, pending_chunks = [], 0
+        if pending:
+            self._embed_batch(pending, out)
+
+    def _embed_batch(self, batch: List[Any], out: "queue.Queue"):
+        texts = [doc.content for item in batch for doc in item.documents]
+        started = time.perf_counter()
+        try:
+            embeddings = self.store._embed_texts(texts)
+        except Exception as e:
+            logger.error(f"Embedding failed for {len(texts)} chunks: {e}")
+            embeddings = None
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.metrics.embed_seconds += elapsed
+            self.metrics.embed_batches += 1
+            if embeddings is not None:
+                self.metrics.chunks_embedded += len(texts)
+        out.put((batch, embeddings))
+
+    # Write stage (the only thread that mutates the index)
+
+    def _write_stage(self, inbox: "queue.Queue"):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            batch, embeddings = item
+            started = time.perf_counter()
+            try:
+                written = self.store._write_prepared(batch, embeddings)
+            except Exception as e:
+                logger.error(f"Index write failed for {len(batch)} files: {e}")
+                written = 0
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.metrics.write_seconds += elapsed
+                self.metrics.chunks_written += written
+                if not written:
+                    # Nothing from this batch reached the index
+                    self._uncount(batch)
+            if self.progress:
+                self.progress(self.metrics)
+
+    def _uncount(self, batch: List[Any]):
+        for prepared in batch:
+            self.metrics.files_failed += 1
+            previous = self.store.manifest.get(prepared.source_path)
+            if previous is not None:
+                self.metrics.files_changed -= 1
+                self.metrics.chunks_replaced -= previous.chunk_end - previous.chunk_start
+            else:
+                self.metrics.files_added -= 1
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Lexical Index
+BM25 inverted index over the chunks of the trusted knowledge corpus (SOP-RAG-001).
+
+Dense retrieval is weak on exact identifiers: a query for "SOP-GOV-001"
+embeds close to every SOP. The lexical index scores chunks by the query
+terms they actually contain (Okapi BM25). It is keyed by the same vector ids
+as the FAISS index, so VectorStore can fuse both rankings in hybrid search.
+
+Tokens are lowercase alphanumeric runs. Hyphenated identifiers are indexed
+whole (sop-gov-001) and by their parts (sop, gov, 001), so a query matches
+both the full id and its components.
+
+On disk the index mirrors DocumentStore: a memory-mapped base written at
+save time plus in-memory changes made since.
+
+    lexical_postings.npy  (vector_id, tf, length) rows grouped by term
+    lexical_docs.npy      (vector_id, length) per indexed chunk, sorted by id
+    lexical_index.json    vocabulary, posting offsets, counts and BM25 parameters
+
+Removed chunks stop matching immediately and are dropped from the postings
+when the index is next saved.
+"""
+
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - rag_system reports missing dependencies
+    np = None
+
+FORMAT_VERSION = 1
+POSTINGS_FILE = "lexical_postings.npy"
+DOCS_FILE = "lexical_docs.npy"
+META_FILE = "lexical_index.json"
+
+POSTING_FIELDS = [
+    ("vector_id", "<i8"),
+    ("tf", "<i4"),
+    ("length", "<i4"),
+]
+DOC_FIELDS = [
+    ("vector_id", "<i8"),
+    ("length", "<i4"),
+]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how in is it its of on or "
+    "should that the their this to was what when where which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms of a text; hyphenated ids yield the whole id and its parts."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if "-" in token:
+            tokens.append(token)
+            tokens.extend(part for part in token.split("-") if part not in STOPWORDS)
+        elif token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Thread-safe BM25 index of vector id -> chunk text."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # Saved base (memory-mapped after open/save)
+        self._terms: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype="int64")
+        self._postings = np.zeros(0, dtype=np.dtype(POSTING_FIELDS))
+        self._docs = np.zeros(0, dtype=np.dtype(DOC_FIELDS))
+        # Changes since the base was written
+        self._added: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._added_lengths: Dict[int, int] = {}
+        self._removed: Set[int] = set()
+        self._count = 0
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def exists(directory) -> bool:
+        directory = Path(directory)
+        return all((directory / name).exists() for name in (POSTINGS_FILE, DOCS_FILE, META_FILE))
+
+    @classmethod
+    def open(cls, directory) -> "BM25Index":
+        """Open a saved index; postings and documents are memory-mapped read-only."""
+        index = cls()
+        index._open(Path(directory))
+        return index
+
+    def _open(self, directory: Path):
+        with open(directory / META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported lexical index format: {meta.get('format_version')}")
+        postings = np.load(directory / POSTINGS_FILE, mmap_mode="r")
+        docs = np.load(directory / DOCS_FILE, mmap_mode="r")
+        if len(postings) != meta["postings"] or len(docs) != meta["documents"]:
+            raise ValueError("Lexical index files do not match their metadata")
+        self.k1, self.b = meta["k1"], meta["b"]
+        self._terms = {term: row for row, term in enumerate(meta["terms"])}
+        self._offsets = np.asarray(meta["offsets"], dtype="int64")
+        self._postings, self._docs = postings, docs
+        self._added, self._added_lengths, self._removed = {}, {}, set()
+        self._count = len(docs)
+        self._total_length = int(meta["total_length"])
+
+    def copy(self) -> "BM25Index":
+        """
+        An independent index with the same contents. The read-only base is
+        shared; only the changes made since it was written are copied.
+        """
+        clone = BM25Index(self.k1, self.b)
+        with self._lock:
+            clone._terms, clone._offsets = self._terms, self._offsets
+            clone._postings, clone._docs = self._postings, self._docs
+            clone._added = {term: list(rows) for term, rows in self._added.items()}
+            clone._added_lengths = dict(self._added_lengths)
+            clone._removed = set(self._removed)
+            clone._count, clone._total_length = self._count, self._total_length
+        return clone
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, items: Iterable[Tuple[int, str]]):
+        """Index (vector_id, text) pairs. Vector ids must not be reused."""
+        tokenized = []
+        for vector_id, text in items:
+            tokens = tokenize(text)
+            tokenized.append((int(vector_id), len(tokens), Counter(tokens)))
+        with self._lock:
+            for vector_id, length, counts in tokenized:
+                for term, tf in counts.items():
+                    self._added.setdefault(term, []).append((vector_id, tf, length))
+                self._added_lengths[vector_id] = length
+                self._count += 1
+                self._total_length += length
+
+    def remove(self, vector_ids: Iterable[int]) -> int:
+        """Stop matching the given vector ids. Returns the number removed."""
+        removed = 0
+        with self._lock:
+            base_ids = self._docs["vector_id"]
+            for vector_id in vector_ids:
+                vector_id = int(vector_id)
+                if vector_id in self._removed:
+                    continue
+                length = self._added_lengths.pop(vector_id, None)
+                if length is None:
+                    row = int(base_ids.searchsorted(vector_id))
+                    if row >= len(base_ids) or base_ids[row] != vector_id:
+                        continue
+                    length = int(self._docs["length"][row])
+                self._removed.add(vector_id)
+                self._count -= 1
+                self._total_length -= length
+                removed += 1
+        return removed
+
+    def _term_postings(self, term: str) -> "np.ndarray":
+        """All (vector_id, tf, length) rows of a term, base and added."""
+        parts = []
+        row = self._terms.get(term)
+        if row is not None:
+            parts.append(self._postings[self._offsets[row]:self._offsets[row + 1]])
+        added = self._added.get(term)
+        if added:
+            parts.append(np.array(added, dtype=np.dtype(POSTING_FIELDS)))
+        if not parts:
+            return np.zeros(0, dtype=np.dtype(POSTING_FIELDS))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def search(self, query: str, k: int = 10, allowed: Optional["np.ndarray"] = None) -> List[Tuple[int, float]]:
+        """
+        Top k (vector_id, BM25 score) pairs for a query, best first. allowed,
+        a boolean array indexed by vector id, restricts which chunks are scored
+        (term statistics still cover the whole index).
+        """
+        terms = set(tokenize(query))
+        if not terms or k <= 0:
+            return []
+        with self._lock:
+            if not self._count:
+                return []
+            n_docs = self._count
+            avg_length = self._total_length / n_docs
+            removed = np.fromiter(self._removed, dtype="int64", count=len(self._removed)) if self._removed else None
+            ids_parts, score_parts = [], []
+            for term in terms:
+                postings = self._term_postings(term)
+                if removed is not None and len(postings):
+                    postings = postings[~np.isin(postings["vector_id"], removed)]
+                df = len(postings)
+                if allowed is not None and df:
+                    ids = postings["vector_id"]
+                    in_range = ids < len(allowed)
+                    in_range[in_range] = allowed[ids[in_range]]
+                    postings = postings[in_range]
+                if not len(postings):
+                    continue
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                tf = postings["tf"].astype("float32")
+                norm = self.k1 * (1.0 - self.b + self.b * postings["length"] / avg_length)
+                ids_parts.append(postings["vector_id"])
+                score_parts.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+        if not ids_parts:
+            return []
+        ids, inverse = np.unique(np.concatenate(ids_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def save(self, directory):
+        """
+        Merge added and removed chunks into a new base, write it under
+        temporary names, move it into place (metadata last) and reopen it.
+        """
+        directory = Path(directory)
+        dtype = np.dtype(POSTING_FIELDS)
+        with self._lock:
+            removed = np.fromiter(self._removed, dtype="int64", count=len(self._removed)) if self._removed else None
+            keep = None
+            if removed is not None and len(self._postings):
+                keep = ~np.isin(self._postings["vector_id"], removed)
+            vocabulary, offsets, parts = [], [0], []
+            for term in sorted(set(self._terms) | set(self._added)):
+                term_parts = []
+                row = self._terms.get(term)
+                if row is not None:
+                    start, end = self._offsets[row], self._offsets[row + 1]
+                    term_parts.append(self._postings[start:end] if keep is None else self._postings[start:end][keep[start:end]])
+                added = self._added.get(term)
+                if added:
+                    added = np.array(added, dtype=dtype)
+                    if removed is not None:
+                        added = added[~np.isin(added["vector_id"], removed)]
+                    term_parts.append(added)
+                size = sum(len(part) for part in term_parts)
+                if not size:
+                    continue
+                vocabulary.append(term)
+                offsets.append(offsets[-1] + size)
+                parts.extend(term_parts)
+            postings = np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+            docs = self._docs
+            if removed is not None and len(docs):
+                docs = docs[~np.isin(docs["vector_id"], removed)]
+            added_docs = np.array(list(self._added_lengths.items()), dtype=np.dtype(DOC_FIELDS))
+            docs = np.concatenate([docs, added_docs])
+            docs = docs[np.argsort(docs["vector_id"], kind="stable")]
+
+            postings_tmp = directory / (POSTINGS_FILE + ".tmp.npy")
+            docs_tmp = directory / (DOCS_FILE + ".tmp.npy")
+            meta_tmp = directory / (META_FILE + ".tmp")
+            np.save(postings_tmp, postings)
+            np.save(docs_tmp, docs)
+            with open(meta_tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "format_version": FORMAT_VERSION,
+                    "k1": self.k1,
+                    "b": self.b,
+                    "documents": len(docs),
+                    "postings": len(postings),
+                    "total_length": int(docs["length"].sum()),
+                    "terms": vocabulary,
+                    "offsets": offsets,
+                }, f)
+            os.replace(postings_tmp, directory / POSTINGS_FILE)
+            os.replace(docs_tmp, directory / DOCS_FILE)
+            os.replace(meta_tmp, directory / META_FILE)
+            self._open(directory)
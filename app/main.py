@@ -13,6 +13,7 @@ import os
 from fastapi import FastAPI, Depends, HTTPException, status, Request, Header
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from jose import JWTError, jwt
 from pydantic import BaseModel
 from typing import Optional
@@ -21,8 +22,9 @@ from typing import Optional
 # Modular imports
 from app.governance import GovernanceCore
 from app.worm_storage import WORMStorage
-from app.rag_system import ResearchAgent
-from app.verifier_agent import VerifierAgent
+from app.config_manager import Config
+from app.rag_system import ResearchAgent, warm_up
+from app.verifier_agent import get_verifier_agent
 from app.agents.integrity_agent import IntegrityAgent
 from app.agents.hitl_agent import HITLAgent
 from app.utils.rag_utils import log_rag_sources, detect_context_drift
@@ -39,6 +41,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Load the shared embedding model and vector store before serving (SOP-RAG-001)
+@app.on_event("startup")
+async def warm_up_retrieval():
+    if Config.WARMUP_ON_STARTUP:
+        await run_in_threadpool(warm_up)
+
 # OAuth2/JWT config (SOP-ARC-001)
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
 ALGORITHM = "HS256"
@@ -91,8 +99,9 @@ async def verifier_agent_middleware(request: Request, call_next):
             ai_output = data.get("answer") or data.get("output") or data.get("result")
             sources = data.get("sources") or data.get("sources_used") or []
             if ai_output and sources:
-                verifier = VerifierAgent()
-                verification = verifier.verify_output(ai_output, sources)
+                # Shared instance; verification is CPU-bound, keep it off the event loop
+                verifier = get_verifier_agent()
+                verification = await run_in_threadpool(verifier.verify_output, ai_output, sources)
                 # Log result immutably (WORMStorage)
                 try:
                     from app.worm_storage import WORMStorage
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Model Registry
+Process-wide, lazily loaded models shared by all agents (SOP-RAG-001).
+
+Loading a sentence-transformers model takes seconds and hundreds of MB, so a
+process loads each model once: VectorStore, VerifierAgent and ResearchAgent
+all resolve their encoder through get_embedding_model(), and the re-ranking
+cross-encoder is held under its own kind via get_shared_model(). Loading happens on
+first use (or during server warm-up) under a per-model lock, so concurrent
+first requests wait for one load instead of starting several.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from .config_manager import Config, logger
+
+_models: Dict[Tuple[str, str, Any], Any] = {}
+_model_locks: Dict[Tuple[str, str, Any], threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def get_shared_model(kind: str, loader: Callable[[str], Any], model_name: str) -> Any:
+    """
+    Return the shared instance of a model of the given kind ("embedding",
+    "cross-encoder", ...), loading it with loader(model_name) on first use.
+    """
+    key = (kind, model_name, loader)
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _registry_lock:
+        lock = _model_locks.setdefault(key, threading.Lock())
+    with lock:
+        model = _models.get(key)
+        if model is None:
+            logger.info(f"Loading {kind} model: {model_name}")
+            model = loader(model_name)
+            _models[key] = model
+    return model
+
+
+def get_embedding_model(loader: Callable[[str], Any], model_name: str = "") -> Any:
+    """
+    Return the shared instance of an embedding model, loading it with
+    loader(model_name) on first use. model_name defaults to
+    Config.EMBEDDING_MODEL.
+    """
+    return get_shared_model("embedding", loader, model_name or Config.EMBEDDING_MODEL)
+
+
+def clear_model_registry():
+    """Drop all shared models (mainly for tests)."""
+    with _registry_lock:
+        _models.clear()
+        _model_locks.clear()
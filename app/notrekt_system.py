@@ -44,7 +44,9 @@ class NotRektAISystem:
         
         # Initialize core components
         self.worm_storage = WORMStorage()
-        self.cgo_agent = CGOAgent()
+        self.cgo_agent = CGOAgent(worm_storage=self.worm_storage)
+        if Config.RULES_WATCH_INTERVAL > 0:
+            self.cgo_agent.start_rules_watcher(Config.RULES_WATCH_INTERVAL)
         
         # Persistent storage for pending actions (production: use DB, here: SQLite table)
         self._init_pending_actions_table()
@@ -435,6 +437,9 @@ class NotRektAISystem:
             requires_approval=False
         )
         
+        # Stop rules hot-reload before the audit log goes away
+        self.cgo_agent.stop_rules_watcher()
+        
         # Close database connections
         self.worm_storage.close()
         
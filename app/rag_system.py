@@ -5,11 +5,15 @@ Retrieval-Augmented Generation with trusted knowledge corpus and source verifica
 """
 
 import os
+import copy
 import json
+import shutil
 import hashlib
+import threading
+from concurrent.futures import Future
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Optional, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, field, asdict, replace
 from datetime import datetime, timezone
 import pickle
 
@@ -58,6 +62,39 @@ except ImportError as e:
     faiss = DummyFaiss
 
 from .config_manager import Config, logger
+from .document_store import DocumentStore
+from .text_extraction import calculate_file_hash, extract_text_from_file, chunk_text, chunk_file
+from .extractors import supported_extensions, unavailable_extensions
+from .ingest_pipeline import IngestPipeline, IngestMetrics
+from . import vector_index
+from .model_registry import get_embedding_model
+from .embedding_cache import get_query_cache, ChunkEmbeddingCache
+from .lexical_index import BM25Index, tokenize
+from .search_filter import SearchFilter, ranges_bitmap
+
+if TYPE_CHECKING:
+    from .sharded_store import ShardedVectorStore
+    from .reranker import CrossEncoderReranker
+
+SEARCH_MODES = ("dense", "lexical", "hybrid")
+
+# Rebuilds and syncs write a complete index version to VERSIONS_DIR/<name>
+# and then atomically point CURRENT_FILE at it. Indexes saved before
+# versioning live directly in vector_db_path (the files below) until a
+# rebuild or sync replaces them.
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+INDEX_FILES = (
+    "faiss_index.bin", "faiss_rerank.bin", "documents.pkl", "documents.bin", "documents.idx.npy",
+    "documents.sqlite", "lexical_postings.npy", "lexical_docs.npy", "lexical_index.json", "manifest.json",
+)
+# Attempts at a search that keeps overlapping generation swaps
+SEARCH_SWAP_RETRIES = 3
+# Attributes that make up one index generation, swapped together by _adopt
+GENERATION_ATTRS = (
+    "index_dir", "index", "rerank_index", "documents", "_next_vector_id", "manifest", "_manifest_dirty",
+    "_orphan_ids", "lexical", "_lexical_lock", "_filter_bitmaps", "_index_signature",
+)
 
 # --- RAG Answer Synthesis and [GAP] Handling ---
 def synthesize_answer(query: str, search_results: list) -> dict:
@@ -96,13 +133,168 @@ class Document:
     metadata: Dict[str, Any]
     hash: str
     indexed_at: str
+    # Id of this chunk's vector in the ID-mapped FAISS index
+    vector_id: int = -1
+
+@dataclass
+class ManifestEntry:
+    """Per-file index bookkeeping: change-detection signature and vector id range [chunk_start, chunk_end)."""
+    doc_id: str
+    hash: str
+    mtime_ns: int
+    size: int
+    chunk_start: int
+    chunk_end: int
+    # Empty in manifests written before it was recorded (looked up from the documents)
+    indexed_at: str = ""
+
+@dataclass
+class PreparedDocument:
+    """A file that has been extracted and chunked but not yet embedded."""
+    doc_id: str
+    source_path: str
+    hash: str
+    mtime_ns: int
+    size: int
+    documents: List[Document] = field(default_factory=list)
 
 @dataclass
+class SyncStats:
+    """Outcome of an incremental corpus sync."""
+    added: int = 0
+    changed: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    metrics: Optional["IngestMetrics"] = None
+
+    @property
+    def indexed_files(self) -> int:
+        return self.added + self.changed + self.unchanged
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.chunks_added or self.chunks_removed)
+
+@dataclass(init=False)
 class SearchResult:
-    """Represents a search result from the vector store."""
+    """
+    Represents a search result from the vector store. Unless given, the
+    excerpt is cut from the chunk around the query terms on first access,
+    so callers that only look at documents and scores never pay for it.
+    """
     document: Document
     score: float
-    excerpt: str
+    query: str = field(default="", repr=False)
+
+    def __init__(self, document: Document, score: float, excerpt: Optional[str] = None, query: str = ""):
+        self.document = document
+        self.score = score
+        self.query = query
+        self._excerpt = excerpt
+
+    @property
+    def excerpt(self) -> str:
+        if self._excerpt is None:
+            self._excerpt = extract_excerpt(self.document.content, self.query)
+        return self._excerpt
+
+def search_mode(mode: Optional[str]) -> str:
+    """Validated search mode (default: Config.SEARCH_MODE)."""
+    mode = (mode or Config.SEARCH_MODE).lower()
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode} (expected one of {SEARCH_MODES})")
+    return mode
+
+def normalize_lexical(hits: List[Tuple[Any, float]]) -> List[Tuple[Any, float]]:
+    if not hits or hits[0][1] <= 0:
+        return hits
+    best = hits[0][1]
+    return [(key, score / best) for key, score in hits]
+
+def fuse_rankings(rankings: List[List[Tuple[Any, float]]]) -> List[Tuple[Any, float]]:
+    """
+    Reciprocal-rank fusion: each ranking contributes 1 / (HYBRID_RRF_K + rank)
+    to a chunk's score, so agreement between rankings matters and raw
+    score scales do not. Scores are divided by the best achievable total.
+    """
+    rrf_k = Config.HYBRID_RRF_K
+    fused: Dict[Any, float] = {}
+    for ranking in rankings:
+        for rank, (key, _) in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    best = len(rankings) / (rrf_k + 1)
+    return sorted(((key, score / best) for key, score in fused.items()),
+                  key=lambda hit: hit[1], reverse=True)
+
+def combine_rankings(mode: str, rankings: List[List[Tuple[Any, float]]]) -> List[Tuple[Any, float]]:
+    """
+    One query's final hits from the rankings VectorStore._rankings returns
+    for it. Scores depend on the mode (see VectorStore.search_many).
+    """
+    if mode == "hybrid":
+        return fuse_rankings(rankings)
+    if mode == "lexical":
+        return normalize_lexical(rankings[0])
+    return rankings[0]
+
+def encode_queries(model, query_cache, queries: List[str]) -> Optional["np.ndarray"]:
+    """
+    Encode queries into L2-normalized float32 rows. Cached embeddings
+    are reused; the rest are encoded in one batch and cached.
+    """
+    if model is None or not hasattr(model, 'encode') or np is None:
+        return None
+    cached = query_cache.get_many(queries) if query_cache is not None else [None] * len(queries)
+    missing = list(dict.fromkeys(q for q, vector in zip(queries, cached) if vector is None))
+    encoded: Dict[str, "np.ndarray"] = {}
+    if missing:
+        embeddings = np.asarray(model.encode(missing), dtype='float32')
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.maximum(norms, 1e-12, out=norms)
+        embeddings /= norms
+        if query_cache is not None:
+            query_cache.put_many(missing, embeddings)
+        encoded = dict(zip(missing, embeddings))
+    return np.stack([vector if vector is not None else encoded[q] for q, vector in zip(queries, cached)])
+
+def extract_excerpt(content: str, query: str, context_chars: int = 200) -> str:
+    """Extract relevant excerpt from document content around query terms."""
+    try:
+        # Anchor on the most specific query term present: longer terms
+        # (e.g. SOP ids) first, stopwords ignored
+        query_words = sorted(set(tokenize(query)), key=lambda w: (-len(w), w)) or query.lower().split()
+        content_lower = content.lower()
+
+        best_pos = -1
+        for word in query_words:
+            best_pos = content_lower.find(word)
+            if best_pos != -1:
+                break
+
+        if best_pos == -1:
+            # No direct match, return beginning
+            return content[:context_chars * 2] + "..." if len(content) > context_chars * 2 else content
+
+        # Extract context around the match
+        start = max(0, best_pos - context_chars)
+        end = min(len(content), best_pos + context_chars)
+
+        excerpt = content[start:end]
+
+        # Add ellipsis if truncated
+        if start > 0:
+            excerpt = "..." + excerpt
+        if end < len(content):
+            excerpt = excerpt + "..."
+
+        return excerpt
+
+    except Exception as e:
+        logger.error(f"Failed to extract excerpt: {e}")
+        return content[:400] + "..." if len(content) > 400 else content
 
 class VectorStore:
     """
@@ -110,22 +302,42 @@ class VectorStore:
     Provides semantic search capabilities over trusted knowledge corpus.
     """
     
-    def __init__(self, corpus_path: Optional[str] = None, vector_db_path: Optional[str] = None):
+    def __init__(self, corpus_path: Optional[str] = None, vector_db_path: Optional[str] = None,
+                 embedding_batch_size: Optional[int] = None, index_type: Optional[str] = None,
+                 read_only: Optional[bool] = None):
         if not DEPENDENCIES_AVAILABLE:
             raise ImportError("RAG system requires numpy, sentence-transformers, and faiss-cpu. Install with: pip install sentence-transformers faiss-cpu numpy")
             
         self.corpus_path = Path(corpus_path or Config.CORPUS_PATH)
         self.vector_db_path = Path(vector_db_path or Config.VECTOR_DB_PATH)
+        self.embedding_batch_size = max(1, embedding_batch_size or Config.EMBEDDING_BATCH_SIZE)
+        self.index_type = (index_type or Config.VECTOR_INDEX_TYPE).lower()
+        if self.index_type not in vector_index.INDEX_TYPES:
+            raise ValueError(f"Unknown vector index type: {self.index_type} (expected one of {vector_index.INDEX_TYPES})")
+        self.nprobe = Config.VECTOR_SEARCH_NPROBE
+        self.ef_search = Config.VECTOR_SEARCH_EF
+        self.rerank_factor = max(0, Config.VECTOR_RERANK_FACTOR)
+        # Read-only stores memory-map a saved index and never modify it
+        self.read_only = Config.VECTOR_STORE_READ_ONLY if read_only is None else read_only
+        # Held by every index write (sync, rebuild); a background rebuild holds it throughout
+        self._write_lock = threading.RLock()
+        # Bumped before and after each generation swap (odd while swapping)
+        self._generation = 0
+        self._rebuild_future: Optional[Future] = None
+        self._rebuild_guard = threading.Lock()
+        self._dvc_thread: Optional[threading.Thread] = None
         
         # Ensure directories exist
         self.corpus_path.mkdir(parents=True, exist_ok=True)
         self.vector_db_path.mkdir(parents=True, exist_ok=True)
         
-        # Initialize sentence transformer model
+        # Shared sentence transformer model (loaded once per process)
         try:
             if SentenceTransformer is None:
                 raise ImportError("sentence-transformers not installed")
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model = get_embedding_model(SentenceTransformer)
+            self.query_cache = get_query_cache(Config.EMBEDDING_MODEL)
+            self.chunk_cache = self._open_chunk_cache()
             if not hasattr(self.model, 'get_sentence_embedding_dimension'):
                 raise ImportError("sentence-transformers model missing get_sentence_embedding_dimension")
             self.embedding_dim = self.model.get_sentence_embedding_dimension()
@@ -133,324 +345,1254 @@ class VectorStore:
             logger.error(f"Failed to load sentence transformer model: {e}")
             raise
         
-        # Initialize FAISS index
-        self.index = None
-        self.documents: List[Document] = []
+        self._reset_generation(self.vector_db_path)
         
         # Load existing index if available
         self._load_index()
         
         logger.info(f"VectorStore initialized with {len(self.documents)} documents")
     
-    def _load_index(self):
-        """Load existing FAISS index and documents from disk."""
-        index_path = self.vector_db_path / "faiss_index.bin"
-        docs_path = self.vector_db_path / "documents.pkl"
+    def _reset_generation(self, index_dir: Path):
+        """Start an empty index generation whose files live in index_dir."""
+        self.index_dir = index_dir
+        # FAISS index
+        self.index = None
+        # Exact vectors for re-ranking the candidates of a quantized index
+        self.rerank_index = None
+        # vector id -> Document; ids are stable across incremental syncs
+        self.documents = DocumentStore()
+        self._next_vector_id = 0
+        # source_path -> ManifestEntry, for O(1) unchanged-file detection
+        self.manifest: Dict[str, ManifestEntry] = {}
+        self._manifest_dirty = False
+        self._orphan_ids: List[int] = []
+        # BM25 index over the same vector ids, opened or built on first use
+        self.lexical: Optional[BM25Index] = None
+        self._lexical_lock = threading.Lock()
+        # Search filter clause -> bitmap of allowed vector ids, reset on every index change
+        self._filter_bitmaps: Dict[Tuple[Any, ...], "np.ndarray"] = {}
+        # (index file, mtime, size) of the loaded or last saved index
+        self._index_signature: Optional[Tuple[str, int, int]] = None
+        # Set on a staged store until _detach gives it its own index and documents
+        self._copy_on_write = False
+    
+    def _spawn_generation(self, index_dir: Path) -> "VectorStore":
+        """
+        A store sharing this one's model, caches, settings and write lock but
+        holding an empty generation in index_dir. Rebuilds and reloads fill
+        it off to the side and then hand it to _adopt.
+        """
+        sibling = copy.copy(self)
+        sibling._reset_generation(index_dir)
+        return sibling
+    
+    def _stage(self) -> "VectorStore":
+        """
+        A store holding this one's generation, for a writer to change off to
+        the side and then hand to _adopt. The manifest is copied now; the
+        index, documents and lexical index are copied by _detach before the
+        first change, so a sync that finds nothing to do copies nothing.
+        """
+        staged = copy.copy(self)
+        staged.manifest = {path: replace(entry) for path, entry in self.manifest.items()}
+        staged._orphan_ids = list(self._orphan_ids)
+        staged._copy_on_write = True
+        return staged
+    
+    def _detach(self):
+        """
+        Give a staged store private copies of the generation it shares with
+        the live store. FAISS indexes are cloned; documents and the lexical
+        index keep sharing their mapped base and copy only unsaved changes.
+        """
+        if not self._copy_on_write:
+            return
+        self._copy_on_write = False
+        if self._faiss_index_ready():
+            self.index = faiss.clone_index(self.index)
+        if self.rerank_index is not None:
+            self.rerank_index = faiss.clone_index(self.rerank_index)
+        self.documents = self.documents.copy()
+        if self.lexical is not None:
+            self.lexical = self.lexical.copy()
+        self._lexical_lock = threading.Lock()
+        self._filter_bitmaps = {}
+    
+    def _adopt(self, sibling: "VectorStore"):
+        """
+        Make a sibling's generation the live one. Searches that overlap the
+        swap see the generation counter change and run again.
+        """
+        self._generation += 1
+        for name in GENERATION_ATTRS:
+            setattr(self, name, getattr(sibling, name))
+        self.read_only = sibling.read_only
+        self.chunk_cache = sibling.chunk_cache
+        self._generation += 1
+    
+    def _current_index_dir(self) -> Path:
+        """Directory of the index version CURRENT points to (vector_db_path for unversioned indexes)."""
+        try:
+            name = (self.vector_db_path / CURRENT_FILE).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return self.vector_db_path
+        directory = self.vector_db_path / VERSIONS_DIR / name
+        if name and directory.is_dir():
+            return directory
+        logger.warning(f"Index version pointer names a missing version ({name!r}), using {self.vector_db_path}")
+        return self.vector_db_path
+    
+    def _load_index(self) -> bool:
+        """
+        Load existing FAISS index and documents from disk. Documents are
+        memory-mapped from the columnar store; a legacy documents.pkl is
+        still read and is converted on the next save. An index that is
+        missing or cannot be loaded is handled by _fall_back.
+        Returns True if the store holds a usable generation afterwards.
+        """
+        self.index_dir = self._current_index_dir()
+        index_path = self.index_dir / "faiss_index.bin"
+        docs_path = self.index_dir / "documents.pkl"
+        columnar = DocumentStore.exists(self.index_dir)
+        self.lexical = None
+        self._filter_bitmaps = {}
         
-        if index_path.exists() and docs_path.exists():
+        if index_path.exists() and (columnar or docs_path.exists()):
             try:
-                # Load FAISS index
+                # Load FAISS index (memory-mapped when read-only)
                 if faiss is not None and hasattr(faiss, 'read_index'):
-                    self.index = faiss.read_index(str(index_path))
+                    self._index_signature = self._file_signature(index_path)
+                    self.index = vector_index.read_index(str(index_path), mmap=self.read_only)
+                    self.rerank_index = self._load_rerank_index()
                 else:
                     self.index = None
                 # Load documents
-                with open(docs_path, 'rb') as f:
-                    self.documents = pickle.load(f)
-                logger.info(f"Loaded existing index with {len(self.documents)} documents")
-                # Verify index and documents are in sync
-                if self.index is not None and hasattr(self.index, 'ntotal') and self.index.ntotal != len(self.documents):
-                    logger.warning("Index and documents out of sync, rebuilding...")
-                    self._rebuild_index()
+                if columnar:
+                    documents = DocumentStore.open(self.index_dir, Document)
+                else:
+                    with open(docs_path, 'rb') as f:
+                        legacy_documents = pickle.load(f)
+                    if any(doc.vector_id < 0 for doc in legacy_documents) and (
+                            self.index is None or self.index.ntotal == len(legacy_documents)):
+                        self._migrate_positional_index(legacy_documents)
+                    documents = DocumentStore(legacy_documents)
+                logger.info(f"Loaded existing index with {len(documents)} documents")
+                # Verify index and documents are in sync (HNSW may also hold tombstones)
+                if self.index is not None and hasattr(self.index, 'ntotal') and self._out_of_sync(self.index.ntotal, len(documents)):
+                    logger.warning("Index and documents out of sync")
+                    documents.close()
+                    return self._fall_back()
+                self.documents = documents
+                self.manifest = self._load_manifest()
+                self._next_vector_id = max(self._next_vector_id, self.documents.max_id() + 1)
+                return True
             except Exception as e:
                 logger.error(f"Failed to load existing index: {e}")
-                self._rebuild_index()
-        else:
-            logger.info("No existing index found, will build new one")
-            self._rebuild_index()
+                return self._fall_back()
+        logger.info("No existing index found")
+        return self._fall_back()
     
-    def _save_index(self):
-        """Save FAISS index and documents to disk."""
+    def _fall_back(self) -> bool:
+        """
+        Handle a saved index that could not be loaded. A writable store
+        rebuilds it from the corpus. A read-only store never writes: it is
+        left empty (reload_if_changed keeps the generation already served)
+        until a writer publishes a usable version.
+        Returns True if the store holds a usable generation afterwards.
+        """
+        if self.read_only:
+            logger.error(f"Read-only VectorStore found no usable index in {self.index_dir}, not rebuilding")
+            self._reset_generation(self.index_dir)
+            return False
+        self._rebuild_index()
+        return True
+    
+    def _save_index(self) -> bool:
+        """Save FAISS index and documents to index_dir (see _publish). Returns False on failure."""
         try:
             # Save FAISS index
-            index_path = self.vector_db_path / "faiss_index.bin"
+            index_path = self.index_dir / "faiss_index.bin"
             if faiss is not None and hasattr(faiss, 'write_index') and self.index is not None:
-                faiss.write_index(self.index, str(index_path))
-            # Save documents
-            docs_path = self.vector_db_path / "documents.pkl"
-            with open(docs_path, 'wb') as f:
-                pickle.dump(self.documents, f)
+                # Re-ranking vectors first: the main index file's signature marks a new version
+                rerank_path = self.index_dir / "faiss_rerank.bin"
+                if self.rerank_index is not None:
+                    vector_index.write_index(self.rerank_index, str(rerank_path))
+                elif rerank_path.exists():
+                    rerank_path.unlink()
+                vector_index.write_index(self.index, str(index_path))
+                self._index_signature = self._file_signature(index_path)
+            # Save documents in columnar form, replacing any legacy pickle
+            self.documents.save(self.index_dir, Document)
+            docs_path = self.index_dir / "documents.pkl"
+            if docs_path.exists():
+                docs_path.unlink()
+            if self.lexical is not None:
+                self.lexical.save(self.index_dir)
+            self._save_manifest()
             logger.info(f"Saved index with {len(self.documents)} documents")
+            return True
         except Exception as e:
             logger.error(f"Failed to save index: {e}")
+            return False
     
-    def _rebuild_index(self):
-        """Rebuild the entire vector index from corpus files."""
-        logger.info("Rebuilding vector index from corpus...")
-        # Clear existing data
-        self.documents = []
-        # Initialize new FAISS index
-        if faiss is not None and hasattr(faiss, 'IndexFlatIP'):
-            self.index = faiss.IndexFlatIP(self.embedding_dim)
-        else:
-            self.index = None
-        # Index all documents in corpus
-        self.index_corpus()
-        # --- Automate DVC tracking after index rebuild ---
-        import subprocess
+    @staticmethod
+    def _file_signature(path: Path) -> Optional[Tuple[str, int, int]]:
         try:
-            subprocess.run(["dvc", "add", "trusted_knowledge_corpus/"], check=True)
-            subprocess.run(["dvc", "add", "app/rag_index.faiss"], check=True)
-            logger.info("DVC tracking updated for trusted_knowledge_corpus/ and app/rag_index.faiss.")
+            stat = path.stat()
+        except OSError:
+            return None
+        return str(path), stat.st_mtime_ns, stat.st_size
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Reopen the index and documents if another process saved a new
+        version (read-only serving processes call this to pick up syncs and
+        rebuilds). The new version is opened off to the side and swapped in,
+        so searches keep running against the old one meanwhile. If it
+        cannot be loaded, the old one stays and the next call tries again.
+        Returns True if the store was reloaded.
+        """
+        signature = self._file_signature(self._current_index_dir() / "faiss_index.bin")
+        if signature is None or signature == self._index_signature:
+            return False
+        logger.info("Vector index changed on disk, reloading")
+        with self._write_lock:
+            fresh = self._spawn_generation(self.vector_db_path)
+            if not fresh._load_index():
+                logger.error("Could not load the changed vector index, keeping the current one")
+                return False
+            self._adopt(fresh)
+        return True
+    
+    def _writable(self, operation: str) -> bool:
+        if self.read_only:
+            logger.error(f"Cannot {operation}: VectorStore is read-only (memory-mapped index)")
+            return False
+        return True
+    
+    def _rebuild_index(self) -> SyncStats:
+        """
+        Rebuild the entire vector index from corpus files into a new index
+        version, then swap it in. Searches keep using the live index until
+        the new one is complete and saved; writers wait for the rebuild. The
+        version pointer on disk moves only after every file of the new
+        version is written, and DVC tracking runs afterwards in the
+        background. If the new version cannot be saved the live one stays.
+        """
+        with self._write_lock:
+            if not self._writable("rebuild index"):
+                return SyncStats()
+            logger.info("Rebuilding vector index from corpus...")
+            version_dir = self._new_version_dir()
+            builder = self._spawn_generation(version_dir)
+            builder.index = builder._new_index()
+            builder.lexical = BM25Index() if Config.LEXICAL_INDEX else None
+            # Index all documents in corpus
+            logger.info(f"Indexing corpus from: {self.corpus_path}")
+            stats = builder._sync_corpus(save=False, workers=None)
+            if not builder._publish(version_dir):
+                logger.error("Rebuild could not be saved, keeping the current index")
+                return stats
+            self._adopt(builder)
+            logger.info(f"Rebuild complete: {stats.indexed_files} documents indexed, now serving {version_dir.name}")
+            # Cached embeddings of text that is no longer in the corpus are dead weight
+            if self.chunk_cache is not None:
+                try:
+                    pruned = self.chunk_cache.prune([doc.content for doc in self.documents])
+                    if pruned:
+                        logger.info(f"Pruned {pruned} stale chunk embeddings from cache")
+                except Exception as e:
+                    logger.warning(f"Failed to prune chunk embedding cache: {e}")
+        self._dvc_thread = self._track_with_dvc()
+        return stats
+    
+    def rebuild_in_background(self) -> Future:
+        """
+        Start a full rebuild on a background thread and return a Future for
+        its SyncStats. The store keeps serving the current index until the
+        rebuilt one is swapped in. If a rebuild is already running, its
+        Future is returned instead of starting another.
+        """
+        with self._rebuild_guard:
+            if self._rebuild_future is not None and not self._rebuild_future.done():
+                return self._rebuild_future
+            future: Future = Future()
+            future.set_running_or_notify_cancel()
+            self._rebuild_future = future
+        if not self._writable("rebuild index"):
+            future.set_result(SyncStats())
+            return future
+        
+        def run():
+            try:
+                future.set_result(self._rebuild_index())
+            except BaseException as e:
+                logger.error(f"Background rebuild failed: {e}")
+                future.set_exception(e)
+        
+        threading.Thread(target=run, name="vector-store-rebuild", daemon=True).start()
+        return future
+    
+    def _publish(self, version_dir: Optional[Path] = None) -> bool:
+        """
+        Save this store's generation as a new index version (in version_dir, or
+        a fresh one) and point CURRENT at it. Files are only ever written
+        into a version no reader has opened, and CURRENT moves once all of
+        them are in place, so readers see either the old version or the
+        complete new one. A version that cannot be saved is discarded and
+        CURRENT stays. Returns True if the version was published.
+        """
+        # Saving reopens the documents and lexical index from the new files
+        self._detach()
+        # Carry the BM25 index over, rather than leave readers to rebuild it
+        self._lexical_index()
+        previous = self.index_dir
+        self.index_dir = version_dir or self._new_version_dir()
+        if not self._save_index():
+            shutil.rmtree(self.index_dir, ignore_errors=True)
+            self.index_dir = previous
+            return False
+        self._write_current_pointer(self.index_dir.name)
+        self._prune_versions()
+        return True
+    
+    def _new_version_dir(self) -> Path:
+        name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        directory = self.vector_db_path / VERSIONS_DIR / name
+        directory.mkdir(parents=True, exist_ok=False)
+        return directory
+    
+    def _write_current_pointer(self, name: str):
+        pointer = self.vector_db_path / CURRENT_FILE
+        tmp_path = pointer.with_name(CURRENT_FILE + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, pointer)
+    
+    def _prune_versions(self):
+        """
+        Delete index versions older than the newest Config.INDEX_VERSIONS_KEPT
+        (and, once enough versions exist, the unversioned files of an index
+        saved before versioning). Processes still mapping a deleted version
+        keep their pages until they reload.
+        """
+        keep_count = max(1, Config.INDEX_VERSIONS_KEPT)
+        versions = sorted(path for path in (self.vector_db_path / VERSIONS_DIR).iterdir() if path.is_dir())
+        keep = set(versions[-keep_count:]) | {self.index_dir}
+        for path in versions:
+            if path not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+                logger.info(f"Removed old index version {path.name}")
+        if len(versions) >= keep_count:
+            for name in INDEX_FILES:
+                legacy = self.vector_db_path / name
+                if legacy.exists():
+                    legacy.unlink()
+    
+    def _track_with_dvc(self) -> threading.Thread:
+        """
+        Update DVC tracking of the corpus and index on a separate thread, so
+        the rebuild returns (and the store serves the new index) without
+        waiting on it. The thread is not a daemon: a rebuild run from the
+        command line still finishes tracking before the process exits.
+        """
+        def track():
+            import subprocess
+            try:
+                subprocess.run(["dvc", "add", "trusted_knowledge_corpus/"], check=True)
+                subprocess.run(["dvc", "add", "app/rag_index.faiss"], check=True)
+                logger.info("DVC tracking updated for trusted_knowledge_corpus/ and app/rag_index.faiss.")
+            except Exception as e:
+                logger.warning(f"DVC automation failed: {e}")
+        
+        thread = threading.Thread(target=track, name="vector-store-dvc")
+        thread.start()
+        return thread
+    
+    def _out_of_sync(self, ntotal: int, n_documents: int) -> bool:
+        if ntotal == n_documents:
+            return False
+        # Removed vectors stay in indexes without remove support
+        return ntotal < n_documents or vector_index.supports_remove(self.index)
+    
+    def _wants_rerank(self, index_type: str) -> bool:
+        return self.rerank_factor > 0 and index_type in vector_index.QUANTIZED_TYPES
+    
+    def _load_rerank_index(self):
+        """
+        Exact vectors saved next to a quantized index (memory-mapped when
+        read-only, so only the pages of re-ranked candidates are read).
+        """
+        rerank_path = self.index_dir / "faiss_rerank.bin"
+        if not rerank_path.exists() or not self._wants_rerank(vector_index.index_type_of(self.index)):
+            return None
+        try:
+            rerank_index = vector_index.read_index(str(rerank_path), mmap=self.read_only)
+            if rerank_index.ntotal == self.index.ntotal:
+                return rerank_index
+            logger.warning("Re-ranking vectors do not match the index, searching without re-ranking")
         except Exception as e:
-            logger.warning(f"DVC automation failed: {e}")
+            logger.warning(f"Failed to load re-ranking vectors, searching without re-ranking: {e}")
+        return None
+    
+    def _new_index(self):
+        """
+        Create an empty ID-mapped exact inner-product index (supports
+        remove_ids). Approximate index types need training data, so they are
+        built from this index by _ensure_index_type once it holds enough vectors.
+        """
+        if faiss is not None and hasattr(faiss, 'IndexIDMap2'):
+            return vector_index.new_flat_index(self.embedding_dim)
+        if faiss is not None and hasattr(faiss, 'IndexFlatIP'):
+            return faiss.IndexFlatIP(self.embedding_dim)
+        return None
+    
+    def _migrate_positional_index(self, documents: List[Document]):
+        """
+        Upgrade an index saved before vector ids existed: documents get their
+        list position as vector id, and a plain flat index is re-wrapped in an
+        ID map with the same ids (no re-embedding).
+        """
+        logger.info("Migrating positional index to ID-mapped index")
+        for position, doc in enumerate(documents):
+            doc.vector_id = position
+        if self.index is not None and not isinstance(self.index, faiss.IndexIDMap2):
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)
+            index = self._new_index()
+            index.add_with_ids(vectors, np.arange(len(documents), dtype='int64'))
+            self.index = index
+    
+    def _load_manifest(self) -> Dict[str, ManifestEntry]:
+        """
+        Load the persisted file manifest. If it is missing or does not match
+        the loaded documents, derive it from the documents instead.
+        """
+        manifest_path = self.index_dir / "manifest.json"
+        if manifest_path.exists():
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                manifest = {path: ManifestEntry(**entry) for path, entry in data.get("files", {}).items()}
+                if all(entry.chunk_start in self.documents for entry in manifest.values()
+                       if entry.chunk_end > entry.chunk_start):
+                    self._next_vector_id = data.get("next_vector_id", 0)
+                    return manifest
+                logger.warning("Manifest does not match documents, deriving it from documents")
+            except Exception as e:
+                logger.warning(f"Failed to load manifest, deriving it from documents: {e}")
+        return self._manifest_from_documents()
+    
+    def _manifest_from_documents(self) -> Dict[str, ManifestEntry]:
+        """
+        Derive a manifest from loaded documents (indexes saved before the
+        manifest existed). mtime is unknown, so the first sync of each file
+        falls back to a hash comparison.
+        """
+        manifest: Dict[str, ManifestEntry] = {}
+        for doc in self.documents:
+            entry = manifest.get(doc.source_path)
+            if entry is None or entry.hash != doc.hash or entry.chunk_end != doc.vector_id:
+                manifest[doc.source_path] = ManifestEntry(
+                    doc_id=doc.id.rsplit("_", 1)[0], hash=doc.hash, mtime_ns=-1,
+                    size=int(doc.metadata.get("size_bytes", -1)),
+                    chunk_start=doc.vector_id, chunk_end=doc.vector_id + 1,
+                    indexed_at=doc.indexed_at
+                )
+            else:
+                entry.chunk_end = doc.vector_id + 1
+        # Chunks outside their file's final range are stale leftovers of older
+        # versions of the file; the next sync removes them
+        self._orphan_ids = [
+            doc.vector_id for doc in self.documents
+            if not manifest[doc.source_path].chunk_start <= doc.vector_id < manifest[doc.source_path].chunk_end
+        ]
+        return manifest
+    
+    def _save_manifest(self):
+        self._manifest_dirty = False
+        manifest_path = self.index_dir / "manifest.json"
+        tmp_path = manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": 2,
+                "next_vector_id": self._next_vector_id,
+                "files": {path: asdict(entry) for path, entry in self.manifest.items()}
+            }, f)
+        os.replace(tmp_path, manifest_path)
     
     def _calculate_file_hash(self, file_path: Path) -> str:
         """Calculate SHA-256 hash of file content."""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        return calculate_file_hash(file_path)
     
     def _extract_text_from_file(self, file_path: Path) -> Tuple[str, Dict[str, Any]]:
         """
-        Extract text content and metadata from various file types.
-        Currently supports: .txt, .md, .json
+        Extract text content and metadata from any file type with a
+        registered extractor (see app/extractors.py).
         """
-        try:
-            suffix = file_path.suffix.lower()
-            
-            if suffix in ['.txt', '.md']:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                metadata = {
-                    "file_type": suffix,
-                    "size_bytes": file_path.stat().st_size,
-                    "last_modified": file_path.stat().st_mtime
-                }
-                return content, metadata
-            
-            elif suffix == '.json':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                # Convert JSON to readable text
-                content = json.dumps(data, indent=2)
-                metadata = {
-                    "file_type": "json",
-                    "size_bytes": file_path.stat().st_size,
-                    "last_modified": file_path.stat().st_mtime,
-                    "json_keys": list(data.keys()) if isinstance(data, dict) else []
-                }
-                return content, metadata
-            
-            else:
-                logger.warning(f"Unsupported file type: {suffix}")
-                return "", {"file_type": suffix, "error": "unsupported_format"}
-                
-        except Exception as e:
-            logger.error(f"Failed to extract text from {file_path}: {e}")
-            return "", {"error": str(e)}
+        return extract_text_from_file(file_path)
     
     def _chunk_text(self, text, chunk_size=500):
-        import re
-        sentences = re.split(r'(?<=[.!?]) +', text)
-        chunks, current = [], ""
-        for s in sentences:
-            if len(current) + len(s) < chunk_size:
-                current += s + " "
-            else:
-                chunks.append(current.strip())
-                current = s + " "
-        if current:
-            chunks.append(current.strip())
-        return chunks
+        return chunk_text(text, chunk_size)
 
+    def _faiss_index_ready(self) -> bool:
+        """True when self.index is a real FAISS index (not the dummy fallback)."""
+        base = getattr(faiss, "Index", None)
+        return self.index is not None and base is not None and isinstance(self.index, base)
+    
+    def _open_chunk_cache(self) -> Optional[ChunkEmbeddingCache]:
+        if not Config.CHUNK_EMBEDDING_CACHE or self.read_only:
+            return None
+        try:
+            return ChunkEmbeddingCache(str(self.vector_db_path / "embedding_cache.sqlite"),
+                                       Config.EMBEDDING_MODEL, Config.CHUNK_EMBEDDING_CACHE_DTYPE)
+        except Exception as e:
+            logger.warning(f"Chunk embedding cache unavailable, embedding without it: {e}")
+            return None
+    
+    @staticmethod
+    def _lexical_text(doc: Document) -> str:
+        """Text indexed for BM25: the file name (which carries SOP ids) plus the chunk."""
+        return f"{Path(doc.source_path).stem} {doc.content}"
+    
+    def _lexical_index(self) -> Optional[BM25Index]:
+        """
+        The BM25 index, opened from disk on first use. If it is missing or
+        does not match the documents (e.g. an index saved before it existed)
+        it is rebuilt from the documents. None when NOTREKT_LEXICAL_INDEX is off.
+        """
+        if not Config.LEXICAL_INDEX:
+            return None
+        if self.lexical is None:
+            with self._lexical_lock:
+                if self.lexical is None:
+                    self.lexical = self._open_lexical_index()
+        return self.lexical
+    
+    def _open_lexical_index(self) -> BM25Index:
+        if BM25Index.exists(self.index_dir):
+            try:
+                lexical = BM25Index.open(self.index_dir)
+                if len(lexical) == len(self.documents):
+                    return lexical
+                logger.warning("Lexical index does not match documents, rebuilding it")
+            except Exception as e:
+                logger.warning(f"Failed to open lexical index, rebuilding it: {e}")
+        lexical = BM25Index()
+        lexical.add((doc.vector_id, self._lexical_text(doc)) for doc in self.documents)
+        logger.info(f"Built lexical index over {len(lexical)} chunks")
+        return lexical
+    
+    def _embed_texts(self, texts: List[str]) -> Optional["np.ndarray"]:
+        """
+        Return L2-normalized float32 (n, dim) embeddings for chunk texts.
+        Texts found in the chunk embedding cache are not re-encoded; the rest
+        are encoded in batches of embedding_batch_size, normalized with a
+        single vectorized operation, and added to the cache.
+        """
+        if self.model is None or not hasattr(self.model, 'encode') or np is None:
+            return None
+        try:
+            cached = self.chunk_cache.get_many(texts) if self.chunk_cache is not None else [None] * len(texts)
+            missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+            encoded: Dict[str, "np.ndarray"] = {}
+            if missing:
+                embeddings = self.model.encode(missing, batch_size=self.embedding_batch_size)
+                embeddings = np.asarray(embeddings, dtype='float32')
+                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+                np.maximum(norms, 1e-12, out=norms)
+                embeddings /= norms
+                if self.chunk_cache is not None:
+                    try:
+                        self.chunk_cache.put_many(missing, embeddings)
+                    except Exception as e:
+                        logger.warning(f"Failed to update chunk embedding cache: {e}")
+                if len(missing) == len(texts):
+                    return embeddings
+                encoded = dict(zip(missing, embeddings))
+            return np.stack([vector if vector is not None else encoded[text] for text, vector in zip(texts, cached)])
+        except Exception as e:
+            logger.error(f"Embedding generation failed: {e}")
+            return None
+    
+    def _add_prepared(self, prepared: List[PreparedDocument]) -> int:
+        """Embed the chunks of a batch of prepared files and write them to the index."""
+        documents = [doc for item in prepared for doc in item.documents]
+        if not documents:
+            return 0
+        return self._write_prepared(prepared, self._embed_texts([doc.content for doc in documents]))
+    
+    def _write_prepared(self, prepared: List[PreparedDocument], embeddings: Optional["np.ndarray"]) -> int:
+        """
+        Add already-embedded chunks of prepared files to the index in bulk
+        under freshly allocated vector ids, then record each file in the
+        manifest. A file that was already indexed has its previous chunks
+        removed once the new ones are in. Documents are only kept if their
+        vectors were added, so the index and document store stay in sync.
+        Must only be called from one thread at a time. Returns the number of
+        chunks added.
+        """
+        prepared = [item for item in prepared if item.documents]
+        documents = [doc for item in prepared for doc in item.documents]
+        if not documents:
+            return 0
+        if embeddings is None or not self._faiss_index_ready():
+            logger.error(f"Skipping {len(documents)} chunks: embeddings or index unavailable")
+            return 0
+        self._detach()
+        start = self._next_vector_id
+        vector_ids = np.arange(start, start + len(documents), dtype='int64')
+        try:
+            self.index.add_with_ids(embeddings, vector_ids)  # type: ignore[attr-defined]
+        except Exception as e:
+            logger.error(f"Index add failed: {e}")
+            return 0
+        if self.rerank_index is not None:
+            try:
+                self.rerank_index.add_with_ids(embeddings, vector_ids)
+            except Exception as e:
+                logger.error(f"Re-ranking vectors add failed, searching without re-ranking: {e}")
+                self.rerank_index = None
+        self._next_vector_id = start + len(documents)
+        for doc, vector_id in zip(documents, vector_ids):
+            doc.vector_id = int(vector_id)
+        # Opened before the new documents land, so a rebuild does not index them twice
+        lexical = self._lexical_index()
+        self.documents.add(documents)
+        if lexical is not None:
+            lexical.add((doc.vector_id, self._lexical_text(doc)) for doc in documents)
+        
+        replaced = [self.manifest[item.source_path] for item in prepared if item.source_path in self.manifest]
+        self._remove_entries(replaced)
+        self._filter_bitmaps = {}
+        position = start
+        for item in prepared:
+            self.manifest[item.source_path] = ManifestEntry(
+                doc_id=item.doc_id, hash=item.hash, mtime_ns=item.mtime_ns, size=item.size,
+                chunk_start=position, chunk_end=position + len(item.documents),
+                indexed_at=item.documents[0].indexed_at
+            )
+            position += len(item.documents)
+        return len(documents)
+    
+    def _remove_entries(self, entries: List[ManifestEntry]) -> int:
+        """Remove the vectors and documents of the given manifest entries in one pass."""
+        return self._remove_vector_ids([vid for entry in entries for vid in range(entry.chunk_start, entry.chunk_end)])
+    
+    def _remove_vector_ids(self, vector_ids: List[int]) -> int:
+        """
+        Remove vectors and their documents by vector id. Returns documents
+        removed. On HNSW indexes the vectors stay behind as tombstones, which
+        search skips and _ensure_index_type eventually compacts away.
+        """
+        if not vector_ids:
+            return 0
+        self._detach()
+        if self._faiss_index_ready() and vector_index.supports_remove(self.index):
+            try:
+                self.index.remove_ids(np.asarray(vector_ids, dtype='int64'))  # type: ignore[attr-defined]
+                if self.rerank_index is not None:
+                    self.rerank_index.remove_ids(np.asarray(vector_ids, dtype='int64'))
+            except Exception as e:
+                logger.error(f"Index remove failed: {e}")
+        lexical = self._lexical_index()
+        if lexical is not None:
+            lexical.remove(vector_ids)
+        self._filter_bitmaps = {}
+        return self.documents.remove(vector_ids)
+    
+    def _unchanged_by_stat(self, file_path: Path, stat: os.stat_result) -> Optional[PreparedDocument]:
+        """Return an empty PreparedDocument if the manifest mtime/size match, else None."""
+        entry = self.manifest.get(str(file_path))
+        if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            logger.debug(f"Document unchanged (mtime/size), skipping: {file_path}")
+            return PreparedDocument(entry.doc_id, str(file_path), entry.hash, stat.st_mtime_ns, stat.st_size)
+        return None
+    
+    def _unchanged_by_hash(self, file_path: Path, file_hash: str, stat: os.stat_result) -> Optional[PreparedDocument]:
+        """
+        Return an empty PreparedDocument if the manifest hash matches (the file
+        was only touched), refreshing its stored mtime/size; else None.
+        """
+        entry = self.manifest.get(str(file_path))
+        if entry is None or entry.hash != file_hash:
+            return None
+        logger.debug(f"Document unchanged (hash), skipping: {file_path}")
+        entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+        self._manifest_dirty = True
+        return PreparedDocument(entry.doc_id, str(file_path), file_hash, stat.st_mtime_ns, stat.st_size)
+    
+    def _build_prepared(self, file_path: Path, file_hash: str, stat: os.stat_result,
+                        chunks: Iterable[str], file_metadata: Dict[str, Any]) -> PreparedDocument:
+        """Wrap the chunks of one file into Documents (not yet embedded)."""
+        source_path = str(file_path)
+        doc_id = hashlib.sha256(source_path.encode()).hexdigest()[:16]
+        indexed_at = datetime.now(timezone.utc).isoformat()
+        documents = [
+            Document(
+                id=f"{doc_id}_{idx}",
+                title=f"{file_path.stem}_chunk{idx}",
+                content=chunk,
+                source_path=source_path,
+                metadata=file_metadata,
+                hash=file_hash,
+                indexed_at=indexed_at
+            )
+            for idx, chunk in enumerate(chunks)
+        ]
+        return PreparedDocument(doc_id, source_path, file_hash, stat.st_mtime_ns, stat.st_size, documents)
+    
+    def _prepare_document(self, file_path: Path) -> Optional[PreparedDocument]:
+        """
+        Change-check, extract and chunk one file without embedding it.
+        Unchanged files are detected through the manifest: a matching
+        mtime/size skips the file without reading it, and a matching content
+        hash skips re-chunking. The returned PreparedDocument has no documents
+        when the file is already indexed. Returns None if nothing could be
+        extracted.
+        """
+        stat = file_path.stat()
+        unchanged = self._unchanged_by_stat(file_path, stat)
+        if unchanged is not None:
+            return unchanged
+        # Calculate file hash for change detection
+        file_hash = self._calculate_file_hash(file_path)
+        unchanged = self._unchanged_by_hash(file_path, file_hash, stat)
+        if unchanged is not None:
+            return unchanged
+        # Stream the file through the chunker; only the chunks are kept
+        chunks, file_metadata = chunk_file(file_path)
+        prepared = self._build_prepared(file_path, file_hash, stat, chunks, file_metadata)
+        if not prepared.documents:
+            logger.warning(f"No content extracted from {file_path}")
+            return None
+        return prepared
+    
     def index_document(self, file_path: Path) -> Optional[str]:
         """
         Index a single document from file path.
         Returns document ID if successful, None if failed.
         """
+        if not self._writable("index document"):
+            return None
         try:
-            # Extract content and metadata
-            content, file_metadata = self._extract_text_from_file(file_path)
-            if not content.strip():
-                logger.warning(f"No content extracted from {file_path}")
+            prepared = self._prepare_document(file_path)
+            if prepared is None:
                 return None
-            # Calculate file hash for change detection
-            file_hash = self._calculate_file_hash(file_path)
-            # Check if document already exists with same hash
-            for doc in self.documents:
-                if doc.source_path == str(file_path) and doc.hash == file_hash:
-                    logger.debug(f"Document unchanged, skipping: {file_path}")
-                    return doc.id
-            # Chunk document
-            chunks = self._chunk_text(content)
-            doc_id = hashlib.sha256(str(file_path).encode()).hexdigest()[:16]
-            for idx, chunk in enumerate(chunks):
-                chunk_id = f"{doc_id}_{idx}"
-                document = Document(
-                    id=chunk_id,
-                    title=f"{file_path.stem}_chunk{idx}",
-                    content=chunk,
-                    source_path=str(file_path),
-                    metadata=file_metadata,
-                    hash=file_hash,
-                    indexed_at=datetime.now(timezone.utc).isoformat()
-                )
-                # Generate embedding
-                embedding = None
-                if self.model is not None and hasattr(self.model, 'encode'):
-                    try:
-                        embedding = self.model.encode([chunk])
-                    except Exception as e:
-                        logger.error(f"Embedding generation failed: {e}")
-                        embedding = None
-                # Normalize for cosine similarity and add to index
-                if embedding is not None and np is not None and hasattr(np, 'linalg'):
-                    try:
-                        embedding = embedding / np.linalg.norm(embedding, axis=1, keepdims=True)
-                        if self.index is not None and hasattr(self.index, 'add'):
-                            real_faiss = False
-                            try:
-                                from faiss import IndexFlatIP  # type: ignore
-                                real_faiss = isinstance(self.index, IndexFlatIP)
-                            except ImportError:
-                                real_faiss = False
-                            if real_faiss:
-                                try:
-                                    self.index.add(embedding.astype('float32'))  # type: ignore[attr-defined]
-                                except Exception as e:
-                                    logger.error(f"Index add failed: {e}")
-                    except Exception as e:
-                        logger.error(f"Embedding normalization or index add failed: {e}")
-                self.documents.append(document)
-            logger.info(f"Indexed document: {file_path} (ID: {doc_id}) with {len(chunks)} chunks")
-            return doc_id
+            if prepared.documents:
+                with self._write_lock:
+                    staged = self._stage()
+                    staged._add_prepared([prepared])
+                    self._adopt(staged)
+                logger.info(f"Indexed document: {file_path} (ID: {prepared.doc_id}) with {len(prepared.documents)} chunks")
+            return prepared.doc_id
         except Exception as e:
             logger.error(f"Failed to index document {file_path}: {e}")
             return None
     
-    def index_corpus(self) -> int:
-        """
-        Index all documents in the corpus directory.
-        Returns number of documents successfully indexed.
+    def _discover_corpus_files(self) -> List[Path]:
+        supported = supported_extensions()
+        missing = unavailable_extensions()
+        files: List[Path] = []
+        skipped: Dict[str, int] = {}
+        for file_path in self.corpus_path.rglob('*'):
+            if not file_path.is_file():
+                continue
+            suffix = file_path.suffix.lower()
+            if suffix in supported:
+                files.append(file_path)
+            elif suffix in missing:
+                skipped[suffix] = skipped.get(suffix, 0) + 1
+        for suffix, count in skipped.items():
+            logger.warning(f"Skipping {count} {suffix} file(s): extractor needs {', '.join(missing[suffix])}")
+        return files
+    
+    def sync_corpus(self, save: bool = True, workers: Optional[int] = None) -> SyncStats:
         """
-        logger.info(f"Indexing corpus from: {self.corpus_path}")
+        Incrementally bring the index in line with the corpus directory:
+        new files are embedded and added, changed files have their old
+        vectors replaced, deleted files have their vectors removed, and
+        unchanged files are skipped via the manifest. Only new or changed
+        text is embedded. The index is saved if anything changed.
         
+        workers > 1 hashes, extracts and chunks files in a process pool
+        (default: Config.INGEST_WORKERS). Runs after any rebuild in progress.
+        The changes are made to a staged copy of the live generation and
+        swapped in when the sync is done, so searches never see a half-synced
+        index.
+        """
+        with self._write_lock:
+            staged = self._stage()
+            stats = staged._sync_corpus(save, workers)
+            self._adopt(staged)
+            return stats
+    
+    def _sync_corpus(self, save: bool, workers: Optional[int]) -> SyncStats:
+        stats = SyncStats()
+        if not self._writable("sync corpus"):
+            return stats
         if not self.corpus_path.exists():
             logger.warning(f"Corpus path does not exist: {self.corpus_path}")
-            return 0
+            return stats
         
-        indexed_count = 0
-        supported_extensions = {'.txt', '.md', '.json'}
+        if self._orphan_ids:
+            stats.chunks_removed += self._remove_vector_ids(self._orphan_ids)
+            self._orphan_ids = []
         
-        for file_path in self.corpus_path.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in supported_extensions:
-                if self.index_document(file_path):
-                    indexed_count += 1
+        files = self._discover_corpus_files()
+        present = {str(file_path) for file_path in files}
+        deleted = [path for path in self.manifest if path not in present]
+        if deleted:
+            stats.chunks_removed += self._remove_entries([self.manifest[path] for path in deleted])
+            for path in deleted:
+                del self.manifest[path]
+                logger.info(f"Removed deleted document from index: {path}")
+            stats.deleted = len(deleted)
         
-        # Save the updated index
-        if indexed_count > 0:
-            self._save_index()
+        # Extraction, batched embedding and index writes run as a staged pipeline
+        pipeline = IngestPipeline(self, workers=workers)
+        stats.metrics = pipeline.run(files)
+        stats.added = stats.metrics.files_added
+        stats.changed = stats.metrics.files_changed
+        stats.unchanged = stats.metrics.files_unchanged
+        stats.failed += stats.metrics.files_failed
+        stats.chunks_added += stats.metrics.chunks_written
+        stats.chunks_removed += stats.metrics.chunks_replaced
         
-        logger.info(f"Indexing complete: {indexed_count} documents indexed")
-        return indexed_count
+        converted = self._ensure_index_type()
+        if save and (stats.has_changes or converted):
+            self._publish()
+        elif save and self._manifest_dirty:
+            self._save_manifest()
+        logger.info(
+            f"Corpus sync complete: {stats.added} added, {stats.changed} changed, "
+            f"{stats.deleted} deleted, {stats.unchanged} unchanged"
+        )
+        return stats
+    
+    def _ensure_index_type(self) -> bool:
+        """
+        Bring the index in line with the configured index_type: build the
+        approximate index (training on a sample) once there are
+        VECTOR_INDEX_MIN_VECTORS chunks, fall back to flat below that, and
+        rebuild an HNSW index whose tombstones exceed a fifth of its size.
+        Quantized types also get a flat index of the exact vectors for
+        re-ranking (unless VECTOR_RERANK_FACTOR is 0).
+        Returns True if the index was replaced.
+        """
+        if not self._faiss_index_ready():
+            return False
+        live = len(self.documents)
+        target = self.index_type if live >= Config.VECTOR_INDEX_MIN_VECTORS else "flat"
+        current = vector_index.index_type_of(self.index)
+        tombstones = self.index.ntotal - live
+        if current == target and tombstones <= max(0, self.index.ntotal // 5):
+            return False
+        try:
+            ids = np.asarray(self.documents.ids(), dtype='int64')
+            # Quantized codes only decode approximately; prefer the exact copy
+            source = self.rerank_index if self.rerank_index is not None else self.index
+            vectors, ids = vector_index.export_vectors(source, ids)
+            rerank_index = None
+            if self._wants_rerank(target) and live:
+                rerank_index = vector_index.new_flat_index(self.embedding_dim)
+                rerank_index.add_with_ids(vectors, ids)
+            if target == "flat" or not live:
+                index = vector_index.new_flat_index(self.embedding_dim)
+                if live:
+                    index.add_with_ids(vectors, ids)
+            else:
+                index = vector_index.build_index(
+                    target, vectors, ids, nlist=Config.VECTOR_INDEX_NLIST, pq_m=Config.VECTOR_INDEX_PQ_M,
+                    hnsw_m=Config.VECTOR_INDEX_HNSW_M, train_sample=Config.VECTOR_INDEX_TRAIN_SAMPLE
+                )
+        except Exception as e:
+            logger.error(f"Failed to build {target} vector index, keeping {current}: {e}")
+            return False
+        logger.info(f"Vector index changed from {current} to {target} ({live} vectors)")
+        self.index = index
+        self.rerank_index = rerank_index
+        return True
+    
+    def corpus_stats(self) -> Dict[str, Any]:
+        """Chunk and index sizes of the live generation."""
+        return {
+            "total_documents": len(self.documents),
+            "corpus_path": str(self.corpus_path),
+            "index_size": self.index.ntotal if self.index else 0,
+            "embedding_dimension": self.embedding_dim
+        }
+    
+    def index_corpus(self) -> int:
+        """
+        Index all documents in the corpus directory.
+        Returns number of documents successfully indexed.
+        """
+        logger.info(f"Indexing corpus from: {self.corpus_path}")
+        stats = self.sync_corpus()
+        logger.info(f"Indexing complete: {stats.indexed_files} documents indexed")
+        return stats.indexed_files
     
-    def search(self, query: str, k: int = 5, min_score: float = 0.3) -> List[SearchResult]:
+    def search(self, query: str, k: int = 5, min_score: float = 0.3,
+               nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+               mode: Optional[str] = None, filters=None) -> List[SearchResult]:
         """
         Search for documents similar to the query.
         
         Args:
             query: Search query string
             k: Number of results to return
-            min_score: Minimum similarity score threshold
+            min_score: Minimum score threshold (see search_many for its meaning per mode)
+            nprobe: IVF lists to scan (default: self.nprobe); ignored by other index types
+            ef_search: HNSW search breadth (default: self.ef_search); ignored by other index types
+            mode: "dense", "lexical" or "hybrid" (default: Config.SEARCH_MODE)
+            filters: SearchFilter or dict restricting results by file type, source
+                path prefix and indexing date (see app/search_filter.py)
         
         Returns:
             List of SearchResult objects
         """
-        if not self.documents or self.index is None or not hasattr(self.index, 'ntotal') or self.index.ntotal == 0:
+        results = self.search_many([query], k=k, min_score=min_score, nprobe=nprobe,
+                                   ef_search=ef_search, mode=mode, filters=filters)[0]
+        logger.info(f"Search query: '{query}' returned {len(results)} results")
+        return results
+    
+    def search_many(self, queries: List[str], k: int = 5, min_score: float = 0.3,
+                    nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                    mode: Optional[str] = None, filters=None) -> List[List[SearchResult]]:
+        """
+        Search for several queries at once: all queries are encoded in one
+        batch and the index is searched once with the query matrix.
+        Returns one result list per query, in query order (see search()).
+        
+        Scores depend on the mode:
+            dense    cosine similarity of query and chunk embeddings
+            lexical  BM25 score relative to the query's best match (top hit = 1.0)
+            hybrid   reciprocal-rank fusion of the dense and BM25 rankings,
+                     scaled so a chunk ranked first by both scores 1.0
+        
+        Filters are applied inside the index search, so only allowed chunks
+        are scored and k results come back whenever k allowed chunks match.
+        """
+        return self._consistent(self._search_many, queries, k, min_score, nprobe, ef_search, mode, filters)
+    
+    def _consistent(self, search, *args):
+        """
+        Run a read of the live generation. A read that overlaps a generation
+        swap may have mixed both generations; it is run again against the
+        settled one.
+        """
+        for _ in range(SEARCH_SWAP_RETRIES):
+            generation = self._generation
+            result = search(*args)
+            if generation % 2 == 0 and generation == self._generation:
+                break
+        return result
+    
+    def search_ids(self, query: str, k: int = 5, min_score: float = 0.3,
+                   nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                   mode: Optional[str] = None, filters=None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Vector ids (int64) and scores (float32) of the query's hits, best
+        first, without building SearchResults; arguments and scores as for
+        search(). store.documents[vector_id] gives a hit's Document.
+        """
+        ids, scores = self.search_ids_many([query], k=k, min_score=min_score, nprobe=nprobe,
+                                           ef_search=ef_search, mode=mode, filters=filters)
+        found = ids[0] != -1
+        return ids[0][found], scores[0][found]
+    
+    def search_ids_many(self, queries: List[str], k: int = 5, min_score: float = 0.3,
+                        nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                        mode: Optional[str] = None, filters=None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Batched search_ids: (len(queries), k) arrays of vector ids and
+        scores, best first, padded with id -1 and score -inf where a query
+        has fewer than k hits at or above min_score. Dense searches go from
+        the FAISS result arrays to these without per-hit Python objects.
+        """
+        return self._consistent(self._search_ids_many, queries, k, min_score, nprobe, ef_search, mode, filters)
+    
+    def search_documents_many(self, queries: List[str], k: int = 5, min_score: float = 0.3,
+                              nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                              mode: Optional[str] = None, filters=None) -> List[List[Tuple[Document, float]]]:
+        """
+        Batched search returning (Document, score) pairs per query, best
+        first, without building SearchResults or excerpts. Hits are resolved
+        to documents in the same consistent read as the search, so a
+        generation swap in between cannot pair them with another
+        generation's documents.
+        """
+        return self._consistent(self._search_documents_many, queries, k, min_score, nprobe, ef_search, mode, filters)
+    
+    def _search_documents_many(self, *args) -> List[List[Tuple[Document, float]]]:
+        ids, scores = self._search_ids_many(*args)
+        documents = self.documents
+        found = []
+        for row_ids, row_scores in zip(ids.tolist(), scores.tolist()):
+            hits = [(documents.get(vector_id), score) for vector_id, score in zip(row_ids, row_scores) if vector_id != -1]
+            found.append([(document, score) for document, score in hits if document is not None])
+        return found
+    
+    def _search_ids_many(self, queries: List[str], k: int, min_score: float, nprobe: Optional[int],
+                         ef_search: Optional[int], mode: Optional[str], filters) -> Tuple["np.ndarray", "np.ndarray"]:
+        mode = search_mode(mode)
+        search_filter = SearchFilter.from_expression(filters)
+        ids = np.full((len(queries), k), -1, dtype='int64')
+        scores = np.full((len(queries), k), -np.inf, dtype='float32')
+        if not queries:
+            return ids, scores
+        if not self.documents:
             logger.warning("No documents in index")
-            return []
+            return ids, scores
         try:
-            # Generate query embedding
-            query_embedding = self.model.encode([query]) if self.model is not None and hasattr(self.model, 'encode') else None
-            if query_embedding is not None and np is not None:
-                query_embedding = query_embedding / np.linalg.norm(query_embedding, axis=1, keepdims=True)
-                # Search index
-                if self.index is not None and hasattr(self.index, 'search'):
-                    # Only call search if real faiss (module is 'faiss')
-                    # Only call search if real faiss IndexFlatIP (not dummy)
-                    real_faiss = False
-                    try:
-                        from faiss import IndexFlatIP  # type: ignore
-                        real_faiss = isinstance(self.index, IndexFlatIP)
-                    except ImportError:
-                        real_faiss = False
-                    if real_faiss:
-                        try:
-                            scores, indices = self.index.search(query_embedding.astype('float32'), k)  # type: ignore[attr-defined]
-                        except Exception as e:
-                            logger.error(f"Index search failed: {e}")
-                            scores, indices = [[0.0]], [[-1]]
-                    else:
-                        # Dummy: return fake results, do not call search()
-                        scores, indices = [[0.0]], [[-1]]
-                    results = []
-                    for score, idx in zip(scores[0], indices[0]):
-                        if idx == -1 or score < min_score:
-                            continue
-                        if idx < 0 or idx >= len(self.documents):
-                            continue
-                        document = self.documents[idx]
-                        excerpt = self._extract_excerpt(document.content, query)
-                        results.append(SearchResult(
-                            document=document,
-                            score=float(score),
-                            excerpt=excerpt
-                        ))
-                    logger.info(f"Search query: '{query}' returned {len(results)} results")
-                    return results
-            return []
+            allowed = self._allowed_ids(search_filter)
+            if allowed is not None and not allowed.any():
+                return ids, scores
+            if mode == "dense":
+                arrays = self._dense_arrays(queries, k, nprobe, ef_search, allowed)
+                if arrays is not None:
+                    ids, scores = arrays
+            else:
+                mode, rankings = self._rankings(queries, k, nprobe, ef_search, mode, search_filter)
+                for row, query_rankings in enumerate(rankings):
+                    hits = combine_rankings(mode, query_rankings)[:k]
+                    if hits:
+                        ids[row, :len(hits)] = [vector_id for vector_id, _ in hits]
+                        scores[row, :len(hits)] = [score for _, score in hits]
+            # Scores are sorted, so this only turns trailing hits into padding
+            below = scores < min_score
+            ids[below] = -1
+            scores[below] = -np.inf
+            return ids, scores
         except Exception as e:
             logger.error(f"Search failed: {e}")
-            return []
+            return np.full((len(queries), k), -1, dtype='int64'), np.full((len(queries), k), -np.inf, dtype='float32')
     
-    def _extract_excerpt(self, content: str, query: str, context_chars: int = 200) -> str:
-        """Extract relevant excerpt from document content around query terms."""
+    def _search_many(self, queries: List[str], k: int, min_score: float, nprobe: Optional[int],
+                     ef_search: Optional[int], mode: Optional[str], filters) -> List[List[SearchResult]]:
+        mode = search_mode(mode)
+        search_filter = SearchFilter.from_expression(filters)
+        empty: List[List[SearchResult]] = [[] for _ in queries]
+        if not queries:
+            return empty
+        if not self.documents:
+            logger.warning("No documents in index")
+            return empty
         try:
-            # Simple keyword-based excerpt extraction
-            query_words = query.lower().split()
-            content_lower = content.lower()
-            
-            # Find the first occurrence of any query word
-            best_pos = -1
-            for word in query_words:
-                pos = content_lower.find(word)
-                if pos != -1 and (best_pos == -1 or pos < best_pos):
-                    best_pos = pos
-            
-            if best_pos == -1:
-                # No direct match, return beginning
-                return content[:context_chars * 2] + "..." if len(content) > context_chars * 2 else content
-            
-            # Extract context around the match
-            start = max(0, best_pos - context_chars)
-            end = min(len(content), best_pos + context_chars)
-            
-            excerpt = content[start:end]
-            
-            # Add ellipsis if truncated
-            if start > 0:
-                excerpt = "..." + excerpt
-            if end < len(content):
-                excerpt = excerpt + "..."
-            
-            return excerpt
-            
+            mode, rankings = self._rankings(queries, k, nprobe, ef_search, mode, search_filter)
+            return [
+                self._collect_results(query, combine_rankings(mode, query_rankings), k, min_score)
+                for query, query_rankings in zip(queries, rankings)
+            ]
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            return empty
+    
+    def _rankings(self, queries: List[str], k: int, nprobe: Optional[int], ef_search: Optional[int],
+                  mode: str, search_filter: Optional[SearchFilter],
+                  query_embeddings: Optional["np.ndarray"] = None) -> Tuple[str, List[List[List[Tuple[int, float]]]]]:
+        """
+        The rankings a search combines, per query: the dense hits (dense
+        mode), the raw BM25 hits (lexical mode), or both, HYBRID_CANDIDATES
+        deep (hybrid mode). Returns the mode actually used, which is dense
+        when the lexical index is disabled.
+        """
+        if mode != "dense" and self._lexical_index() is None:
+            logger.warning(f"Lexical index disabled, using dense search instead of {mode}")
+            mode = "dense"
+        depth = max(k, Config.HYBRID_CANDIDATES) if mode == "hybrid" else k
+        rankings: List[List[List[Tuple[int, float]]]] = [[] for _ in queries]
+        allowed = self._allowed_ids(search_filter)
+        if allowed is not None and not allowed.any():
+            return mode, [[[] for _ in range(2 if mode == "hybrid" else 1)] for _ in queries]
+        if mode != "lexical":
+            dense = self._dense_hits(queries, depth, nprobe, ef_search, allowed, query_embeddings)
+            for query_rankings, hits in zip(rankings, dense):
+                query_rankings.append(hits)
+        if mode != "dense":
+            for query_rankings, query in zip(rankings, queries):
+                query_rankings.append(self.lexical.search(query, depth, allowed))
+        return mode, rankings
+    
+    def _allowed_ids(self, search_filter: Optional[SearchFilter]) -> Optional["np.ndarray"]:
+        """
+        Boolean bitmap over vector ids allowed by a filter, or None if the
+        filter restricts nothing. Every chunk of a file shares its metadata and
+        the manifest holds each file's id range, so clauses are evaluated per
+        file. Each clause's bitmap is cached until the index next changes.
+        """
+        if search_filter is None:
+            return None
+        allowed = None
+        size = self._next_vector_id
+        for key, predicate in search_filter.clauses(self.corpus_path):
+            bitmap = self._filter_bitmaps.get(key)
+            if bitmap is None or len(bitmap) != size:
+                bitmap = ranges_bitmap(
+                    ((entry.chunk_start, entry.chunk_end) for path, entry in list(self.manifest.items())
+                     if predicate(path, lambda entry=entry: self._entry_indexed_at(entry))),
+                    size
+                )
+                self._filter_bitmaps[key] = bitmap
+            allowed = bitmap if allowed is None else allowed & bitmap
+        return allowed
+    
+    def _entry_indexed_at(self, entry: ManifestEntry) -> str:
+        if not entry.indexed_at:
+            document = self.documents.get(entry.chunk_start)
+            entry.indexed_at = document.indexed_at if document is not None else ""
+        return entry.indexed_at
+    
+    def _dense_hits(self, queries: List[str], k: int, nprobe: Optional[int] = None,
+                    ef_search: Optional[int] = None, allowed: Optional["np.ndarray"] = None,
+                    query_embeddings: Optional["np.ndarray"] = None) -> List[List[Tuple[int, float]]]:
+        """Top k (vector_id, cosine score) pairs per query (see _dense_arrays)."""
+        arrays = self._dense_arrays(queries, k, nprobe, ef_search, allowed, query_embeddings)
+        if arrays is None:
+            return [[] for _ in queries]
+        ids, scores = arrays
+        return [
+            [(vector_id, score) for vector_id, score in zip(row_ids.tolist(), row_scores.tolist()) if vector_id != -1]
+            for row_ids, row_scores in zip(ids, scores)
+        ]
+    
+    def _dense_arrays(self, queries: List[str], k: int, nprobe: Optional[int] = None,
+                      ef_search: Optional[int] = None, allowed: Optional["np.ndarray"] = None,
+                      query_embeddings: Optional["np.ndarray"] = None) -> Optional[Tuple["np.ndarray", "np.ndarray"]]:
+        """
+        Top k vector ids and cosine scores per query from the FAISS index, as
+        (len(queries), k) arrays, best first; rows with fewer hits are padded
+        with id -1 and score -inf. Restricted to the vector ids set in allowed
+        if given. Quantized indexes return k * rerank_factor candidates, which
+        are re-scored with their exact vectors. Queries are encoded unless
+        their embeddings are passed in. None if the index cannot be searched.
+        """
+        if self.index is None or not hasattr(self.index, 'ntotal') or self.index.ntotal == 0:
+            logger.warning("No documents in index")
+            return None
+        # Only call search on a real faiss index (not dummy)
+        if not self._faiss_index_ready():
+            return None
+        if query_embeddings is None:
+            query_embeddings = self._encode_queries(queries)
+        if query_embeddings is None:
+            return None
+        try:
+            nprobe, ef_search = nprobe or self.nprobe, ef_search or self.ef_search
+            rerank_index = self.rerank_index
+            candidates = k * self.rerank_factor if rerank_index is not None else k
+            if allowed is None:
+                # Over-fetch past HNSW tombstones, which resolve to no document
+                fetch = candidates + min(k, max(0, self.index.ntotal - len(self.documents)))
+            else:
+                # Tombstones are outside every file's id range, so never selected
+                fetch = candidates
+            # Knobs go with this call only; the shared index is never reconfigured
+            params = vector_index.search_parameters(self.index, allowed, nprobe, ef_search)
+            scores, indices = self.index.search(query_embeddings, fetch, params=params)  # type: ignore[attr-defined]
+            if rerank_index is not None:
+                reranked = [vector_index.rerank(rerank_index, query, query_ids, k)
+                            for query, query_ids in zip(query_embeddings, indices)]
+                scores = np.full((len(reranked), k), -np.inf, dtype='float32')
+                indices = np.full((len(reranked), k), -1, dtype='int64')
+                for row, (query_scores, query_ids) in enumerate(reranked):
+                    scores[row, :len(query_ids)] = query_scores
+                    indices[row, :len(query_ids)] = query_ids
         except Exception as e:
-            logger.error(f"Failed to extract excerpt: {e}")
-            return content[:400] + "..." if len(content) > 400 else content
+            logger.error(f"Index search failed: {e}")
+            return None
+        indices = np.asarray(indices, dtype='int64')
+        valid = indices != -1
+        if fetch > k:
+            valid &= np.fromiter((int(idx) in self.documents for idx in indices.ravel()), dtype=bool,
+                                 count=indices.size).reshape(indices.shape)
+        # Move each row's valid hits to the front, keeping their order
+        order = np.argsort(~valid, axis=1, kind="stable")[:, :k]
+        ids = np.take_along_axis(np.where(valid, indices, -1), order, axis=1)
+        scores = np.take_along_axis(np.where(valid, np.asarray(scores, dtype='float32'), -np.inf), order, axis=1)
+        return ids, scores.astype('float32', copy=False)
+    
+    def _encode_queries(self, queries: List[str]) -> Optional["np.ndarray"]:
+        return encode_queries(self.model, self.query_cache, queries)
+    
+    def _collect_results(self, query: str, hits: List[Tuple[int, float]], k: int,
+                         min_score: float) -> List[SearchResult]:
+        results = []
+        for vector_id, score in hits:
+            if score < min_score:
+                continue
+            document = self.documents.get(vector_id)
+            if document is None:
+                continue
+            results.append(SearchResult(document=document, score=float(score), query=query))
+            if len(results) == k:
+                break
+        return results
+    
+    def _extract_excerpt(self, content: str, query: str, context_chars: int = 200) -> str:
+        return extract_excerpt(content, query, context_chars)
+
+_store_registry: Dict[Tuple[str, str, bool], "VectorStore | ShardedVectorStore"] = {}
+_store_registry_lock = threading.Lock()
+
+
+def get_vector_store(corpus_path: Optional[str] = None, vector_db_path: Optional[str] = None,
+                     read_only: Optional[bool] = None) -> "VectorStore | ShardedVectorStore":
+    """
+    Return the process-wide VectorStore for a corpus/index location, creating
+    it on first use. Agents that are not handed a store explicitly share this
+    one, so a process holds a single copy of the index and documents.
+    With NOTREKT_VECTOR_STORE_SHARDS > 1 this is a ShardedVectorStore.
+    """
+    read_only = Config.VECTOR_STORE_READ_ONLY if read_only is None else read_only
+    key = (
+        os.path.realpath(corpus_path or Config.CORPUS_PATH),
+        os.path.realpath(vector_db_path or Config.VECTOR_DB_PATH),
+        read_only,
+    )
+    store = _store_registry.get(key)
+    if store is None:
+        with _store_registry_lock:
+            store = _store_registry.get(key)
+            if store is None:
+                if Config.VECTOR_STORE_SHARDS > 1:
+                    from .sharded_store import ShardedVectorStore
+                    store = ShardedVectorStore(corpus_path=key[0], vector_db_path=key[1], read_only=read_only)
+                else:
+                    store = VectorStore(corpus_path=key[0], vector_db_path=key[1], read_only=read_only)
+                _store_registry[key] = store
+    return store
+
+
+def clear_vector_store_registry():
+    """Drop all shared vector stores (mainly for tests)."""
+    with _store_registry_lock:
+        for store in _store_registry.values():
+            if hasattr(store, "close"):
+                store.close()
+        _store_registry.clear()
+
+
+def warm_up() -> bool:
+    """
+    Load the shared embedding model and vector store and run one encode so
+    the first real request does not pay for it. Returns False on failure;
+    callers keep serving and retrieval initializes on first use instead.
+    """
+    try:
+        store = get_vector_store()
+        store.model.encode(["warm-up"])
+        if Config.RERANK_ENABLED:
+            from .reranker import get_reranker
+            get_reranker().warm_up()
+        documents = store.corpus_stats()["total_documents"]
+        logger.info(f"Retrieval warmed up: {documents} documents, model {Config.EMBEDDING_MODEL}")
+        return True
+    except Exception as e:
+        logger.error(f"Retrieval warm-up failed: {e}")
+        return False
 
 class ResearchAgent:
     def answer(self, query: str, retrieved_sources: list) -> dict:
@@ -497,8 +1639,13 @@ class ResearchAgent:
     Zero-Guessing Research Agent that provides answers grounded only in trusted sources.
     """
     
-    def __init__(self, vector_store: Optional[VectorStore] = None):
-        self.vector_store = vector_store or VectorStore()
+    def __init__(self, vector_store: Optional[VectorStore] = None,
+                 reranker: Optional["CrossEncoderReranker"] = None):
+        self.vector_store = vector_store or get_vector_store()
+        if reranker is None and Config.RERANK_ENABLED:
+            from .reranker import get_reranker
+            reranker = get_reranker()
+        self.reranker = reranker
         logger.info("ResearchAgent initialized")
     
     def query(self, question: str, max_sources: int = 3) -> Dict[str, Any]:
@@ -514,8 +1661,11 @@ class ResearchAgent:
         """
         logger.info(f"Research query: {question}")
         
-        # Search for relevant documents
-        search_results = self.vector_store.search(question, k=max_sources * 2)
+        # Search for relevant documents (enough candidates for the re-ranker, if any)
+        candidates = max_sources * 2
+        if self.reranker is not None:
+            candidates = max(candidates, self.reranker.candidates)
+        search_results = self.vector_store.search(question, k=candidates)
         
         if not search_results:
             logger.warning("No relevant sources found for query")
@@ -527,6 +1677,18 @@ class ResearchAgent:
                 "gap_reason": "no_relevant_sources"
             }
         
+        # Re-rank with the cross-encoder within its latency budget, else keep the dense ranking.
+        # Cross-encoder scores only order the sources: their scale depends on the model
+        # (often unbounded logits), so relevance and confidence stay on the dense 0-1 scores.
+        rerank_scores: Optional[List[float]] = None
+        ranking = {"method": "dense"}
+        if self.reranker is not None:
+            outcome = self.reranker.rerank(question, search_results)
+            search_results, ranking = outcome.results, outcome.to_dict()
+            if outcome.reranked:
+                rerank_scores = outcome.scores
+        relevance = [r.score for r in search_results]
+        
         # Filter and rank sources
         top_sources = search_results[:max_sources]
         
@@ -542,9 +1704,11 @@ class ResearchAgent:
                 "id": doc.id,
                 "title": doc.title,
                 "source_path": doc.source_path,
-                "relevance_score": result.score,
+                "relevance_score": relevance[i - 1],
                 "excerpt": result.excerpt
             }
+            if rerank_scores is not None:
+                source_info["rerank_score"] = rerank_scores[i - 1]
             sources_used.append(source_info)
             
             # Add to answer
@@ -553,7 +1717,7 @@ class ResearchAgent:
         # Combine answer parts
         if answer_parts:
             answer = "Based on trusted sources:\n\n" + "\n\n".join(answer_parts)
-            confidence = sum(r.score for r in top_sources) / len(top_sources)
+            confidence = sum(relevance[:len(top_sources)]) / len(top_sources)
         else:
             answer = "[GAP: Sources found but insufficient confidence in content]"
             confidence = 0.0
@@ -563,7 +1727,8 @@ class ResearchAgent:
             "sources": sources_used,
             "confidence": round(confidence, 3),
             "query": question,
-            "sources_count": len(sources_used)
+            "sources_count": len(sources_used),
+            "ranking": ranking
         }
         
         logger.info(f"Research complete: {len(sources_used)} sources used, confidence: {confidence:.3f}")
@@ -621,9 +1786,22 @@ class ResearchAgent:
     
     def get_corpus_stats(self) -> Dict[str, Any]:
         """Get statistics about the trusted knowledge corpus."""
-        return {
-            "total_documents": len(self.vector_store.documents),
-            "corpus_path": str(self.vector_store.corpus_path),
-            "index_size": self.vector_store.index.ntotal if self.vector_store.index else 0,
-            "embedding_dimension": self.vector_store.embedding_dim
-        }
+        return self.vector_store.corpus_stats()
+
+if __name__ == "__main__":
+    # Corpus maintenance entry point, e.g. after google_drive_ingest.py:
+    #   python -m app.rag_system            (incremental sync)
+    #   python -m app.rag_system --rebuild  (re-embed everything)
+    import argparse
+    parser = argparse.ArgumentParser(description="Sync the trusted knowledge corpus into the vector index.")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index from scratch instead of syncing changes")
+    args = parser.parse_args()
+    if Config.VECTOR_STORE_SHARDS > 1:
+        from .sharded_store import ShardedVectorStore
+        store = ShardedVectorStore(processes=0)
+    else:
+        store = VectorStore()
+    if args.rebuild:
+        store._rebuild_index()
+    else:
+        print(store.sync_corpus())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Cross-Encoder Re-ranking
+Optional second retrieval stage for ResearchAgent (SOP-RAG-001).
+
+The dense index ranks chunks by the cosine similarity of embeddings computed
+separately for the query and each chunk. A cross-encoder reads the query and
+a chunk together and judges their relevance much more accurately, but costs
+a transformer pass per (query, chunk) pair, so it only re-scores the top
+NOTREKT_RERANK_CANDIDATES dense hits, in batches, on CPU.
+
+Re-ranking one query has a latency budget (NOTREKT_RERANK_BUDGET_MS). The
+reranker keeps a running estimate of the time per pair and sizes each batch
+to what still fits in the budget. If the candidates cannot all be scored in
+time, the query keeps its dense ranking; it never gets a partly re-ranked
+list. At least one pair is scored per query, so the estimate keeps following
+the model's actual speed. warm_up() seeds the estimate; without it the first
+batch ever scored is a single pair.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .config_manager import Config, logger
+from .model_registry import get_shared_model
+
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:  # pragma: no cover - re-ranking is skipped without it
+    CrossEncoder = None
+
+if TYPE_CHECKING:
+    from .rag_system import SearchResult
+
+# Weight of the latest batch in the running time-per-pair estimate
+ESTIMATE_WEIGHT = 0.3
+
+
+def _load_cross_encoder(model_name: str):
+    if CrossEncoder is None:
+        raise ImportError("sentence-transformers not installed")
+    return CrossEncoder(model_name, device="cpu")
+
+
+@dataclass
+class RerankOutcome:
+    """Ranking of one query's candidates after the re-ranking stage."""
+    results: List["SearchResult"]
+    # Relevance of each result: cross-encoder scores if reranked (raw model output,
+    # not on the dense 0-1 scale), else the dense scores
+    scores: List[float]
+    reranked: bool
+    elapsed_ms: float = 0.0
+    # Why the dense ranking was kept ("budget", "model_unavailable", "error", "too_few_candidates")
+    reason: str = ""
+    pairs_scored: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "method": "cross_encoder" if self.reranked else "dense",
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "pairs_scored": self.pairs_scored,
+            **({"fallback_reason": self.reason} if self.reason else {}),
+        }
+
+
+@dataclass
+class RerankStats:
+    """Counters over all queries seen by a reranker."""
+    queries: int = 0
+    reranked: int = 0
+    fallbacks: Dict[str, int] = field(default_factory=dict)
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores dense search results with a cross-encoder under a per-query
+    latency budget (budget_ms <= 0 means no limit). The model is loaded on
+    first use and shared through the model registry.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, candidates: Optional[int] = None,
+                 batch_size: Optional[int] = None, budget_ms: Optional[float] = None):
+        self.model_name = model_name or Config.RERANK_MODEL
+        self.candidates = max(1, candidates or Config.RERANK_CANDIDATES)
+        self.batch_size = max(1, batch_size or Config.RERANK_BATCH_SIZE)
+        self.budget_ms = Config.RERANK_BUDGET_MS if budget_ms is None else budget_ms
+        # Running estimate of seconds per (query, chunk) pair; None until measured
+        self.seconds_per_pair: Optional[float] = None
+        self.stats = RerankStats()
+        self._model = None
+        self._model_failed = False
+        self._stats_lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None and not self._model_failed:
+            try:
+                self._model = get_shared_model("cross-encoder", _load_cross_encoder, self.model_name)
+            except Exception as e:
+                logger.error(f"Failed to load cross-encoder {self.model_name}, keeping dense ranking: {e}")
+                self._model_failed = True
+        return self._model
+
+    def warm_up(self) -> bool:
+        """
+        Load the model and score one pair. The pair's time seeds the
+        time-per-pair estimate, so the first query's batches are sized to its
+        budget; load time is not counted.
+        """
+        model = self._get_model()
+        if model is None:
+            return False
+        start = time.perf_counter()
+        model.predict([("warm-up", "warm-up")], show_progress_bar=False)
+        self._observe(time.perf_counter() - start)
+        return True
+
+    def _observe(self, seconds_per_pair: float):
+        if self.seconds_per_pair is None:
+            self.seconds_per_pair = seconds_per_pair
+        else:
+            self.seconds_per_pair += ESTIMATE_WEIGHT * (seconds_per_pair - self.seconds_per_pair)
+
+    def _record(self, outcome: RerankOutcome) -> RerankOutcome:
+        with self._stats_lock:
+            self.stats.queries += 1
+            if outcome.reranked:
+                self.stats.reranked += 1
+            else:
+                self.stats.fallbacks[outcome.reason] = self.stats.fallbacks.get(outcome.reason, 0) + 1
+        return outcome
+
+    def rerank(self, query: str, results: List["SearchResult"]) -> RerankOutcome:
+        """
+        Re-rank the first self.candidates results by cross-encoder relevance.
+        Returns those candidates best first, or all results in their dense
+        order if the budget, the model or the candidate count rules it out.
+        """
+        start = time.perf_counter()
+        candidates = results[:self.candidates]
+
+        def dense(reason: str, pairs: int = 0) -> RerankOutcome:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if reason != "too_few_candidates":
+                logger.info(f"Keeping dense ranking ({reason}) after {elapsed_ms:.1f} ms, {pairs} pairs scored")
+            return self._record(RerankOutcome(results, [r.score for r in results], False, elapsed_ms, reason, pairs))
+
+        if len(candidates) < 2:
+            return dense("too_few_candidates")
+        model = self._get_model()
+        if model is None:
+            return dense("model_unavailable")
+        budget = self.budget_ms / 1000 if self.budget_ms > 0 else None
+        scores: List[float] = []
+        try:
+            while len(scores) < len(candidates):
+                size = min(self.batch_size, len(candidates) - len(scores))
+                if budget is not None and self.seconds_per_pair is None:
+                    # No estimate yet (no warm-up): time a single pair before sizing batches
+                    size = 1
+                elif budget is not None and self.seconds_per_pair:
+                    fits = int((budget - (time.perf_counter() - start)) / self.seconds_per_pair)
+                    size = min(size, fits if scores else max(1, fits))
+                    if size <= 0:
+                        return dense("budget", len(scores))
+                batch = candidates[len(scores):len(scores) + size]
+                batch_start = time.perf_counter()
+                predicted = model.predict([(query, r.document.content) for r in batch],
+                                          batch_size=size, show_progress_bar=False)
+                self._observe((time.perf_counter() - batch_start) / size)
+                scores.extend(float(score) for score in predicted)
+        except Exception as e:
+            logger.error(f"Cross-encoder re-ranking failed: {e}")
+            return dense("error", len(scores))
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+        return self._record(RerankOutcome(
+            [candidates[i] for i in order], [scores[i] for i in order], True,
+            (time.perf_counter() - start) * 1000, pairs_scored=len(scores)
+        ))
+
+
+_shared_reranker: Optional[CrossEncoderReranker] = None
+_shared_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """Process-wide reranker built from Config, so agents share one time-per-pair estimate."""
+    global _shared_reranker
+    if _shared_reranker is None:
+        with _shared_reranker_lock:
+            if _shared_reranker is None:
+                _shared_reranker = CrossEncoderReranker()
+    return _shared_reranker
+
+
+def clear_reranker():
+    """Drop the shared reranker (mainly for tests)."""
+    global _shared_reranker
+    with _shared_reranker_lock:
+        _shared_reranker = None
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Governance Rule Index
+Precompiled, case-normalized lookup structure for governance rules (SOP-GOV-001).
+
+Rules are indexed once at load time so that resolving an action name to its
+rule costs a dict lookup (exact names) or a walk bounded by the length of the
+action name (wildcard/prefix patterns), independent of the number of rules.
+"""
+
+from typing import Dict, List, Any, Optional, Iterable
+
+# Trailing marker that turns an action_name into a prefix pattern, e.g. "DATA_*"
+WILDCARD = "*"
+
+
+def normalize_action_name(action_name: str) -> str:
+    """Canonical form used for all rule lookups."""
+    return action_name.upper()
+
+
+class _TrieNode:
+    __slots__ = ("children", "rule")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.rule: Optional[Dict[str, Any]] = None
+
+
+class PrefixTrie:
+    """Character trie resolving an action name to its longest matching prefix pattern."""
+
+    def __init__(self):
+        self._root = _TrieNode()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, prefix: str, rule: Dict[str, Any]) -> bool:
+        """Insert a prefix pattern. Returns False if the prefix was already taken."""
+        node = self._root
+        for char in prefix:
+            node = node.children.setdefault(char, _TrieNode())
+        if node.rule is not None:
+            return False
+        node.rule = rule
+        self._size += 1
+        return True
+
+    def longest_match(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the rule of the longest prefix pattern matching ``name``."""
+        node = self._root
+        best = node.rule
+        for char in name:
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.rule is not None:
+                best = node.rule
+        return best
+
+
+class RuleIndex:
+    """
+    Compiled index over a list of governance rules.
+
+    Exact action names are resolved through a hash map keyed by the normalized
+    name. Names ending in ``*`` are prefix patterns and are resolved through a
+    trie; the longest matching prefix wins. Exact matches always take precedence
+    over patterns, and when a name is declared twice the first declaration wins
+    (matching the original linear-scan semantics).
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]]):
+        self._exact: Dict[str, Dict[str, Any]] = {}
+        self._patterns = PrefixTrie()
+        self._rules: List[Dict[str, Any]] = []
+
+        for rule in rules:
+            self._rules.append(rule)
+            name = normalize_action_name(rule["action_name"])
+            if name.endswith(WILDCARD):
+                self._patterns.insert(name[:-len(WILDCARD)], rule)
+            else:
+                self._exact.setdefault(name, rule)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    @property
+    def rules(self) -> List[Dict[str, Any]]:
+        """Rules in declaration order."""
+        return self._rules
+
+    @property
+    def pattern_count(self) -> int:
+        return len(self._patterns)
+
+    def lookup(self, action_name: str) -> Optional[Dict[str, Any]]:
+        """Resolve an action name to its governing rule, or None."""
+        name = normalize_action_name(action_name)
+        rule = self._exact.get(name)
+        if rule is not None:
+            return rule
+        if len(self._patterns):
+            return self._patterns.longest_match(name)
+        return None
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Shared Governance Ruleset
+Process-wide, compiled and immutable view of config/rules.json (SOP-GOV-001).
+
+GovernanceCore, CGOAgent and config_loader.load_rules all resolve rules through
+load_ruleset(), so each process parses and indexes a given rules file once and
+every consumer shares the same objects. A Ruleset is never mutated after it is
+built; reloading produces a new Ruleset that replaces the registry entry.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from .config_manager import logger
+from .rule_index import RuleIndex
+
+
+def rules_version_hash(rules_data: Dict[str, Any]) -> str:
+    """Content hash of a ruleset, independent of file formatting."""
+    canonical = json.dumps(rules_data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def parse_rules_file(rules_path: str) -> Dict[str, Any]:
+    """Read and structurally validate a governance rules JSON file."""
+    try:
+        rules_file = Path(rules_path)
+        if not rules_file.exists():
+            raise FileNotFoundError(f"Rules file not found: {rules_path}")
+
+        with open(rules_file, 'r') as f:
+            rules = json.load(f)
+
+        # Validate rules structure
+        if not isinstance(rules, dict):
+            raise ValueError("Rules file must contain a JSON object")
+
+        if "rules" not in rules:
+            raise ValueError("Rules file must contain a 'rules' array")
+
+        if not isinstance(rules["rules"], list):
+            raise ValueError("'rules' must be an array")
+
+        logger.info(f"Loaded {len(rules['rules'])} governance rules from {rules_path}")
+        return rules
+
+    except FileNotFoundError as e:
+        logger.critical(f"Rules file not found: {e}")
+        raise
+    except json.JSONDecodeError as e:
+        logger.critical(f"Invalid JSON in rules file: {e}")
+        raise
+    except Exception as e:
+        logger.critical(f"Error loading rules: {e}")
+        raise
+
+
+@dataclass(frozen=True)
+class Ruleset:
+    """
+    One compiled version of a rules file.
+    rules_data is shared by every consumer in the process and must be treated
+    as read-only.
+    """
+    path: str
+    rules_data: Dict[str, Any]
+    index: RuleIndex
+    version: str
+    _derived: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+    _derived_lock: Any = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def compile(cls, rules_data: Dict[str, Any], path: str = "") -> "Ruleset":
+        return cls(
+            path=path,
+            rules_data=rules_data,
+            index=RuleIndex(rules_data["rules"]),
+            version=rules_version_hash(rules_data),
+        )
+
+    @property
+    def rules(self) -> List[Dict[str, Any]]:
+        return self.index.rules
+
+    @property
+    def sop_as_law(self) -> bool:
+        return bool(self.rules_data.get("SOP_AS_LAW", False))
+
+    def derive(self, name: str, builder: Callable[["Ruleset"], Any]) -> Any:
+        """
+        Return a consumer-specific structure compiled from this ruleset,
+        building it on first use. Derived values live as long as the ruleset,
+        so every consumer in the process shares one copy per version.
+        """
+        value = self._derived.get(name)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = builder(self)
+                    self._derived[name] = value
+        return value
+
+
+_registry: Dict[str, Tuple[Optional[Tuple[int, int]], Ruleset]] = {}
+_registry_lock = threading.Lock()
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_ruleset(rules_path: str, force: bool = False) -> Ruleset:
+    """
+    Return the process-wide Ruleset for a rules file.
+
+    The file is parsed again only when its mtime/size changed or when force is
+    set. If a re-read yields the same content version, the existing Ruleset is
+    kept so that derived structures stay shared.
+    """
+    key = os.path.realpath(rules_path)
+    signature = _file_signature(key)
+    cached = _registry.get(key)
+    if cached is not None and not force and signature is not None and cached[0] == signature:
+        return cached[1]
+
+    with _registry_lock:
+        cached = _registry.get(key)
+        if cached is not None and not force and signature is not None and cached[0] == signature:
+            return cached[1]
+        ruleset = Ruleset.compile(parse_rules_file(rules_path), path=key)
+        if cached is not None and cached[1].version == ruleset.version:
+            ruleset = cached[1]
+        _registry[key] = (signature, ruleset)
+        return ruleset
+
+
+def clear_ruleset_cache():
+    """Drop all cached rulesets (mainly for tests)."""
+    with _registry_lock:
+        _registry.clear()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Search Filters
+Metadata restrictions for VectorStore search, applied inside the index search (SOP-RAG-001).
+
+A filter restricts results by file type, source path prefix and indexing
+date. Path prefixes match whole path components: "policies/" covers
+policies/a.md but not policies_archive/a.md. Every chunk of a file shares these attributes and a file's chunks
+occupy one contiguous vector id range in the manifest, so each clause is
+evaluated once per file and turned into a bitmap over vector ids. The clause
+bitmaps are ANDed and handed to FAISS as an ID selector, so the index only
+scores allowed vectors instead of over-fetching and filtering afterwards.
+
+Filter expressions are SearchFilter objects or dicts with the same keys:
+
+    {"file_types": [".md", ".txt"],
+     "path_prefix": "policies/",          # directory or file, relative to the corpus directory
+     "indexed_after": "2025-01-01",       # ISO date or datetime, inclusive
+     "indexed_before": "2025-07-01T12:00"}  # exclusive
+"""
+
+import os
+from dataclasses import dataclass, fields
+from datetime import datetime, date, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - rag_system reports missing dependencies
+    np = None
+
+
+def _parse_time(value: Union[str, date, datetime, None]) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    # Naive times are UTC, like the indexed_at stamps written by VectorStore
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """Conjunction of metadata clauses; None means "no restriction"."""
+    file_types: Optional[Tuple[str, ...]] = None
+    path_prefix: Optional[str] = None
+    indexed_after: Optional[datetime] = None
+    indexed_before: Optional[datetime] = None
+
+    def __post_init__(self):
+        if self.file_types is not None:
+            if isinstance(self.file_types, str):
+                raise ValueError("file_types must be a list of extensions, not a string")
+            normalized = tuple(sorted({
+                suffix.lower() if suffix.startswith(".") else f".{suffix.lower()}" for suffix in self.file_types
+            }))
+            object.__setattr__(self, "file_types", normalized)
+        object.__setattr__(self, "indexed_after", _parse_time(self.indexed_after))
+        object.__setattr__(self, "indexed_before", _parse_time(self.indexed_before))
+
+    @classmethod
+    def from_expression(cls, expression: Union["SearchFilter", Dict[str, Any], None]) -> Optional["SearchFilter"]:
+        """Build a filter from a dict (or pass a SearchFilter through). Unknown keys raise ValueError."""
+        if expression is None or isinstance(expression, SearchFilter):
+            return expression
+        if not isinstance(expression, dict):
+            raise ValueError(f"Unsupported filter expression: {expression!r}")
+        known = {f.name for f in fields(cls)}
+        unknown = set(expression) - known
+        if unknown:
+            raise ValueError(f"Unknown filter keys: {sorted(unknown)} (expected some of {sorted(known)})")
+        return cls(**expression)
+
+    def clauses(self, corpus_path: Path) -> Iterable[Tuple[Tuple[Any, ...], Callable[[str, Callable[[], str]], bool]]]:
+        """
+        (cache key, predicate) per restricting clause. Predicates take a
+        source path and a callable returning the file's indexed_at stamp
+        (only looked up by date clauses).
+        """
+        if self.file_types is not None:
+            suffixes = self.file_types
+            yield ("file_types", suffixes), lambda path, _: Path(path).suffix.lower() in suffixes
+        if self.path_prefix:
+            prefix = Path(self.path_prefix)
+            prefix = str(prefix if prefix.is_absolute() else corpus_path / prefix)
+            directory = prefix if prefix.endswith(os.sep) else prefix + os.sep
+            yield ("path_prefix", prefix), lambda path, _: path == prefix or path.startswith(directory)
+        if self.indexed_after is not None or self.indexed_before is not None:
+            after, before = self.indexed_after, self.indexed_before
+
+            def in_range(path: str, indexed_at: Callable[[], str]) -> bool:
+                stamp = _parse_time(indexed_at())
+                if stamp is None:
+                    return False
+                return (after is None or stamp >= after) and (before is None or stamp < before)
+            yield ("indexed_at", after, before), in_range
+
+
+def ranges_bitmap(ranges: Iterable[Tuple[int, int]], size: int) -> "np.ndarray":
+    """Boolean array over vector ids [0, size) with the given [start, end) ranges set."""
+    bitmap = np.zeros(size, dtype=bool)
+    for start, end in ranges:
+        bitmap[start:end] = True
+    return bitmap
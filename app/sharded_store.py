@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Sharded Vector Store
+Trusted knowledge corpus split across several VectorStore shards (SOP-RAG-001).
+
+Each corpus file belongs to exactly one shard, chosen by a hash of its path
+relative to the corpus directory, so a file's chunks always live together
+and incremental syncs touch only the shards whose files changed. Every shard
+is an ordinary VectorStore (index versions, manifest, lexical index) in its
+own directory:
+
+    <vector_db_path>/shard-00-of-04/
+    <vector_db_path>/shard-01-of-04/ ...
+
+A search encodes the queries once, asks every shard for its top hits in
+parallel and merges them. Shards are searched on threads (FAISS releases the
+GIL while searching) or, with NOTREKT_SHARD_PROCESSES > 0, by worker
+processes that each memory-map their shards read-only, so no single process
+holds the whole corpus. Process-served stores are read-only: syncs and
+rebuilds run in a writable (threaded) ShardedVectorStore, e.g. the
+`python -m app.rag_system` CLI, and reload_if_changed() makes the workers
+pick them up.
+
+Dense scores are cosine similarities and merge exactly. BM25 statistics
+(document frequencies, average chunk length) are kept per shard, so lexical
+and hybrid rankings can differ slightly from an unsharded index's.
+"""
+
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config_manager import Config, logger
+from . import rag_system
+from .rag_system import (
+    Document, SearchResult, SyncStats, VectorStore, combine_rankings, encode_queries, search_mode,
+)
+from .embedding_cache import get_query_cache
+from .model_registry import get_embedding_model
+from .search_filter import SearchFilter
+
+
+def relative_key(file_path: Path, corpus_path: Path) -> str:
+    try:
+        return Path(file_path).relative_to(corpus_path).as_posix()
+    except ValueError:
+        return Path(file_path).as_posix()
+
+
+def shard_of(relative_path: str, shards: int) -> int:
+    """Shard owning a corpus file, from its path relative to the corpus directory."""
+    digest = hashlib.sha256(relative_path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shards
+
+
+def shard_dir(vector_db_path: Path, shard: int, shards: int) -> Path:
+    return Path(vector_db_path) / f"shard-{shard:02d}-of-{shards:02d}"
+
+
+class ShardStore(VectorStore):
+    """VectorStore over the corpus files that hash to one shard."""
+
+    def __init__(self, shard: int, shards: int, corpus_path: Optional[str] = None,
+                 vector_db_path: Optional[str] = None, **kwargs):
+        self.shard = shard
+        self.shards = shards
+        super().__init__(corpus_path=corpus_path, vector_db_path=vector_db_path, **kwargs)
+
+    def owns(self, file_path: Path) -> bool:
+        return shard_of(relative_key(file_path, self.corpus_path), self.shards) == self.shard
+
+    def _discover_corpus_files(self) -> List[Path]:
+        return [file_path for file_path in super()._discover_corpus_files() if self.owns(file_path)]
+
+
+@dataclass
+class ShardAnswer:
+    """One shard's part of a search: its rankings per query and the documents they name."""
+    mode: str
+    rankings: Optional[List[List[List[Tuple[int, float]]]]]
+    documents: Dict[int, Document]
+
+
+# Shard operations, run with the shard's store on a thread or in its worker process
+
+def shard_rankings(store: VectorStore, queries: List[str], query_embeddings, k: int,
+                   nprobe: Optional[int], ef_search: Optional[int], mode: str,
+                   search_filter: Optional[SearchFilter]) -> ShardAnswer:
+    def search() -> ShardAnswer:
+        if not store.documents:
+            return ShardAnswer(mode, None, {})
+        used, rankings = store._rankings(queries, k, nprobe, ef_search, mode, search_filter, query_embeddings)
+        ids = {vector_id for query_rankings in rankings for ranking in query_rankings for vector_id, _ in ranking}
+        documents = {vector_id: store.documents.get(vector_id) for vector_id in ids}
+        return ShardAnswer(used, rankings, {vector_id: doc for vector_id, doc in documents.items() if doc is not None})
+
+    return store._consistent(search)
+
+
+def shard_stats(store: VectorStore) -> Dict[str, Any]:
+    return store.corpus_stats()
+
+
+def shard_reload(store: VectorStore) -> bool:
+    return store.reload_if_changed()
+
+
+# Worker process state: shard number -> store opened by the pool initializer
+_worker_stores: Dict[int, VectorStore] = {}
+
+
+def _open_worker_shards(shard_class: type, shards: List[int], total: int, corpus_path: str,
+                        vector_db_path: str, store_kwargs: Dict[str, Any]):
+    for shard in shards:
+        _worker_stores[shard] = shard_class(
+            shard, total, corpus_path=corpus_path,
+            vector_db_path=str(shard_dir(Path(vector_db_path), shard, total)), read_only=True, **store_kwargs
+        )
+
+
+def _call_in_worker(function: Callable, shard: int, *args):
+    return function(_worker_stores[shard], *args)
+
+
+def merge_sync_stats(all_stats: List[SyncStats]) -> SyncStats:
+    merged = SyncStats()
+    for stats in all_stats:
+        for f in fields(SyncStats):
+            if f.name != "metrics":
+                setattr(merged, f.name, getattr(merged, f.name) + getattr(stats, f.name))
+    return merged
+
+
+class ShardedVectorStore:
+    """
+    VectorStore interface over the corpus partitioned into shards
+    (default: Config.VECTOR_STORE_SHARDS), searched in parallel on threads
+    or, with processes > 0 (default: Config.SHARD_PROCESSES), by that many
+    read-only worker processes. Further keyword arguments (index_type,
+    embedding_batch_size) are passed to every shard.
+
+    There is no search_ids/search_ids_many: vector ids are only unique
+    within a shard, and there is no single document table to resolve them
+    against. Callers that prefer the ids-only search (VerifierAgent) use
+    search_many here instead. It still encodes the queries once and searches
+    the shards in parallel; it adds one SearchResult per hit, whose excerpt
+    is only cut if read.
+    """
+
+    # Store class opened for each shard (in the worker processes too)
+    shard_class = ShardStore
+
+    def __init__(self, corpus_path: Optional[str] = None, vector_db_path: Optional[str] = None,
+                 shards: Optional[int] = None, processes: Optional[int] = None,
+                 read_only: Optional[bool] = None, **store_kwargs):
+        self.corpus_path = Path(corpus_path or Config.CORPUS_PATH)
+        self.vector_db_path = Path(vector_db_path or Config.VECTOR_DB_PATH)
+        self.shards = shards or Config.VECTOR_STORE_SHARDS
+        if self.shards < 1:
+            raise ValueError(f"Shard count must be at least 1, got {self.shards}")
+        processes = Config.SHARD_PROCESSES if processes is None else processes
+        processes = min(max(0, processes), self.shards)
+        self.read_only = bool(processes) or (Config.VECTOR_STORE_READ_ONLY if read_only is None else read_only)
+        self.stores: List[VectorStore] = []
+        self._pools: List[ProcessPoolExecutor] = []
+        self._threads: Optional[ThreadPoolExecutor] = None
+
+        if processes:
+            self._start_workers(processes, store_kwargs)
+        else:
+            self.stores = [
+                self.shard_class(shard, self.shards, corpus_path=str(self.corpus_path),
+                                 vector_db_path=str(shard_dir(self.vector_db_path, shard, self.shards)),
+                                 read_only=read_only, **store_kwargs)
+                for shard in range(self.shards)
+            ]
+            self._threads = ThreadPoolExecutor(max_workers=self.shards, thread_name_prefix="vector-shard")
+            self.model = self.stores[0].model
+            self.query_cache = self.stores[0].query_cache
+            self.embedding_dim = self.stores[0].embedding_dim
+
+        stats = self.corpus_stats()
+        logger.info(
+            f"ShardedVectorStore initialized with {stats['total_documents']} documents in {self.shards} shards"
+            + (f" served by {processes} worker processes" if processes else "")
+        )
+
+    def _start_workers(self, processes: int, store_kwargs: Dict[str, Any]):
+        """Start the worker processes and open every shard in them; queries are encoded here."""
+        try:
+            if rag_system.SentenceTransformer is None:
+                raise ImportError("sentence-transformers not installed")
+            self.model = get_embedding_model(rag_system.SentenceTransformer)
+            self.query_cache = get_query_cache(Config.EMBEDDING_MODEL)
+            self.embedding_dim = self.model.get_sentence_embedding_dimension()
+        except Exception as e:
+            logger.error(f"Failed to load sentence transformer model: {e}")
+            raise
+        # spawn, not fork: the parent holds the model and may already run threads
+        context = multiprocessing.get_context("spawn")
+        for worker in range(processes):
+            self._pools.append(ProcessPoolExecutor(
+                max_workers=1, mp_context=context, initializer=_open_worker_shards,
+                initargs=(self.shard_class, list(range(worker, self.shards, processes)), self.shards,
+                          str(self.corpus_path), str(self.vector_db_path), store_kwargs)
+            ))
+
+    def _map(self, function: Callable, *args) -> List[Any]:
+        """function(shard store, *args) for every shard in parallel; results in shard order."""
+        if self._pools:
+            futures = [
+                self._pools[shard % len(self._pools)].submit(_call_in_worker, function, shard, *args)
+                for shard in range(self.shards)
+            ]
+        else:
+            futures = [self._threads.submit(function, store, *args) for store in self.stores]
+        return [future.result() for future in futures]
+
+    def shard_for(self, file_path: Path) -> int:
+        return shard_of(relative_key(Path(file_path), self.corpus_path), self.shards)
+
+    def close(self):
+        """Stop the worker processes and search threads."""
+        for pool in self._pools:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if self._threads is not None:
+            self._threads.shutdown(wait=True)
+
+    # Indexing (threaded stores only)
+
+    def _writable(self, operation: str) -> bool:
+        if self._pools:
+            logger.error(f"Cannot {operation}: sharded store is served read-only by worker processes")
+            return False
+        return True
+
+    def sync_corpus(self, save: bool = True, workers: Optional[int] = None) -> SyncStats:
+        """Incrementally sync every shard with its part of the corpus (see VectorStore.sync_corpus)."""
+        if not self._writable("sync corpus"):
+            return SyncStats()
+        return merge_sync_stats([store.sync_corpus(save, workers) for store in self.stores])
+
+    def _rebuild_index(self) -> SyncStats:
+        """Rebuild every shard (see VectorStore._rebuild_index)."""
+        if not self._writable("rebuild index"):
+            return SyncStats()
+        return merge_sync_stats([store._rebuild_index() for store in self.stores])
+
+    def index_corpus(self) -> int:
+        logger.info(f"Indexing corpus from: {self.corpus_path}")
+        stats = self.sync_corpus()
+        logger.info(f"Indexing complete: {stats.indexed_files} documents indexed")
+        return stats.indexed_files
+
+    def index_document(self, file_path: Path) -> Optional[str]:
+        """Index a single document into the shard that owns it."""
+        if not self._writable("index document"):
+            return None
+        return self.stores[self.shard_for(file_path)].index_document(Path(file_path))
+
+    def reload_if_changed(self) -> bool:
+        """Reopen every shard another process has saved a new version of. Returns True if any was reloaded."""
+        return any(self._map(shard_reload))
+
+    def corpus_stats(self) -> Dict[str, Any]:
+        stats = self._map(shard_stats)
+        return {
+            "total_documents": sum(s["total_documents"] for s in stats),
+            "corpus_path": str(self.corpus_path),
+            "index_size": sum(s["index_size"] for s in stats),
+            "embedding_dimension": self.embedding_dim,
+            "shards": self.shards,
+        }
+
+    # Search
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.3,
+               nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+               mode: Optional[str] = None, filters=None) -> List[SearchResult]:
+        """Search all shards for documents similar to the query (see VectorStore.search)."""
+        results = self.search_many([query], k=k, min_score=min_score, nprobe=nprobe,
+                                   ef_search=ef_search, mode=mode, filters=filters)[0]
+        logger.info(f"Search query: '{query}' returned {len(results)} results")
+        return results
+
+    def search_many(self, queries: List[str], k: int = 5, min_score: float = 0.3,
+                    nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                    mode: Optional[str] = None, filters=None) -> List[List[SearchResult]]:
+        """
+        Search every shard in parallel and merge their rankings, then score
+        the merged rankings as VectorStore.search_many does. Each shard
+        returns as many candidates as an unsharded search would take from
+        the whole index, so the merged top k is exact for dense search.
+        """
+        mode = search_mode(mode)
+        search_filter = SearchFilter.from_expression(filters)
+        empty: List[List[SearchResult]] = [[] for _ in queries]
+        if not queries:
+            return empty
+        try:
+            query_embeddings = None if mode == "lexical" else encode_queries(self.model, self.query_cache, queries)
+            answers = self._map(shard_rankings, queries, query_embeddings, k, nprobe, ef_search, mode, search_filter)
+        except Exception as e:
+            logger.error(f"Sharded search failed: {e}")
+            return empty
+        answers = [(shard, answer) for shard, answer in enumerate(answers) if answer.rankings is not None]
+        if not answers:
+            logger.warning("No documents in index")
+            return empty
+        mode = answers[0][1].mode
+        depth = max(k, Config.HYBRID_CANDIDATES) if mode == "hybrid" else k
+        documents = {shard: answer.documents for shard, answer in answers}
+        results = []
+        for position, query in enumerate(queries):
+            rankings = []
+            for ranking in range(len(answers[0][1].rankings[position])):
+                merged = [
+                    ((shard, vector_id), score)
+                    for shard, answer in answers for vector_id, score in answer.rankings[position][ranking]
+                ]
+                merged.sort(key=lambda hit: hit[1], reverse=True)
+                rankings.append(merged[:depth])
+            results.append(self._collect_results(query, combine_rankings(mode, rankings), documents, k, min_score))
+        return results
+
+    @staticmethod
+    def _collect_results(query: str, hits: List[Tuple[Tuple[int, int], float]],
+                         documents: Dict[int, Dict[int, Document]], k: int, min_score: float) -> List[SearchResult]:
+        results = []
+        for (shard, vector_id), score in hits:
+            if score < min_score:
+                continue
+            document = documents[shard].get(vector_id)
+            if document is None:
+                continue
+            results.append(SearchResult(document=document, score=float(score), query=query))
+            if len(results) == k:
+                break
+        return results
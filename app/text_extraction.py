@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Corpus Text Extraction
+File hashing, text extraction and chunking for the trusted knowledge corpus (SOP-RAG-001).
+
+These are module-level functions (not VectorStore methods) so that ingestion
+worker processes can run them without touching the embedding model or index.
+Per-format extraction (text, JSON, HTML, PDF, DOCX) lives in app/extractors.py.
+
+Extraction and chunking stream: files are read in blocks of BLOCK_CHARS,
+split into sentences as blocks arrive, and chunks are yielded as soon as
+they fill up, so memory stays bounded by the block size and the longest
+sentence rather than the file size. Sentences longer than
+max(chunk_size, MIN_SENTENCE_CHARS) * SENTENCE_LIMIT_FACTOR characters (e.g.
+text without punctuation) are split at whitespace.
+
+Chunk sizes are measured in characters (the default, and the historical
+behaviour) or in tokens of the embedding model's tokenizer, so chunks line
+up with the model's input window. Consecutive chunks can overlap by whole
+sentences.
+"""
+
+import re
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .config_manager import Config, logger
+from .extractors import get_extractor
+
+# Characters read from a file per block
+BLOCK_CHARS = 1 << 20
+# Longest sentence kept whole is max(chunk_size, MIN_SENTENCE_CHARS) * SENTENCE_LIMIT_FACTOR characters
+MIN_SENTENCE_CHARS = 500
+SENTENCE_LIMIT_FACTOR = 8
+CHUNK_UNITS = ("chars", "tokens")
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?]) +')
+# Rough stand-in for a subword tokenizer: words and single punctuation marks
+_APPROXIMATE_TOKENS = re.compile(r"\w+|[^\w\s]")
+
+
+def calculate_file_hash(file_path: Path) -> str:
+    """Calculate SHA-256 hash of file content."""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(1 << 16), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def open_text(file_path: Path, block_chars: Optional[int] = None) -> Tuple[Iterator[str], Dict[str, Any]]:
+    """
+    Return (text blocks, metadata) for a corpus file via the extractor
+    registered for its suffix (see app/extractors.py). Blocks are produced
+    lazily; read or decode errors are raised while iterating them.
+    Unsupported types yield no text and carry an error in the metadata.
+    """
+    extractor = get_extractor(file_path)
+    if extractor is None:
+        suffix = file_path.suffix.lower()
+        logger.warning(f"Unsupported file type: {suffix}")
+        return iter(()), {"file_type": suffix, "error": "unsupported_format"}
+    return extractor.open(file_path, block_chars or BLOCK_CHARS)
+
+
+def extract_text_from_file(file_path: Path) -> Tuple[str, Dict[str, Any]]:
+    """
+    Extract text content and metadata from any registered file type.
+    Reads the whole file into one string; the indexer uses chunk_file instead.
+    """
+    try:
+        blocks, metadata = open_text(file_path)
+        return "".join(blocks), metadata
+    except Exception as e:
+        logger.error(f"Failed to extract text from {file_path}: {e}")
+        return "", {"error": str(e)}
+
+
+def iter_sentences(blocks: Iterable[str], max_chars: int = MIN_SENTENCE_CHARS * SENTENCE_LIMIT_FACTOR) -> Iterator[str]:
+    """
+    Split streamed text on sentence boundaries, yielding non-empty sentences.
+    A boundary at the very end of a block is only trusted once the next
+    block shows where the whitespace run ends. Text that runs past max_chars
+    without a boundary is cut at the last space (or hard at max_chars).
+    """
+    carry = ""
+    for block in blocks:
+        buffer = carry + block if carry else block
+        start = 0
+        for match in _SENTENCE_SPLIT.finditer(buffer):
+            if match.end() == len(buffer):
+                break
+            if match.start() > start:
+                yield buffer[start:match.start()]
+            start = match.end()
+        carry = buffer[start:]
+        while len(carry) > max_chars:
+            cut = carry.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            yield carry[:cut]
+            carry = carry[cut:].lstrip(" ")
+    # The final boundary may have been held back; whatever is left is one sentence
+    for sentence in _SENTENCE_SPLIT.split(carry):
+        if sentence:
+            yield sentence
+
+
+def approximate_token_count(text: str) -> int:
+    return len(_APPROXIMATE_TOKENS.findall(text))
+
+
+@lru_cache(maxsize=None)
+def token_counter(model_name: str = "") -> Callable[[str], int]:
+    """
+    Token count function for the embedding model's tokenizer, loaded from
+    the local Hugging Face cache only. Falls back to approximate_token_count
+    when transformers or the tokenizer files are unavailable.
+    """
+    model_name = model_name or Config.EMBEDDING_MODEL
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        return approximate_token_count
+    for name in (model_name, f"sentence-transformers/{model_name}"):
+        try:
+            tokenizer = AutoTokenizer.from_pretrained(name, local_files_only=True)
+        except Exception:
+            continue
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    logger.info(f"Tokenizer for {model_name} not available locally, approximating token counts")
+    return approximate_token_count
+
+
+def iter_chunks(blocks: Iterable[str], chunk_size: int = 500, overlap: int = 0,
+                unit: str = "chars") -> Iterator[str]:
+    """
+    Group streamed text into chunks of whole sentences, each below chunk_size
+    (in characters or tokens; a single longer sentence forms its own chunk).
+    With overlap > 0 each chunk starts with the trailing sentences of the
+    previous one, up to overlap in size.
+    """
+    if unit not in CHUNK_UNITS:
+        raise ValueError(f"Unknown chunk unit: {unit} (expected one of {CHUNK_UNITS})")
+    if unit == "tokens":
+        measure, separator = token_counter(), 0
+    else:
+        measure, separator = len, 1
+    max_sentence = max(chunk_size, MIN_SENTENCE_CHARS) * SENTENCE_LIMIT_FACTOR
+    current: List[str] = []
+    sizes: List[int] = []
+    current_size = 0
+    for sentence in iter_sentences(blocks, max_sentence):
+        size = measure(sentence)
+        if current and current_size + size >= chunk_size:
+            chunk = " ".join(current).strip()
+            if chunk:
+                yield chunk
+            kept = 0
+            keep_size = 0
+            while overlap and kept < len(current) - 1 and keep_size + sizes[-1 - kept] <= overlap:
+                keep_size += sizes[-1 - kept]
+                kept += 1
+            current, sizes = current[len(current) - kept:], sizes[len(sizes) - kept:]
+            current_size = keep_size
+        current.append(sentence)
+        sizes.append(size + separator)
+        current_size += size + separator
+    chunk = " ".join(current).strip()
+    if chunk:
+        yield chunk
+
+
+def chunk_text(text: str, chunk_size: int = 500, overlap: int = 0, unit: str = "chars") -> List[str]:
+    """Split text on sentence boundaries into chunks of roughly chunk_size characters (or tokens)."""
+    return list(iter_chunks([text], chunk_size, overlap, unit))
+
+
+def chunk_file(file_path: Path, chunk_size: Optional[int] = None, overlap: Optional[int] = None,
+               unit: Optional[str] = None) -> Tuple[Iterator[str], Dict[str, Any]]:
+    """
+    Stream the chunks of a corpus file: (chunk iterator, metadata). Sizes
+    default to Config.CHUNK_SIZE / CHUNK_OVERLAP / CHUNK_UNIT.
+    """
+    blocks, metadata = open_text(file_path)
+    chunks = iter_chunks(
+        blocks,
+        chunk_size if chunk_size is not None else Config.CHUNK_SIZE,
+        overlap if overlap is not None else Config.CHUNK_OVERLAP,
+        (unit or Config.CHUNK_UNIT).lower(),
+    )
+    return chunks, metadata
@@ -3,6 +3,7 @@ config_loader.py - Loads environment variables and config files securely.
 SOP-ARC-001
 """
 import os
+import copy
 import json
 from pathlib import Path
 
@@ -11,5 +12,10 @@ def load_env():
     load_dotenv()
 
 def load_rules(path: str):
-    with open(path, 'r') as f:
-        return json.load(f)
+    """
+    Return the rules dict for path. The file is parsed once per process into
+    a ruleset shared by every consumer; callers get a deep copy, so changing
+    it never alters the rules other agents enforce.
+    """
+    from app.ruleset import load_ruleset
+    return copy.deepcopy(load_ruleset(path).rules_data)
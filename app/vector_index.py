@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+NOTREKT.AI v2.0 - Vector Index Factory
+FAISS index construction and query-time tuning for the trusted knowledge corpus (SOP-RAG-001).
+
+Supported index types (all keyed by stable vector id, inner-product metric):
+
+    flat      exact search; IndexIDMap2(IndexFlatIP). Cost grows linearly with chunks.
+    fp16      exhaustive search over float16 codes: half the memory, near-exact scores.
+    sq8       exhaustive search over 8-bit scalar-quantized codes: a quarter of the memory.
+    ivf_flat  inverted lists over full vectors; search cost tuned with nprobe.
+    ivf_pq    inverted lists over product-quantized codes; much smaller, approximate scores.
+    hnsw      graph index; search cost tuned with efSearch. Does not support
+              removal, so removed vectors stay in the graph as tombstones
+              until the index is rebuilt.
+
+IVF indexes are trained on a random sample of the vectors they will hold, so
+an approximate index can only be built once enough vectors exist; below that
+size the flat index is both exact and fast enough.
+
+Quantized types (QUANTIZED_TYPES) rank by approximate scores. rerank()
+re-scores their top candidates with exact vectors kept in a separate flat
+index, recovering most of the recall lost to quantization.
+"""
+
+import math
+import os
+from typing import Optional, Tuple
+
+from .config_manager import logger
+
+try:
+    import numpy as np
+    import faiss
+except ImportError:  # pragma: no cover - rag_system reports missing dependencies
+    np = None
+    faiss = None
+
+INDEX_TYPES = ("flat", "fp16", "sq8", "ivf_flat", "ivf_pq", "hnsw")
+# Types that store lossy codes instead of the float32 vectors
+QUANTIZED_TYPES = ("fp16", "sq8", "ivf_pq")
+
+# FAISS k-means wants roughly this many training points per centroid
+TRAINING_POINTS_PER_CENTROID = 39
+# Bits per product-quantizer sub-vector code (256 centroids per sub-quantizer)
+PQ_NBITS = 8
+# Vectors added per add_with_ids call when building an index
+ADD_BATCH_SIZE = 65536
+
+
+def new_flat_index(dim: int):
+    """Exact inner-product index with stable ids (supports remove_ids)."""
+    return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+
+def auto_nlist(n_vectors: int) -> int:
+    """Number of IVF lists for a corpus size: ~4*sqrt(n), with enough training points per list."""
+    by_size = int(4 * math.sqrt(max(n_vectors, 1)))
+    by_training = n_vectors // TRAINING_POINTS_PER_CENTROID
+    return max(1, min(by_size, by_training, 65536))
+
+
+def auto_pq_m(dim: int) -> int:
+    """Number of PQ sub-quantizers: 8-dimensional sub-vectors where dim allows it."""
+    for sub_dim in (8, 4, 2, 1):
+        if dim % sub_dim == 0:
+            return dim // sub_dim
+    return dim
+
+
+def index_type_of(index) -> str:
+    """Name (one of INDEX_TYPES) of an index built by this module."""
+    if index is None:
+        return "none"
+    if faiss.try_extract_index_ivf(index) is not None:
+        ivf = faiss.downcast_index(faiss.extract_index_ivf(index))
+        return "ivf_pq" if isinstance(ivf, faiss.IndexIVFPQ) else "ivf_flat"
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(base, faiss.IndexScalarQuantizer):
+        return "fp16" if base.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+    return "flat"
+
+
+def supports_remove(index) -> bool:
+    """False for graph indexes, whose removed vectors must be left as tombstones."""
+    return index_type_of(index) != "hnsw"
+
+
+def _training_sample(vectors: "np.ndarray", size: int, seed: int) -> "np.ndarray":
+    if len(vectors) <= size:
+        return vectors
+    rng = np.random.default_rng(seed)
+    return vectors[rng.choice(len(vectors), size, replace=False)]
+
+
+def build_index(index_type: str, vectors: "np.ndarray", ids: "np.ndarray", nlist: int = 0,
+                pq_m: int = 0, hnsw_m: int = 32, ef_construction: int = 200,
+                train_sample: int = 100000, seed: int = 1234):
+    """
+    Build an index of the given type holding vectors under ids. IVF and
+    scalar quantizers are trained on at most train_sample randomly chosen vectors.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {index_type} (expected one of {INDEX_TYPES})")
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    ids = np.ascontiguousarray(ids, dtype='int64')
+    n_vectors, dim = vectors.shape
+
+    if index_type == "flat":
+        index = new_flat_index(dim)
+    elif index_type in ("fp16", "sq8"):
+        qtype = faiss.ScalarQuantizer.QT_fp16 if index_type == "fp16" else faiss.ScalarQuantizer.QT_8bit
+        quantized = faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_INNER_PRODUCT)
+        # 8-bit codes learn per-dimension ranges from the sample
+        quantized.train(_training_sample(vectors, train_sample, seed))
+        index = faiss.IndexIDMap2(quantized)
+    elif index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = ef_construction
+        index = faiss.IndexIDMap2(hnsw)
+    else:
+        nlist = nlist or auto_nlist(n_vectors)
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m or auto_pq_m(dim), PQ_NBITS,
+                                     faiss.METRIC_INNER_PRODUCT)
+        index.train(_training_sample(vectors, train_sample, seed))
+        # Hashtable direct map: arbitrary ids stay reconstructable and removable
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+    for start in range(0, n_vectors, ADD_BATCH_SIZE):
+        index.add_with_ids(vectors[start:start + ADD_BATCH_SIZE], ids[start:start + ADD_BATCH_SIZE])
+    logger.info(f"Built {index_type} vector index with {index.ntotal} vectors (dim={dim})")
+    return index
+
+
+def export_vectors(index, ids: Optional["np.ndarray"] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Return (vectors, ids) stored in an index. ID-mapped indexes enumerate
+    their own ids; IVF indexes need the ids to reconstruct. PQ vectors come
+    back decoded (approximate).
+    """
+    if isinstance(index, faiss.IndexIDMap):
+        stored_ids = faiss.vector_to_array(index.id_map).astype('int64')
+        vectors = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+        if ids is None:
+            return vectors, stored_ids
+        position = {int(vid): row for row, vid in enumerate(stored_ids)}
+        rows = [position[int(vid)] for vid in ids]
+        return vectors[rows], np.asarray(ids, dtype='int64')
+    if ids is None:
+        raise ValueError("ids are required to export vectors from a non ID-mapped index")
+    ids = np.asarray(ids, dtype='int64')
+    return index.reconstruct_batch(ids), ids
+
+
+def rerank(exact_index, query: "np.ndarray", candidate_ids: "np.ndarray", k: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Re-score one query's candidates (-1 entries ignored) with their exact
+    vectors from an ID-mapped flat index. Returns the best k (scores, ids).
+    """
+    candidate_ids = np.asarray(candidate_ids, dtype='int64')
+    candidate_ids = candidate_ids[candidate_ids >= 0]
+    if not len(candidate_ids):
+        return np.zeros(0, dtype='float32'), candidate_ids
+    scores = exact_index.reconstruct_batch(candidate_ids) @ np.asarray(query, dtype='float32')
+    order = np.argsort(-scores, kind="stable")[:k]
+    return scores[order], candidate_ids[order]
+
+
+def configure_search(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """
+    Set an index's default query-time accuracy/speed knobs; parameters that
+    do not apply are ignored. This changes the index for every caller, so
+    per-query knobs go through search_parameters instead.
+    """
+    if index is None:
+        return
+    if nprobe:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = min(int(nprobe), ivf.nlist)
+    if ef_search and isinstance(index, faiss.IndexIDMap):
+        base = faiss.downcast_index(index.index)
+        if isinstance(base, faiss.IndexHNSW):
+            base.hnsw.efSearch = int(ef_search)
+
+
+def search_parameters(index, allowed: Optional["np.ndarray"], nprobe: Optional[int] = None,
+                      ef_search: Optional[int] = None):
+    """
+    Per-call SearchParameters carrying nprobe/efSearch and, if a boolean
+    bitmap (indexed by vector id) is given, restricting the search to the
+    vector ids set in it. Unlike configure_search, nothing is changed on
+    the index, so concurrent searches with different knobs do not race.
+    None when there is nothing to pass (unfiltered flat search). The
+    returned object holds references to the selector and packed bitmap,
+    which FAISS only sees as raw pointers.
+    """
+    keep_alive = ()
+    kwargs = {}
+    if allowed is not None:
+        packed = np.packbits(np.asarray(allowed, dtype=bool), bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(allowed), faiss.swig_ptr(packed))
+        keep_alive = (selector, packed)
+        kwargs["sel"] = selector
+    index_type = index_type_of(index)
+    if index_type in ("ivf_flat", "ivf_pq"):
+        ivf = faiss.try_extract_index_ivf(index)
+        params = faiss.SearchParametersIVF(nprobe=min(int(nprobe or ivf.nprobe), ivf.nlist), **kwargs)
+    elif index_type == "hnsw":
+        base = faiss.downcast_index(index.index)
+        params = faiss.SearchParametersHNSW(efSearch=int(ef_search or base.hnsw.efSearch), **kwargs)
+    elif kwargs:
+        params = faiss.SearchParameters(**kwargs)
+    else:
+        return None
+    params.keep_alive = keep_alive
+    return params
+
+
+def read_index(path: str, mmap: bool = False):
+    """
+    Read an index from disk. With mmap=True the vector/code storage is
+    memory-mapped read-only instead of copied onto the heap, so processes
+    opening the same file share its pages. A mapped index must not be
+    modified: FAISS aborts the process on writes to mapped storage.
+    """
+    if not mmap:
+        return faiss.read_index(path)
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    if not flags:
+        logger.warning("This FAISS build cannot memory-map index storage; reading it into memory")
+        return faiss.read_index(path)
+    return faiss.read_index(path, flags | getattr(faiss, "IO_FLAG_READ_ONLY", 0))
+
+
+def write_index(index, path: str):
+    """
+    Write an index to disk under a temporary name and move it into place.
+    Other processes may have the old file memory-mapped (see read_index);
+    rewriting it in place would pull the pages out from under them.
+    """
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
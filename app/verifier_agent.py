@@ -12,6 +12,7 @@ from .utils.llm_provider import LLMProvider
 
 import re
 import logging
+import threading
 
 class VerifierAgent:
     def enforce_registry_check(self, registry, entry, registry_type="model"):
@@ -50,8 +51,8 @@ class VerifierAgent:
     def __init__(self, rag_vector_store=None):
         # Optionally inject a RAG vector store for direct KB validation
         try:
-            from .rag_system import VectorStore
-            self.vector_store = rag_vector_store or VectorStore()
+            from .rag_system import get_vector_store
+            self.vector_store = rag_vector_store or get_vector_store()
         except Exception:
             self.vector_store = None
         self.logger = logging.getLogger("VerifierAgent")
@@ -64,6 +65,30 @@ class VerifierAgent:
         claims = [s.strip() for s in sentences if len(s.strip()) > 10]
         return claims
 
+    def _search_claims(self, claims: list) -> dict:
+        """
+        Look up claims in the knowledge base with one batched search.
+        Returns claim -> (doc_id, score) of its best match (k=1, min_score=0.7),
+        for the claims that have one.
+        """
+        if not claims or not self.vector_store:
+            return {}
+        unique = list(dict.fromkeys(claims))
+        try:
+            if hasattr(self.vector_store, "search_documents_many"):
+                # Only the best match's document id and score are needed: no results or excerpts
+                found = self.vector_store.search_documents_many(unique, k=1, min_score=0.7)
+                return {claim: (hits[0][0].id, hits[0][1]) for claim, hits in zip(unique, found) if hits}
+            # Sharded stores have no ids-based search (ids are per shard); search_many is their batched path
+            if hasattr(self.vector_store, "search_many"):
+                found = self.vector_store.search_many(unique, k=1, min_score=0.7)
+            else:
+                found = [self.vector_store.search(claim, k=1, min_score=0.7) for claim in unique]
+            return {claim: (results[0].document.id, results[0].score) for claim, results in zip(unique, found) if results}
+        except Exception as e:
+            self.logger.error(f"RAG search failed: {e}")
+            return {}
+
     def verify_output(self, ai_output_content: str, sources_used: list, llm_backend: str = None, response_schema: dict = None, sop_policy: dict = None) -> dict:
         """
         Multi-step verification:
@@ -109,24 +134,20 @@ class VerifierAgent:
             }
         claims = self.extract_claims(ai_output_content)
         unsupported_claims = []
-        for claim in claims:
-            supported = False
-            # Direct match in sources
-            for src in sources_used:
-                if claim in src:
-                    supported = True
-                    audit_log.append({"claim": claim, "method": "direct_match", "result": True})
-                    break
-            # RAG/KB search if not direct match
-            if not supported and self.vector_store:
-                try:
-                    results = self.vector_store.search(claim, k=1, min_score=0.7)
-                    if results:
-                        supported = True
-                        audit_log.append({"claim": claim, "method": "rag_search", "result": True, "doc_id": results[0].document.id, "score": results[0].score})
-                except Exception as e:
-                    self.logger.error(f"RAG search failed: {e}")
-            if not supported:
+        # Direct match in sources
+        direct = [any(claim in src for src in sources_used) for claim in claims]
+        # RAG/KB search for the remaining claims, batched into one query
+        pending = [claim for claim, matched in zip(claims, direct) if not matched]
+        rag_results = self._search_claims(pending)
+        for claim, matched in zip(claims, direct):
+            if matched:
+                audit_log.append({"claim": claim, "method": "direct_match", "result": True})
+                continue
+            match = rag_results.get(claim)
+            if match:
+                doc_id, score = match
+                audit_log.append({"claim": claim, "method": "rag_search", "result": True, "doc_id": doc_id, "score": score})
+            else:
                 unsupported_claims.append(claim)
                 audit_log.append({"claim": claim, "method": "none", "result": False})
         # If any unsupported, use LLM for nuanced check
@@ -182,3 +203,17 @@ class VerifierAgent:
             "unsupported_claims": unsupported_claims,
             "audit_log": audit_log
         }
+
+
+_shared_verifier = None
+_shared_verifier_lock = threading.Lock()
+
+
+def get_verifier_agent() -> VerifierAgent:
+    """Process-wide VerifierAgent (backed by the shared vector store), created on first use."""
+    global _shared_verifier
+    if _shared_verifier is None:
+        with _shared_verifier_lock:
+            if _shared_verifier is None:
+                _shared_verifier = VerifierAgent()
+    return _shared_verifier
@@ -0,0 +1,93 @@
+"""
+_synthetic.py - Shared helpers for the RAG benchmarks (SOP-RAG-001)
+
+Provides a synthetic corpus generator and an offline hashing encoder that can
+stand in for SentenceTransformer when the real model cannot be downloaded
+(--encoder hash), plus a word-overlap stand-in for the re-ranking
+CrossEncoder (--cross-encoder overlap). The stand-ins measure pipeline
+overhead only; use the real models for end-to-end numbers.
+"""
+
+import hashlib
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+WORDS = (
+    "governance audit immutable ledger policy sop compliance verifier agent "
+    "retrieval vector index corpus embedding approval human loop risk tier "
+    "integrity breach escalation source citation evidence trusted knowledge "
+    "workflow executor maintenance review reflection protocol architecture"
+).split()
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words encoder with the SentenceTransformer interface."""
+
+    def __init__(self, model_name=None, dim=384, **kwargs):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", text.lower()):
+                digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+                out[row, int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        return out
+
+
+def install_encoder(kind):
+    """Patch app.rag_system to use the requested encoder ('model' or 'hash')."""
+    from app import rag_system
+    if kind == "hash":
+        rag_system.SentenceTransformer = HashingEncoder
+    return rag_system
+
+
+class OverlapCrossEncoder:
+    """Scores a (query, passage) pair by the share of query words in the passage, taking pair_ms per pair."""
+
+    pair_ms = 0.0
+
+    def __init__(self, model_name=None, **kwargs):
+        pass
+
+    def predict(self, pairs, batch_size=32, **kwargs):
+        time.sleep(self.pair_ms * len(pairs) / 1000)
+        scores = []
+        for query, passage in pairs:
+            words = set(re.findall(r"\w+", query.lower()))
+            scores.append(len(words & set(re.findall(r"\w+", passage.lower()))) / max(len(words), 1))
+        return np.array(scores, dtype="float32")
+
+
+def install_cross_encoder(kind, pair_ms=0.0):
+    """Patch app.reranker to use the requested cross-encoder ('model' or 'overlap')."""
+    from app import reranker
+    if kind == "overlap":
+        OverlapCrossEncoder.pair_ms = pair_ms
+        reranker.CrossEncoder = OverlapCrossEncoder
+    return reranker
+
+
+def write_corpus(root, files, sentences_per_file, seed=7):
+    """Write a synthetic markdown corpus and return the number of files."""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    for i in range(files):
+        sentences = []
+        for _ in range(sentences_per_file):
+            words = rng.choices(WORDS, k=rng.randint(8, 20))
+            sentences.append(" ".join(words).capitalize() + ".")
+        with open(os.path.join(root, f"doc_{i:05d}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Document {i}\n\n" + " ".join(sentences))
+    return files
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+bench_cgo_rules.py - Rule lookup benchmark for CGOAgent (SOP-GOV-001)
+
+Generates a synthetic rules file (10k rules by default, a slice of them
+wildcard patterns) and compares the precompiled RuleIndex against the former
+linear scan over rules_data["rules"].
+
+Usage: python benchmarks/bench_cgo_rules.py [--rules 10000] [--lookups 20000]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.cgo_agent import CGOAgent, DecisionCache  # noqa: E402
+
+
+def generate_rules(count: int, pattern_ratio: float = 0.05) -> dict:
+    rules = []
+    for i in range(count):
+        name = f"ACTION_{i:06d}"
+        if random.random() < pattern_ratio:
+            name = f"PATTERN_{i:06d}_*"
+        rules.append({
+            "action_name": name,
+            "risk_tier": random.choice(["MINIMAL", "LOW", "MEDIUM", "HIGH"]),
+            "requires_human_approval": False,
+            "required_metadata": ["reason"],
+            "validation_rules": {"max_data_size_mb": 100},
+        })
+    return {"SOP_AS_LAW": True, "rules": rules}
+
+
+def linear_scan(rules, action_name):
+    for rule in rules:
+        if rule["action_name"].upper() == action_name.upper():
+            return rule
+    return None
+
+
+def timed(fn, names):
+    start = time.perf_counter()
+    for name in names:
+        fn(name)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(names) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Keep production INFO logging cost, but write it to /dev/null
+    devnull = open(os.devnull, "w")
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.StreamHandler(devnull))
+    logging.getLogger("notrekt").setLevel(logging.INFO)
+    random.seed(42)
+    rules_data = generate_rules(args.rules)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rules_path = os.path.join(tmp, "rules.json")
+        with open(rules_path, "w") as f:
+            json.dump(rules_data, f)
+
+        start = time.perf_counter()
+        agent = CGOAgent(rules_path=rules_path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+    names = [f"action_{random.randrange(args.rules):06d}" for _ in range(args.lookups)]
+    misses = [f"UNKNOWN_{i}" for i in range(args.lookups)]
+    patterned = [f"pattern_{r['action_name'][8:14]}_sub" for r in agent.rules_data["rules"]
+                 if r["action_name"].endswith("*")] or ["PATTERN_X"]
+    patterned = (patterned * (args.lookups // len(patterned) + 1))[:args.lookups]
+
+    print(f"rules={args.rules} patterns={agent._rule_index.pattern_count} load+compile={load_ms:.1f}ms")
+    print(f"{'workload':<12}{'index us/op':>14}{'scan us/op':>14}")
+    for label, workload in (("exact", names), ("miss", misses), ("pattern", patterned)):
+        indexed = timed(agent._find_matching_rule, workload)
+        scan = timed(lambda n: linear_scan(agent.rules_data["rules"], n), workload[:200])
+        print(f"{label:<12}{indexed:>14.2f}{scan:>14.2f}")
+
+    validate = timed(lambda n: agent.validate_action(n, {"reason": "bench"}), names)
+    print(f"validate_action (exact hit): {validate:.2f} us/op")
+
+    agent.decision_cache = DecisionCache(ttl_seconds=300)
+    repeated = names[:100] * (len(names) // 100)
+    cached = timed(lambda n: agent.validate_action(n, {"reason": "bench"}), repeated)
+    print(f"validate_action (decision cache, 100 distinct): {cached:.2f} us/op "
+          f"hit_rate={agent.decision_cache.stats()['hit_rate']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+bench_document_store.py - Document persistence: pickle vs columnar/mmap (SOP-RAG-001)
+
+Persists a synthetic set of chunk Documents both as the former documents.pkl
+and as the columnar DocumentStore, then reports on-disk size, time to load /
+open, and time to resolve the documents of a typical search (k ids).
+
+Usage: python benchmarks/bench_document_store.py [--chunks 200000] [--k 5]
+"""
+
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+
+import _synthetic  # noqa: F401 - puts the repo root on sys.path
+from _synthetic import WORDS
+from app.document_store import DocumentStore, TEXT_FILE, INDEX_FILE, META_FILE
+from app.rag_system import Document
+
+
+def synthetic_documents(chunks, chunks_per_file=20, seed=7):
+    rng = random.Random(seed)
+    documents = []
+    for vector_id in range(chunks):
+        file_no, chunk = divmod(vector_id, chunks_per_file)
+        source = f"/corpus/doc_{file_no:06d}.md"
+        documents.append(Document(
+            id=f"{file_no:016x}_{chunk}", title=f"doc_{file_no:06d}_chunk{chunk}",
+            content=" ".join(rng.choices(WORDS, k=80)), source_path=source,
+            metadata={"file_type": ".md", "size_bytes": 40000, "last_modified": 1.7e9},
+            hash=f"{file_no:064x}", indexed_at="2024-01-01T00:00:00+00:00", vector_id=vector_id,
+        ))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = synthetic_documents(args.chunks)
+    lookups = [random.Random(1).sample(range(args.chunks), args.k) for _ in range(1000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = os.path.join(tmp, "documents.pkl")
+        with open(pickle_path, "wb") as f:
+            pickle.dump(documents, f)
+        DocumentStore(documents).save(tmp, Document)
+        del documents
+
+        start = time.perf_counter()
+        with open(pickle_path, "rb") as f:
+            loaded = DocumentStore(pickle.load(f))
+        pickle_load = time.perf_counter() - start
+        start = time.perf_counter()
+        for ids in lookups:
+            [loaded.get(i) for i in ids]
+        pickle_lookup = (time.perf_counter() - start) * 1e6 / len(lookups)
+        del loaded
+
+        start = time.perf_counter()
+        opened = DocumentStore.open(tmp, Document)
+        columnar_open = time.perf_counter() - start
+        start = time.perf_counter()
+        for ids in lookups:
+            [opened.get(i) for i in ids]
+        columnar_lookup = (time.perf_counter() - start) * 1e6 / len(lookups)
+
+        columnar_size = sum(os.path.getsize(os.path.join(tmp, name)) for name in (TEXT_FILE, INDEX_FILE, META_FILE))
+        print(f"chunks={args.chunks} k={args.k}")
+        print(f"{'format':>9}{'MB':>9}{'load s':>10}{'us/search':>11}")
+        print(f"{'pickle':>9}{os.path.getsize(pickle_path) / 1e6:>9.1f}{pickle_load:>10.3f}{pickle_lookup:>11.1f}")
+        print(f"{'columnar':>9}{columnar_size / 1e6:>9.1f}{columnar_open:>10.3f}{columnar_lookup:>11.1f}")
+        opened.close()
+
+
+if __name__ == "__main__":
+    main()
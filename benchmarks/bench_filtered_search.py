@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+bench_filtered_search.py - Cost of metadata-filtered VectorStore search (SOP-RAG-001)
+
+Indexes a synthetic corpus split over several directories and compares
+unfiltered search, search with a path-prefix filter (ID selector inside
+FAISS), and the over-fetch-and-discard approach callers used before
+filters existed. Reports ms/query and how many of the k results each
+approach returned.
+
+Usage: python benchmarks/bench_filtered_search.py [--parts 10] [--files 100] [--queries 50] [--encoder model|hash]
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+
+from _synthetic import WORDS, install_encoder, write_corpus
+
+
+def timed(label, run, queries, k):
+    start = time.perf_counter()
+    returned = sum(len(results) for results in run())
+    elapsed = time.perf_counter() - start
+    print(f"{label:>22}{elapsed * 1000 / len(queries):>10.3f}{returned / len(queries):>10.2f}/{k}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--parts", type=int, default=10)
+    parser.add_argument("--files", type=int, default=100, help="files per part")
+    parser.add_argument("--sentences", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--encoder", choices=["model", "hash"], default="model")
+    args = parser.parse_args()
+
+    logging.getLogger("notrekt").setLevel(logging.WARNING)
+    rag_system = install_encoder(args.encoder)
+    rag_system.Config.VECTOR_INDEX_MIN_VECTORS = 1
+    rng = random.Random(5)
+    queries = [" ".join(rng.choices(WORDS, k=12)) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for part in range(args.parts):
+            write_corpus(f"{tmp}/corpus/part{part:02d}", args.files, args.sentences, seed=part)
+        store = rag_system.VectorStore(corpus_path=f"{tmp}/corpus", vector_db_path=f"{tmp}/db",
+                                       index_type=args.index_type)
+        prefix = f"{tmp}/corpus/part00/"
+        filters = {"path_prefix": "part00/"}
+        store.search_many(queries[:1], k=args.k, filters=filters)  # builds the clause bitmap
+        print(f"chunks={len(store.documents)} selected=1/{args.parts} parts k={args.k} "
+              f"index={args.index_type} encoder={args.encoder}")
+        print(f"{'mode':>22}{'ms/query':>10}{'results':>12}")
+        timed("unfiltered", lambda: store.search_many(queries, k=args.k, min_score=-1.0), queries, args.k)
+        timed("filtered (selector)", lambda: store.search_many(queries, k=args.k, min_score=-1.0,
+                                                               filters=filters), queries, args.k)
+        for factor in (10, 100):
+            def post_filter(factor=factor):
+                batches = store.search_many(queries, k=args.k * factor, min_score=-1.0)
+                return [[r for r in results if r.document.source_path.startswith(prefix)][:args.k]
+                        for results in batches]
+            timed(f"over-fetch x{factor}", post_filter, queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
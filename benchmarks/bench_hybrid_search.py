@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+bench_hybrid_search.py - Dense vs lexical vs hybrid retrieval on SOP-ID queries (SOP-RAG-001)
+
+Indexes the SOP documents and asks questions that name an SOP by its id
+(e.g. "What does SOP-GOV-001 require?"). A query is a hit when one of the
+top k results comes from the file of that SOP. Reports hit rate and
+per-query latency for each search mode. The query embedding cache is
+disabled so every dense/hybrid query pays for its encode.
+
+Usage: python benchmarks/bench_hybrid_search.py [--corpus SOPs] [--k 3] [--repeat 5] [--encoder model|hash]
+"""
+
+import argparse
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from _synthetic import install_encoder
+
+SOP_ID = re.compile(r"SOP-[A-Z]+-\d+")
+TEMPLATES = ("{id}", "What does {id} require?", "Summarize the escalation rules in {id}")
+
+
+def main():
+    repo = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", default=str(repo / "SOPs"))
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--encoder", choices=["model", "hash"], default="model")
+    args = parser.parse_args()
+
+    logging.getLogger("notrekt").setLevel(logging.WARNING)
+    rag_system = install_encoder(args.encoder)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Path(tmp) / "corpus"
+        corpus.mkdir()
+        sop_ids = []
+        for path in sorted(Path(args.corpus).glob("*.md")):
+            shutil.copy(path, corpus / path.name)
+            match = SOP_ID.match(path.name)
+            if match:
+                sop_ids.append(match.group())
+        queries = [(sop_id, template.format(id=sop_id)) for sop_id in sop_ids for template in TEMPLATES]
+
+        store = rag_system.VectorStore(corpus_path=str(corpus), vector_db_path=f"{tmp}/db")
+        store.query_cache = None
+        print(f"files={len(list(corpus.iterdir()))} chunks={len(store.documents)} "
+              f"queries={len(queries)} k={args.k} encoder={args.encoder}")
+        print(f"{'mode':>8}{'hit rate':>10}{'ms/query':>10}")
+        for mode in ("dense", "lexical", "hybrid"):
+            hits = 0
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for sop_id, query in queries:
+                    results = store.search(query, k=args.k, min_score=0.0, mode=mode)
+                    hits += any(os.path.basename(r.document.source_path).startswith(sop_id) for r in results)
+            elapsed = time.perf_counter() - start
+            total = len(queries) * args.repeat
+            print(f"{mode:>8}{hits / total:>10.2f}{elapsed * 1000 / total:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+bench_rag_indexing.py - Corpus rebuild throughput for VectorStore (SOP-RAG-001)
+
+Builds a synthetic corpus and reports chunks/sec for a full _rebuild_index at
+several embedding batch sizes (batch size 1 reproduces the former
+one-forward-pass-per-chunk behaviour).
+
+Usage: python benchmarks/bench_rag_indexing.py [--files 200] [--encoder model|hash]
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+
+from _synthetic import install_encoder, write_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--sentences", type=int, default=40)
+    parser.add_argument("--batch-sizes", default="1,16,64,256")
+    parser.add_argument("--encoder", choices=["model", "hash"], default="model")
+    args = parser.parse_args()
+
+    logging.getLogger("notrekt").setLevel(logging.WARNING)
+    rag_system = install_encoder(args.encoder)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = f"{tmp}/corpus"
+        write_corpus(corpus, args.files, args.sentences)
+        print(f"files={args.files} encoder={args.encoder}")
+        print(f"{'batch':>6}{'chunks':>9}{'seconds':>10}{'chunks/s':>11}")
+        for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+            store = rag_system.VectorStore(corpus_path=corpus, vector_db_path=f"{tmp}/db_{batch_size}",
+                                           embedding_batch_size=batch_size)
+            start = time.perf_counter()
+            store._rebuild_index()
+            elapsed = time.perf_counter() - start
+            chunks = len(store.documents)
+            print(f"{batch_size:>6}{chunks:>9}{elapsed:>10.2f}{chunks / elapsed:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
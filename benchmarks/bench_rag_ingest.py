@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+bench_rag_ingest.py - Parallel corpus ingestion throughput (SOP-RAG-001)
+
+Ingests a synthetic corpus into an empty VectorStore through IngestPipeline
+with different numbers of prepare (hash/extract/chunk) worker processes and
+reports files/sec, chunks/sec and where the time went per stage.
+
+Usage: python benchmarks/bench_rag_ingest.py [--files 1000] [--workers 1,2,4] [--encoder model|hash]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+
+from _synthetic import install_encoder, write_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--sentences", type=int, default=40)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--encoder", choices=["model", "hash"], default="model")
+    args = parser.parse_args()
+
+    logging.getLogger("notrekt").setLevel(logging.WARNING)
+    rag_system = install_encoder(args.encoder)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = f"{tmp}/source"
+        write_corpus(source, args.files, args.sentences)
+        print(f"files={args.files} encoder={args.encoder} cpus={os.cpu_count()}")
+        print(f"{'workers':>8}{'chunks':>9}{'seconds':>10}{'files/s':>10}{'chunks/s':>11}"
+              f"{'prepare':>10}{'embed':>8}{'write':>8}")
+        for workers in (int(w) for w in args.workers.split(",")):
+            corpus = f"{tmp}/corpus_{workers}"
+            os.makedirs(corpus)
+            store = rag_system.VectorStore(corpus_path=corpus, vector_db_path=f"{tmp}/db_{workers}")
+            shutil.copytree(source, corpus, dirs_exist_ok=True)
+            m = store.sync_corpus(save=False, workers=workers).metrics
+            print(f"{workers:>8}{m.chunks_written:>9}{m.elapsed_seconds:>10.2f}{m.files_per_second:>10.1f}"
+                  f"{m.chunks_per_second:>11.1f}{m.prepare_seconds:>10.2f}{m.embed_seconds:>8.2f}"
+                  f"{m.write_seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+bench_rag_search.py - Query throughput for VectorStore search (SOP-RAG-001)
+
+Indexes a synthetic corpus and compares answering a set of claim-sized
+queries one search() call at a time against a single search_many() call,
+a search_many() call whose excerpts are all read, and a single
+search_ids_many() call (ids and scores only).
+
+Usage: python benchmarks/bench_rag_search.py [--files 200] [--queries 50] [--encoder model|hash]
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+
+from _synthetic import WORDS, install_encoder, write_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--sentences", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--encoder", choices=["model", "hash"], default="model")
+    args = parser.parse_args()
+
+    logging.getLogger("notrekt").setLevel(logging.WARNING)
+    rag_system = install_encoder(args.encoder)
+    rng = random.Random(3)
+    queries = [" ".join(rng.choices(WORDS, k=12)) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_corpus(f"{tmp}/corpus", args.files, args.sentences)
+        store = rag_system.VectorStore(corpus_path=f"{tmp}/corpus", vector_db_path=f"{tmp}/db")
+        print(f"chunks={len(store.documents)} queries={args.queries} k={args.k} encoder={args.encoder}")
+        print(f"{'mode':>12}{'seconds':>10}{'ms/query':>10}")
+        start = time.perf_counter()
+        for query in queries:
+            store.search(query, k=args.k, min_score=0.0)
+        elapsed = time.perf_counter() - start
+        print(f"{'search':>12}{elapsed:>10.3f}{elapsed * 1000 / args.queries:>10.3f}")
+        start = time.perf_counter()
+        store.search_many(queries, k=args.k, min_score=0.0)
+        elapsed = time.perf_counter() - start
+        print(f"{'search_many':>12}{elapsed:>10.3f}{elapsed * 1000 / args.queries:>10.3f}")
+        start = time.perf_counter()
+        for results in store.search_many(queries, k=args.k, min_score=0.0):
+            for result in results:
+                result.excerpt
+        elapsed = time.perf_counter() - start
+        print(f"{'+excerpts':>12}{elapsed:>10.3f}{elapsed * 1000 / args.queries:>10.3f}")
+        start = time.perf_counter()
+        store.search_ids_many(queries, k=args.k, min_score=0.0)
+        elapsed = time.perf_counter() - start
+        print(f"{'ids only':>12}{elapsed:>10.3f}{elapsed * 1000 / args.queries:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+bench_rerank.py - Dense ranking vs cross-encoder re-ranking on SOP queries (SOP-RAG-001)
+
+Indexes the SOP documents and asks one question per SOP built from its title
+(e.g. "the maintenance agent protocol") plus one naming its id. The target of
+a query is the file of that SOP. Each query takes the top --candidates dense
+results, then, for the re-ranking rows, re-ranks them with the cross-encoder
+under each --budgets latency budget (0 = no limit). Reports hit rate in the
+top k, MRR over the candidates, end-to-end latency percentiles and how often
+the budget forced a fall back to the dense ranking.
+
+Usage: python benchmarks/bench_rerank.py [--corpus SOPs] [--k 3] [--candidates 20] [--budgets 0,150,50]
+       [--encoder model|hash] [--cross-encoder model|overlap] [--pair-ms 0.5]
+"""
+
+import argparse
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from _synthetic import install_cross_encoder, install_encoder
+
+SOP_FILE = re.compile(r"(SOP-[A-Z]+-\d+)_\s*(.+)\.md")
+
+
+def reciprocal_rank(results, sop_id):
+    for rank, result in enumerate(results, 1):
+        if os.path.basename(result.document.source_path).startswith(sop_id):
+            return 1.0 / rank
+    return 0.0
+
+
+def main():
+    repo = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", default=str(repo / "SOPs"))
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--budgets", default="0,150,50", help="comma-separated budgets in ms")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--encoder", choices=["model", "hash"], default="model")
+    parser.add_argument("--cross-encoder", choices=["model", "overlap"], default="model")
+    parser.add_argument("--pair-ms", type=float, default=0.5, help="simulated cost per pair for --cross-encoder overlap")
+    args = parser.parse_args()
+
+    logging.getLogger("notrekt").setLevel(logging.WARNING)
+    rag_system = install_encoder(args.encoder)
+    reranker = install_cross_encoder(args.cross_encoder, args.pair_ms)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Path(tmp) / "corpus"
+        corpus.mkdir()
+        queries = []
+        for path in sorted(Path(args.corpus).glob("*.md")):
+            shutil.copy(path, corpus / path.name)
+            match = SOP_FILE.match(path.name)
+            if match:
+                sop_id, title = match.groups()
+                queries += [(sop_id, re.sub(r"[^\w\s]", " ", title).lower()), (sop_id, f"What does {sop_id} require?")]
+
+        store = rag_system.VectorStore(corpus_path=str(corpus), vector_db_path=f"{tmp}/db")
+        print(f"files={len(list(corpus.iterdir()))} chunks={len(store.documents)} queries={len(queries)} "
+              f"k={args.k} candidates={args.candidates} encoder={args.encoder} cross-encoder={args.cross_encoder}")
+        print(f"{'ranking':>16}{'hit rate':>10}{'MRR':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'fallback':>10}")
+
+        rows = [("dense", None)]
+        for budget in (float(b) for b in args.budgets.split(",")):
+            ranker = reranker.CrossEncoderReranker(candidates=args.candidates, batch_size=args.batch_size,
+                                                   budget_ms=budget)
+            ranker.warm_up()
+            rows.append((f"rerank {budget:g}ms" if budget > 0 else "rerank no limit", ranker))
+
+        for name, ranker in rows:
+            store.search(queries[0][1], k=args.candidates, min_score=-1.0)
+            hits, ranks, latencies, fallbacks = 0, [], [], 0
+            for _ in range(args.repeat):
+                for sop_id, query in queries:
+                    start = time.perf_counter()
+                    results = store.search(query, k=args.candidates, min_score=-1.0)
+                    if ranker is not None:
+                        outcome = ranker.rerank(query, results)
+                        results, fallbacks = outcome.results, fallbacks + (not outcome.reranked)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    rank = reciprocal_rank(results, sop_id)
+                    hits += rank >= 1.0 / args.k
+                    ranks.append(rank)
+            total = len(latencies)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            print(f"{name:>16}{hits / total:>10.2f}{sum(ranks) / total:>8.3f}"
+                  f"{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}{fallbacks / total:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+bench_sharded_search.py - Single vs sharded VectorStore search throughput (SOP-RAG-001)
+
+Indexes a synthetic corpus once unsharded and once split into --shards
+shards searched on threads, then times the same search_many() batches
+against both. Query embeddings are cached after the first pass, so the
+timings are dominated by index search and result merging. Use a flat index
+on a large corpus (--files) to see the shards search in parallel.
+
+Usage: python benchmarks/bench_sharded_search.py [--files 2000] [--shards 4] [--queries 64] [--encoder model|hash]
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+
+from _synthetic import WORDS, install_encoder, write_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--sentences", type=int, default=40)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--encoder", choices=["model", "hash"], default="model")
+    args = parser.parse_args()
+
+    logging.getLogger("notrekt").setLevel(logging.WARNING)
+    rag_system = install_encoder(args.encoder)
+    from app.sharded_store import ShardedVectorStore
+    rng = random.Random(5)
+    queries = [" ".join(rng.choices(WORDS, k=12)) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_corpus(f"{tmp}/corpus", args.files, args.sentences)
+        single = rag_system.VectorStore(corpus_path=f"{tmp}/corpus", vector_db_path=f"{tmp}/single")
+        sharded = ShardedVectorStore(corpus_path=f"{tmp}/corpus", vector_db_path=f"{tmp}/sharded",
+                                     shards=args.shards, processes=0)
+        print(f"chunks={len(single.documents)} shards={args.shards} queries={args.queries} k={args.k}")
+        print(f"{'store':>10}{'seconds':>10}{'ms/query':>10}")
+        for name, store in (("single", single), ("sharded", sharded)):
+            store.search_many(queries, k=args.k, min_score=0.0)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                store.search_many(queries, k=args.k, min_score=0.0)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10}{elapsed:>10.3f}{elapsed * 1000 / (args.queries * args.repeat):>10.3f}")
+        sharded.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+bench_vector_index.py - Recall vs latency of FAISS index types (SOP-RAG-001)
+
+Builds flat, IVF-Flat, IVF-PQ and HNSW indexes over synthetic clustered
+unit vectors (a stand-in for chunk embeddings) and reports build time,
+single-query latency and recall@k against the exact flat index for a sweep
+of nprobe / efSearch values.
+
+Usage: python benchmarks/bench_vector_index.py [--vectors 200000] [--dim 384] [--queries 500]
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+import _synthetic  # noqa: F401 - puts the repo root on sys.path
+from app import vector_index
+
+
+def clustered_vectors(n, dim, clusters, rng):
+    centers = rng.normal(size=(clusters, dim)).astype("float32")
+    vectors = centers[rng.integers(clusters, size=n)] + 0.5 * rng.normal(size=(n, dim)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def measure(index, queries, truth, k):
+    start = time.perf_counter()
+    found = np.vstack([index.search(q[None, :], k)[1] for q in queries])
+    latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    recall = np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)])
+    return latency_ms, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.getLogger("notrekt").setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(args.vectors, args.dim, args.clusters, rng)
+    queries = clustered_vectors(args.queries, args.dim, args.clusters, np.random.default_rng(0))
+    ids = np.arange(args.vectors, dtype="int64")
+
+    print(f"vectors={args.vectors} dim={args.dim} queries={args.queries} k={args.k}")
+    print(f"{'index':>9}{'param':>14}{'build s':>9}{'ms/query':>10}{'recall':>8}")
+    start = time.perf_counter()
+    flat = vector_index.build_index("flat", vectors, ids)
+    build = time.perf_counter() - start
+    _, truth = flat.search(queries, args.k)
+    latency, recall = measure(flat, queries, truth, args.k)
+    print(f"{'flat':>9}{'-':>14}{build:>9.2f}{latency:>10.3f}{recall:>8.3f}")
+
+    sweeps = [
+        ("ivf_flat", "nprobe", [1, 4, 16, 64]),
+        ("ivf_pq", "nprobe", [1, 4, 16, 64]),
+        ("hnsw", "ef_search", [16, 32, 64, 128, 256]),
+    ]
+    for index_type, knob, values in sweeps:
+        start = time.perf_counter()
+        index = vector_index.build_index(index_type, vectors, ids)
+        build = time.perf_counter() - start
+        for value in values:
+            vector_index.configure_search(index, **{knob: value})
+            latency, recall = measure(index, queries, truth, args.k)
+            print(f"{index_type:>9}{f'{knob}={value}':>14}{build:>9.2f}{latency:>10.3f}{recall:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
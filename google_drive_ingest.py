@@ -10,6 +10,8 @@ Usage:
 3. Run: python google_drive_ingest.py
 
 This script will download all files from the specified Google Drive folder into your local corpus directory, skipping files that are unchanged.
+Only files the indexer has an extractor for are downloaded (see app/extractors.py); native Google Docs and
+Slides are exported as .docx and .pdf.
 """
 
 import os
@@ -21,6 +23,7 @@ import io
 import logging
 from datetime import datetime, timezone
 from dotenv import load_dotenv
+from app.extractors import get_extractor
 
 # --- Load .env if present ---
 load_dotenv()
@@ -31,6 +34,11 @@ SERVICE_ACCOUNT_FILE = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE', 'service_account
 DRIVE_FOLDER_ID = os.getenv('GOOGLE_DRIVE_FOLDER_ID', 'your-folder-id')
 LOCAL_CORPUS_DIR = os.getenv('LOCAL_CORPUS_DIR', 'trusted_knowledge_corpus')
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+# Native Google formats have no binary content; export them to formats the indexer can extract
+GOOGLE_EXPORTS = {
+    'application/vnd.google-apps.document': ('application/vnd.openxmlformats-officedocument.wordprocessingml.document', '.docx'),
+    'application/vnd.google-apps.presentation': ('application/pdf', '.pdf'),
+}
 
 # --- Logging ---
 logging.basicConfig(
@@ -73,8 +81,11 @@ def list_files_in_folder(folder_id):
             break
     return files
 
-def download_file(file_id, file_name, dest_dir):
-    request = drive_service.files().get_media(fileId=file_id)
+def download_file(file_id, file_name, dest_dir, export_mime_type=None):
+    if export_mime_type:
+        request = drive_service.files().export_media(fileId=file_id, mimeType=export_mime_type)
+    else:
+        request = drive_service.files().get_media(fileId=file_id)
     fh = io.BytesIO()
     downloader = MediaIoBaseDownload(fh, request)
     done = False
@@ -105,16 +116,23 @@ def sync_drive_folder(folder_id, dest_dir):
     files = list_files_in_folder(folder_id)
     logger.info(f"Found {len(files)} files in Google Drive folder.")
     for file in files:
-        local_path = Path(dest_dir) / file['name']
+        export_mime_type, name = None, file['name']
+        if file['mimeType'] in GOOGLE_EXPORTS:
+            export_mime_type, suffix = GOOGLE_EXPORTS[file['mimeType']]
+            name += suffix
+        if get_extractor(Path(name)) is None:
+            logger.info(f"Skipping (no extractor for this file type): {file['name']}")
+            continue
+        local_path = Path(dest_dir) / name
         gdrive_mtime = parse_gdrive_time(file['modifiedTime'])
         # Download if not present or remote is newer
         if not local_path.exists() or (
             gdrive_mtime > datetime.fromtimestamp(local_path.stat().st_mtime, tz=timezone.utc)
         ):
-            logger.info(f"Syncing: {file['name']}")
-            download_file(file['id'], file['name'], dest_dir)
+            logger.info(f"Syncing: {name}")
+            download_file(file['id'], name, dest_dir, export_mime_type)
         else:
-            logger.info(f"Up-to-date: {file['name']}")
+            logger.info(f"Up-to-date: {name}")
 
 if __name__ == "__main__":
     logger.info("Starting Google Drive → local sync...")
@@ -29,6 +29,9 @@ if [ -f "google_drive_oauth_ingest.py" ]; then
   python google_drive_oauth_ingest.py
 fi
 
+# 4b. Incrementally sync the vector index with the corpus (only new/changed files are embedded)
+python -m app.rag_system
+
 # 5. (Optional) Airbyte via Docker Compose
 # docker compose up -d
 
@@ -0,0 +1,316 @@
+"""
+test_cgo_agent.py - CGOAgent rule resolution and validation tests
+SOP-GOV-001
+"""
+import json
+
+import pytest
+
+from app.cgo_agent import CGOAgent, compile_validation_plan
+from app.rule_index import RuleIndex
+
+
+RULES = {
+    "SOP_AS_LAW": True,
+    "rules": [
+        {"action_name": "RESEARCH", "risk_tier": "LOW", "required_metadata": ["source"],
+         "trusted_sources": ["arxiv", "sop_registry"]},
+        {"action_name": "WRITE_CODE", "risk_tier": "MEDIUM", "requires_human_approval": True,
+         "required_metadata": ["module_name"],
+         "validation_rules": {"allowed_file_types": [".py"], "max_data_size_mb": 10}},
+        {"action_name": "SYSTEM_ADMIN", "risk_tier": "CRITICAL", "blocked": True},
+        {"action_name": "DATA_*", "risk_tier": "MEDIUM"},
+        {"action_name": "DATA_EXPORT_*", "risk_tier": "HIGH", "requires_human_approval": True},
+        {"action_name": "DATA_EXPORT_SAFE", "risk_tier": "LOW"},
+    ],
+}
+
+
+@pytest.fixture
+def rules_path(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(RULES))
+    return str(path)
+
+
+@pytest.fixture
+def agent(rules_path):
+    return CGOAgent(rules_path=rules_path)
+
+
+def test_rule_index_exact_lookup_is_case_insensitive():
+    index = RuleIndex(RULES["rules"])
+    assert index.lookup("research")["action_name"] == "RESEARCH"
+    assert index.lookup("Write_Code")["risk_tier"] == "MEDIUM"
+    assert index.lookup("UNKNOWN") is None
+
+
+def test_rule_index_prefers_exact_then_longest_prefix():
+    index = RuleIndex(RULES["rules"])
+    assert index.lookup("data_export_safe")["risk_tier"] == "LOW"
+    assert index.lookup("DATA_EXPORT_CSV")["risk_tier"] == "HIGH"
+    assert index.lookup("DATA_IMPORT")["risk_tier"] == "MEDIUM"
+    assert index.lookup("DAT") is None
+
+
+def test_rule_index_first_declaration_wins():
+    index = RuleIndex([
+        {"action_name": "DUP", "risk_tier": "LOW"},
+        {"action_name": "dup", "risk_tier": "HIGH"},
+    ])
+    assert index.lookup("DUP")["risk_tier"] == "LOW"
+    assert len(index) == 2
+
+
+def test_validate_action_uses_index(agent):
+    assert agent.validate_action("system_admin", {}).blocked
+    result = agent.validate_action("DATA_EXPORT_CSV", {})
+    assert result.risk_tier == "HIGH" and result.requires_approval
+    default = agent.validate_action("NOT_A_RULE", {})
+    assert default.sop_reference == "SOP-GOV-001-DEFAULT"
+
+
+def test_requirements_and_listing(agent):
+    reqs = agent.get_action_requirements("write_code")
+    assert reqs["action_name"] == "WRITE_CODE"
+    assert reqs["required_metadata"] == ["module_name"]
+    assert [a["action_name"] for a in agent.list_all_actions()] == [r["action_name"] for r in RULES["rules"]]
+
+
+def test_reload_rebuilds_index(agent, rules_path):
+    updated = {"SOP_AS_LAW": True, "rules": [{"action_name": "NEW_ACTION", "risk_tier": "HIGH"}]}
+    with open(rules_path, "w") as f:
+        json.dump(updated, f)
+    assert agent.reload_rules()
+    assert agent.get_action_requirements("new_action")["risk_tier"] == "HIGH"
+    assert agent.get_action_requirements("RESEARCH")["risk_tier"] == "MINIMAL"
+
+
+def test_compiled_plan_reports_errors_in_rule_order(agent):
+    result = agent.validate_action(
+        "WRITE_CODE", {"file_path": "payload.exe", "data_size_mb": 50}
+    )
+    assert not result.is_valid
+    assert result.missing_metadata == ["module_name"]
+    assert result.reasoning == (
+        "Validation failed: Missing required field: module_name; "
+        "File type '.exe' not allowed. Allowed types: ['.py']; "
+        "Data size 50MB exceeds maximum allowed size of 10MB"
+    )
+
+
+def test_trusted_sources_are_checked_by_membership(agent):
+    assert agent.validate_action("RESEARCH", {"source": "arxiv"}).is_valid
+    rejected = agent.validate_action("RESEARCH", {"source": "random_blog"})
+    assert "not in trusted sources list" in rejected.reasoning
+    unhashable = agent.validate_action("RESEARCH", {"source": ["arxiv"]})
+    assert not unhashable.is_valid
+
+
+def test_user_role_and_business_hours_checks(monkeypatch):
+    from app import cgo_agent
+
+    rule = {"action_name": "DEPLOY", "risk_tier": "HIGH",
+            "validation_rules": {"user_role_required": "admin", "business_hours_only": True}}
+    plan = cgo_agent.compile_validation_plan(rule)
+    assert len(plan.checks) == 2
+
+    class _Night:
+        @staticmethod
+        def now():
+            class _T:
+                hour = 23
+            return _T()
+
+    monkeypatch.setattr(cgo_agent, "datetime", _Night)
+    errors = []
+    for check in plan.checks:
+        check({}, {"role": "user"}, errors)
+    assert errors == [
+        "Action requires user role 'admin', but user has role 'user'",
+        "Action only allowed during business hours (9 AM - 5 PM)",
+    ]
+
+
+def test_reload_logs_version_to_worm_and_keeps_snapshot_on_error(rules_path):
+    from unittest.mock import Mock
+
+    worm = Mock()
+    agent = CGOAgent(rules_path=rules_path, worm_storage=worm)
+    original = agent.rules_version
+
+    with open(rules_path, "w") as f:
+        f.write('{"rules": [')  # half-written file
+    assert not agent.reload_rules()
+    assert agent.rules_version == original
+    worm.log_event.assert_not_called()
+
+    changed = dict(RULES, rules=RULES["rules"][:2])
+    with open(rules_path, "w") as f:
+        json.dump(changed, f)
+    assert agent.reload_rules()
+    assert agent.rules_version != original
+    metadata = worm.log_event.call_args.kwargs["metadata"]
+    assert worm.log_event.call_args.kwargs["action_name"] == "RULES_RELOAD"
+    assert metadata["rules_version"] == agent.rules_version
+    assert metadata["previous_version"] == original
+
+
+def test_slow_reload_of_older_file_does_not_replace_newer_rules(rules_path, monkeypatch):
+    import threading
+    from app import cgo_agent
+
+    agent = CGOAgent(rules_path=rules_path)
+    original = agent.rules_version
+    load_ruleset = cgo_agent.load_ruleset
+    parsed, release = threading.Event(), threading.Event()
+
+    def slow_first_load(path, force=False):
+        ruleset = load_ruleset(path, force=force)
+        if not parsed.is_set():
+            parsed.set()
+            release.wait(30)
+        return ruleset
+
+    monkeypatch.setattr(cgo_agent, "load_ruleset", slow_first_load)
+    slow = threading.Thread(target=agent.reload_rules)
+    slow.start()
+    try:
+        assert parsed.wait(30)
+        # The file changes and a second reload installs it while the first still holds the old rules
+        with open(rules_path, "w") as f:
+            json.dump(dict(RULES, rules=RULES["rules"][:2]), f)
+        assert agent.reload_rules()
+        newer = agent.rules_version
+        assert newer != original
+    finally:
+        release.set()
+        slow.join(30)
+    assert agent.rules_version == newer
+    assert len(agent.rules_data["rules"]) == 2
+
+
+def test_validations_see_consistent_snapshot_during_reloads(rules_path):
+    import threading
+
+    agent = CGOAgent(rules_path=rules_path)
+    blocked = dict(RULES, rules=[{"action_name": "RESEARCH", "risk_tier": "CRITICAL", "blocked": True}])
+    payloads = [json.dumps(RULES), json.dumps(blocked)]
+    stop = threading.Event()
+
+    def flip():
+        i = 0
+        while not stop.is_set():
+            with open(rules_path, "w") as f:
+                f.write(payloads[i % 2])
+            agent.reload_rules()
+            i += 1
+
+    writer = threading.Thread(target=flip)
+    writer.start()
+    try:
+        for _ in range(300):
+            result = agent.validate_action("RESEARCH", {"source": "arxiv"})
+            assert (result.blocked, result.risk_tier) in {(False, "LOW"), (True, "CRITICAL")}
+    finally:
+        stop.set()
+        writer.join()
+
+
+def test_rules_watcher_applies_file_changes(rules_path):
+    import time
+
+    agent = CGOAgent(rules_path=rules_path)
+    assert agent.start_rules_watcher(poll_interval=0.02)
+    assert not agent.start_rules_watcher(poll_interval=0.02)
+    try:
+        time.sleep(0.05)
+        with open(rules_path, "w") as f:
+            json.dump({"SOP_AS_LAW": True, "rules": [{"action_name": "WATCHED", "risk_tier": "HIGH"}]}, f)
+        deadline = time.time() + 5
+        while agent._find_matching_rule("WATCHED") is None and time.time() < deadline:
+            time.sleep(0.02)
+        assert agent.get_action_requirements("WATCHED")["risk_tier"] == "HIGH"
+    finally:
+        agent.stop_rules_watcher()
+
+
+def test_malformed_trusted_sources_are_skipped_not_fatal(tmp_path):
+    rules = {"SOP_AS_LAW": True, "rules": [
+        {"action_name": "RESEARCH", "risk_tier": "LOW", "trusted_sources": ["arxiv", {"name": "blog"}, ["x"]]},
+    ]}
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(rules))
+    agent = CGOAgent(rules_path=str(path))
+    assert agent.validate_action("RESEARCH", {"source": "arxiv"}).is_valid
+    assert not agent.validate_action("RESEARCH", {"source": "blog"}).is_valid
+
+    # A trusted_sources value that is not a list trusts no source at all
+    plan = compile_validation_plan({"action_name": "RESEARCH", "trusted_sources": {"name": "arxiv"}})
+    errors = []
+    for check in plan.checks:
+        check({"source": "arxiv"}, None, errors)
+    assert errors == ["Source 'arxiv' is not in trusted sources list"]
+
+
+def test_decision_cache_memoizes_and_keys_on_relevant_context(rules_path):
+    agent = CGOAgent(rules_path=rules_path, decision_cache_ttl=60)
+    first = agent.validate_action("RESEARCH", {"source": "random_blog"})
+    second = agent.validate_action("RESEARCH", {"source": "random_blog"})
+    assert first == second and first is not second
+    assert agent.decision_cache.stats()["hits"] == 1
+
+    # RESEARCH does not read the role, so a different user shares the entry
+    agent.validate_action("RESEARCH", {"source": "random_blog"}, {"role": "admin"})
+    assert agent.decision_cache.stats()["hits"] == 2
+    # Different metadata is a different decision
+    assert agent.validate_action("RESEARCH", {"source": "arxiv"}).is_valid
+
+
+def test_decision_cache_keeps_equal_values_of_different_types_apart(rules_path):
+    agent = CGOAgent(rules_path=rules_path, decision_cache_ttl=60)
+    for size in (11, 11.0, 11, 11.0):
+        result = agent.validate_action("WRITE_CODE", {"module_name": "m", "data_size_mb": size})
+        assert f"Data size {size}MB exceeds" in result.reasoning
+    # Nested values are keyed by their JSON rendering, which also tells 1, 1.0 and true apart
+    for flag in (1, True, 1.0):
+        agent.validate_action("RESEARCH", {"source": "arxiv", "tags": [flag]})
+    assert agent.decision_cache.stats()["hits"] == 2 and agent.decision_cache.stats()["entries"] == 5
+
+
+def test_decision_cache_skips_time_dependent_rules_and_expires(tmp_path, monkeypatch):
+    from app import cgo_agent
+
+    rules = {"SOP_AS_LAW": True, "rules": [
+        {"action_name": "DEPLOY", "risk_tier": "HIGH", "validation_rules": {"business_hours_only": True}},
+        {"action_name": "ADMIN_TASK", "risk_tier": "HIGH", "validation_rules": {"user_role_required": "admin"}},
+    ]}
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(rules))
+    agent = CGOAgent(rules_path=str(path), decision_cache_ttl=10)
+
+    agent.validate_action("DEPLOY", {})
+    agent.validate_action("DEPLOY", {})
+    assert agent.decision_cache.stats()["entries"] == 0
+
+    assert not agent.validate_action("ADMIN_TASK", {}, {"role": "user"}).is_valid
+    assert agent.validate_action("ADMIN_TASK", {}, {"role": "admin"}).is_valid
+    assert agent.decision_cache.stats()["entries"] == 2
+
+    now = [1000.0]
+    monkeypatch.setattr(cgo_agent.time, "monotonic", lambda: now[0])
+    agent.decision_cache.clear()
+    agent.validate_action("ADMIN_TASK", {}, {"role": "admin"})
+    now[0] += 11
+    agent.validate_action("ADMIN_TASK", {}, {"role": "admin"})
+    assert agent.decision_cache.stats()["hits"] == 0
+
+
+def test_decision_cache_invalidated_on_reload(rules_path):
+    agent = CGOAgent(rules_path=rules_path, decision_cache_ttl=60)
+    assert not agent.validate_action("SYSTEM_ADMIN", {}).is_valid
+    with open(rules_path, "w") as f:
+        json.dump({"SOP_AS_LAW": True, "rules": [{"action_name": "SYSTEM_ADMIN", "risk_tier": "LOW"}]}, f)
+    assert agent.reload_rules()
+    assert agent.decision_cache.stats()["entries"] == 0
+    assert agent.validate_action("SYSTEM_ADMIN", {}).is_valid
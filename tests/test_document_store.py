@@ -0,0 +1,59 @@
+"""
+test_document_store.py - Columnar, memory-mapped document persistence tests
+SOP-RAG-001
+"""
+from app.document_store import DocumentStore
+from app.rag_system import Document
+
+
+def make_doc(vector_id, source="a.md", chunk=0, text=None):
+    return Document(
+        id=f"doc{source[0]}_{chunk}", title=f"{source.split('.')[0]}_chunk{chunk}",
+        content=text or f"Chunk {chunk} of {source} — ünïcode ✓", source_path=source,
+        metadata={"file_type": ".md", "size_bytes": 10}, hash=f"hash-{source}",
+        indexed_at="2024-01-01T00:00:00+00:00", vector_id=vector_id,
+    )
+
+
+def test_roundtrip_and_lazy_materialization(tmp_path):
+    docs = [make_doc(i, "a.md", i) for i in range(3)] + [make_doc(10 + i, "b.md", i) for i in range(2)]
+    store = DocumentStore(docs)
+    store.save(tmp_path, Document)
+
+    opened = DocumentStore.open(tmp_path, Document)
+    assert len(opened) == 5 and opened.ids() == [0, 1, 2, 10, 11]
+    assert opened.get(10) == docs[3]
+    assert opened.get(5) is None and 5 not in opened
+    assert list(opened) == docs
+    opened.close()
+
+
+def test_changes_after_open_are_saved(tmp_path):
+    store = DocumentStore([make_doc(i, "a.md", i) for i in range(3)])
+    store.save(tmp_path, Document)
+
+    opened = DocumentStore.open(tmp_path, Document)
+    assert opened.remove([1, 1, 99]) == 1
+    opened.add([make_doc(7, "c.md", 0, text="new chunk")])
+    assert opened.ids() == [0, 2, 7] and opened.max_id() == 7
+    opened.save(tmp_path, Document)
+
+    reopened = DocumentStore.open(tmp_path, Document)
+    assert [d.vector_id for d in reopened] == [0, 2, 7]
+    assert reopened[7].content == "new chunk" and reopened[2].title == "a_chunk2"
+
+
+def test_max_id_counts_removed_ids_so_they_are_not_reissued(tmp_path):
+    DocumentStore([make_doc(i, "a.md", i) for i in range(4)]).save(tmp_path, Document)
+    opened = DocumentStore.open(tmp_path, Document)
+    opened.remove([3])
+    assert opened.ids() == [0, 1, 2] and opened.max_id() == 3
+    opened.add([make_doc(9, "b.md", 0)])
+    assert opened.ids() == [0, 1, 2, 9] and opened.max_id() == 9
+    opened.close()
+
+
+def test_empty_store_roundtrip(tmp_path):
+    DocumentStore().save(tmp_path, Document)
+    opened = DocumentStore.open(tmp_path, Document)
+    assert len(opened) == 0 and opened.max_id() == -1 and list(opened) == []
@@ -0,0 +1,77 @@
+"""
+test_embedding_cache.py - Query embedding LRU cache tests
+SOP-RAG-001
+"""
+import atexit
+
+import numpy as np
+
+from app import embedding_cache
+from app.embedding_cache import QueryEmbeddingCache
+
+
+def vectors(n, dim=4):
+    return np.arange(n * dim, dtype="float32").reshape(n, dim)
+
+
+def test_lru_eviction_by_bytes():
+    cache = QueryEmbeddingCache("model", max_bytes=3 * 16)
+    cache.put_many(["a", "b", "c"], vectors(3))
+    cache.get_many(["a"])  # a becomes most recently used
+    cache.put_many(["d"], vectors(1))
+    assert [v is not None for v in cache.get_many(["a", "b", "c", "d"])] == [True, False, True, True]
+    stats = cache.stats()
+    assert stats["bytes"] == 48 and stats["evictions"] == 1 and stats["entries"] == 3
+
+
+def test_keys_include_model_name():
+    first = QueryEmbeddingCache("model-a", max_bytes=1024)
+    first.put_many(["same text"], vectors(1))
+    assert embedding_cache.query_key("model-a", "x") != embedding_cache.query_key("model-b", "x")
+    assert QueryEmbeddingCache("model-b", max_bytes=1024).get_many(["same text"]) == [None]
+
+
+def test_persistence_round_trip(tmp_path):
+    path = str(tmp_path / "cache.npz")
+    cache = QueryEmbeddingCache("model", max_bytes=1024, persist_path=path)
+    cache.put_many(["a", "b"], vectors(2))
+    cache.save()
+
+    restored = QueryEmbeddingCache("model", max_bytes=1024, persist_path=path)
+    assert restored.load() == 2
+    assert np.array_equal(restored.get_many(["b"])[0], vectors(2)[1])
+    assert QueryEmbeddingCache("other", max_bytes=1024, persist_path=path).load() == 0
+
+
+def test_process_cache_disabled_and_shared(monkeypatch, tmp_path):
+    embedding_cache.clear_query_caches()
+    monkeypatch.setattr(embedding_cache.Config, "QUERY_CACHE_BYTES", 0)
+    assert embedding_cache.get_query_cache("m") is None
+    monkeypatch.setattr(embedding_cache.Config, "QUERY_CACHE_BYTES", 1024)
+    monkeypatch.setattr(embedding_cache.Config, "QUERY_CACHE_DIR", str(tmp_path))
+    cache = embedding_cache.get_query_cache("m")
+    assert cache is embedding_cache.get_query_cache("m") and cache.persist_path.startswith(str(tmp_path))
+    atexit.unregister(cache.save)
+    embedding_cache.clear_query_caches()
+
+
+def test_chunk_cache_persists_and_prunes(tmp_path):
+    from app.embedding_cache import ChunkEmbeddingCache
+
+    path = str(tmp_path / "chunks.sqlite")
+    cache = ChunkEmbeddingCache(path, "model", dtype="float16")
+    cache.put_many(["a", "b", "c"], vectors(3) / 100)
+    cache.close()
+
+    reopened = ChunkEmbeddingCache(path, "model", dtype="float16")
+    found = reopened.get_many(["a", "zzz", "c"])
+    assert found[1] is None and found[0].dtype == np.float32
+    assert np.allclose(found[2], vectors(3)[2] / 100, atol=1e-3)
+    assert reopened.prune(["a"]) == 2 and len(reopened) == 1
+    assert reopened.stats()["hits"] == 2
+    reopened.close()
+
+    # Another model (or dtype) starts from an empty cache
+    other = ChunkEmbeddingCache(path, "other-model", dtype="float16")
+    assert len(other) == 0
+    other.close()
@@ -0,0 +1,118 @@
+"""
+test_extractors.py - Document extractor registry and isolated extraction tests
+SOP-RAG-001
+"""
+import time
+from pathlib import Path
+
+import pytest
+
+from app import extractors
+from app.extractors import Extractor, get_extractor, supported_extensions, unavailable_extensions
+from app.text_extraction import chunk_file, extract_text_from_file
+
+
+def hanging_extract(source_path, known_hash=None):
+    """Stand-in for ingest_pipeline.extract_file that never finishes on "slow" files (runs in a worker)."""
+    from app.ingest_pipeline import extract_file
+    if "slow" in Path(source_path).name:
+        time.sleep(600)
+    return extract_file(source_path, known_hash)
+
+
+def _minimal_pdf(text):
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def test_registry_reports_only_installed_backends(monkeypatch):
+    missing = Extractor("fake", (".xyz",), lambda path, block_chars: (iter(()), {}),
+                        requires=("notrekt_missing_backend",), isolate=True)
+    monkeypatch.setitem(extractors._registry, ".xyz", missing)
+    assert {".txt", ".md", ".json", ".html", ".htm"} <= supported_extensions()
+    assert ".xyz" not in supported_extensions()
+    assert unavailable_extensions()[".xyz"] == ("notrekt_missing_backend",)
+    assert get_extractor(Path("doc.XYZ")) is missing
+    assert extractors.needs_isolation(Path("doc.xyz")) and not extractors.needs_isolation(Path("a.txt"))
+
+
+def test_html_extracts_visible_text_and_title(tmp_path):
+    path = tmp_path / "policy.html"
+    path.write_text(
+        "<html><head><title>Escalation  Policy</title><style>p {color: red}</style></head>"
+        "<body><h1>Escalation</h1><script>var secret = 1;</script>"
+        "<p>Breaches go to the CGO &amp; are logged.</p><p>Review weekly.</p></body></html>",
+        encoding="utf-8",
+    )
+    content, metadata = extract_text_from_file(path)
+    assert "Breaches go to the CGO & are logged." in content and "Review weekly." in content
+    assert "secret" not in content and "color" not in content
+    assert metadata["file_type"] == "html" and metadata["title"] == "Escalation Policy"
+
+    chunks, _ = chunk_file(path, chunk_size=40)
+    assert [chunk for chunk in chunks if "Review weekly." in chunk]
+
+
+def test_pdf_pages_are_extracted(tmp_path):
+    pytest.importorskip("pypdf")
+    path = tmp_path / "audit.pdf"
+    path.write_bytes(_minimal_pdf("Audit entries are immutable."))
+    content, metadata = extract_text_from_file(path)
+    assert "Audit entries are immutable." in content
+    assert metadata["file_type"] == "pdf" and metadata["pages"] == 1
+
+
+def test_docx_paragraphs_and_tables_are_extracted(tmp_path):
+    docx = pytest.importorskip("docx")
+    path = tmp_path / "roles.docx"
+    document = docx.Document()
+    document.core_properties.title = "Roles"
+    document.add_paragraph("The CGO approves every release.")
+    table = document.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text = "Admin"
+    table.rows[0].cells[1].text = "Reviews escalations"
+    document.save(str(path))
+    content, metadata = extract_text_from_file(path)
+    assert "The CGO approves every release." in content
+    assert "Admin | Reviews escalations" in content
+    assert metadata["file_type"] == "docx" and metadata["title"] == "Roles"
+
+
+def test_hung_extraction_times_out_without_stalling_other_files(tmp_path, monkeypatch):
+    from app import ingest_pipeline, rag_system
+    from tests.test_rag_system import HashingEncoder, make_store, write_corpus
+
+    monkeypatch.setattr(rag_system, "SentenceTransformer", HashingEncoder)
+    monkeypatch.setattr("subprocess.run", lambda *args, **kwargs: None)
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    store = make_store(corpus, tmp_path)
+    write_corpus(corpus, {
+        "a.txt": "First policy. It is short.",
+        "slow.txt": "This file hangs its extractor.",
+        "b.md": "Second policy. Also short.",
+        "c.md": "Third policy, queued behind the hung file.",
+    })
+    monkeypatch.setattr(ingest_pipeline, "extract_file", hanging_extract)
+
+    started = time.perf_counter()
+    metrics = ingest_pipeline.IngestPipeline(store, workers=2, extract_timeout=5).run(store._discover_corpus_files())
+    assert time.perf_counter() - started < 60
+    assert metrics.files_added == 3 and metrics.files_failed == 1 and metrics.files_timed_out == 1
+    assert sorted(Path(path).name for path in store.manifest) == ["a.txt", "b.md", "c.md"]
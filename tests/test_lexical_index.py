@@ -0,0 +1,42 @@
+"""
+test_lexical_index.py - BM25 inverted index tests
+SOP-RAG-001
+"""
+from app.lexical_index import BM25Index, tokenize
+
+
+def test_tokenize_keeps_sop_ids_whole_and_drops_stopwords():
+    assert tokenize("What does SOP-GOV-001 require of the agent?") == \
+        ["sop-gov-001", "sop", "gov", "001", "require", "agent"]
+
+
+def test_ranks_exact_identifier_matches_first():
+    index = BM25Index()
+    index.add([
+        (0, "SOP-GOV-001 defines the governance core."),
+        (1, "SOP-GOV-002 defines the audit ledger."),
+        (2, "Governance applies to every agent."),
+    ])
+    hits = index.search("SOP-GOV-001", k=3)
+    assert hits[0][0] == 0 and len(hits) == 2
+    assert hits[0][1] > hits[1][1] > 0
+    assert index.search("unrelated words", k=3) == []
+
+
+def test_removed_chunks_stop_matching_and_save_round_trip(tmp_path):
+    index = BM25Index()
+    index.add([(0, "alpha beta"), (1, "alpha gamma"), (2, "delta")])
+    index.save(tmp_path)
+    assert BM25Index.exists(tmp_path)
+
+    reopened = BM25Index.open(tmp_path)
+    assert len(reopened) == 3
+    assert reopened.remove([1, 2, 99]) == 2
+    reopened.add([(3, "alpha epsilon")])
+    assert sorted(vid for vid, _ in reopened.search("alpha", k=5)) == [0, 3]
+    before = reopened.search("alpha epsilon", k=5)
+    reopened.save(tmp_path)
+
+    merged = BM25Index.open(tmp_path)
+    assert len(merged) == 2 and merged.search("delta", k=5) == []
+    assert merged.search("alpha epsilon", k=5) == before
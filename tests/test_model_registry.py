@@ -0,0 +1,49 @@
+"""
+test_model_registry.py - Shared embedding model and agent registry tests
+SOP-RAG-001
+"""
+import threading
+import time
+
+from app import model_registry
+
+
+class SlowModel:
+    loads = 0
+
+    def __init__(self, name):
+        SlowModel.loads += 1
+        time.sleep(0.05)
+        self.name = name
+
+
+def test_model_loaded_once_under_concurrent_first_use():
+    model_registry.clear_model_registry()
+    SlowModel.loads = 0
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(model_registry.get_embedding_model(SlowModel, "m")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert SlowModel.loads == 1
+    assert all(model is models[0] for model in models)
+    assert model_registry.get_embedding_model(SlowModel, "other") is not models[0]
+    model_registry.clear_model_registry()
+
+
+def test_default_model_name_comes_from_config(monkeypatch):
+    model_registry.clear_model_registry()
+    monkeypatch.setattr(model_registry.Config, "EMBEDDING_MODEL", "configured-model")
+    assert model_registry.get_embedding_model(SlowModel).name == "configured-model"
+    model_registry.clear_model_registry()
+
+
+def test_verifier_agent_is_shared(monkeypatch):
+    from app import verifier_agent
+
+    monkeypatch.setattr(verifier_agent, "_shared_verifier", None)
+    monkeypatch.setattr(verifier_agent.VerifierAgent, "__init__", lambda self: None)
+    first = verifier_agent.get_verifier_agent()
+    assert verifier_agent.get_verifier_agent() is first
@@ -0,0 +1,652 @@
+"""
+test_rag_system.py - VectorStore indexing and retrieval tests
+SOP-RAG-001
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+
+import numpy as np
+import pytest
+
+from app import embedding_cache, rag_system
+
+
+class HashingEncoder:
+    """Offline stand-in for SentenceTransformer: hashed bag-of-words vectors."""
+
+    dim = 64
+    calls = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        HashingEncoder.calls.append(len(texts))
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            for token in re.findall(r"[\w-]+", text.lower()):
+                digest = hashlib.sha256(token.encode()).digest()
+                out[row, int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        return out
+
+
+@pytest.fixture(autouse=True)
+def offline_encoder(monkeypatch):
+    HashingEncoder.calls = []
+    monkeypatch.setattr(rag_system, "SentenceTransformer", HashingEncoder)
+    embedding_cache.clear_query_caches()
+    # Keep DVC tracking out of unit tests
+    monkeypatch.setattr("subprocess.run", lambda *args, **kwargs: None)
+
+
+def write_corpus(root, files):
+    root.mkdir(parents=True, exist_ok=True)
+    for name, text in files.items():
+        (root / name).write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "corpus"
+    write_corpus(root, {
+        "governance.md": "The governance core enforces SOP-GOV-001. Every breach is logged immutably.",
+        "retrieval.txt": "Retrieval uses a vector index over the trusted corpus. Sources must be cited.",
+        "agents.md": " ".join(f"Agent {i} reviews escalation number {i}." for i in range(60)),
+    })
+    return root
+
+
+def make_store(corpus, tmp_path, **kwargs):
+    return rag_system.VectorStore(corpus_path=str(corpus), vector_db_path=str(tmp_path / "db"), **kwargs)
+
+
+def test_rebuild_embeds_chunks_in_batches(corpus, tmp_path):
+    store = make_store(corpus, tmp_path, embedding_batch_size=8)
+    assert store.index.ntotal == len(store.documents) > 3
+    # Chunks from several files share forward passes instead of one per chunk
+    assert len(HashingEncoder.calls) < len(store.documents)
+    norms = np.linalg.norm(store.index.index.reconstruct_n(0, store.index.ntotal), axis=1)
+    assert np.allclose(norms, 1.0, atol=1e-5)
+
+
+def test_search_finds_relevant_chunk(corpus, tmp_path):
+    store = make_store(corpus, tmp_path)
+    results = store.search("governance breach logged immutably", k=3, min_score=0.1)
+    assert results and results[0].document.source_path.endswith("governance.md")
+
+
+def test_reload_from_disk_keeps_index_in_sync(corpus, tmp_path):
+    store = make_store(corpus, tmp_path)
+    reloaded = make_store(corpus, tmp_path)
+    assert len(reloaded.documents) == len(store.documents) == reloaded.index.ntotal
+
+
+def test_unchanged_files_skip_before_hashing(corpus, tmp_path, monkeypatch):
+    store = make_store(corpus, tmp_path)
+    chunks = len(store.documents)
+    assert set(store.manifest) == {str(p) for p in corpus.iterdir()}
+
+    hashed = []
+    original = store._calculate_file_hash
+    monkeypatch.setattr(store, "_calculate_file_hash", lambda path: hashed.append(path) or original(path))
+    store.index_corpus()
+    assert hashed == [] and len(store.documents) == chunks
+
+    # Touching a file changes mtime but not content: hashed once, not re-embedded
+    target = corpus / "retrieval.txt"
+    stat = target.stat()
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    store.index_corpus()
+    assert hashed == [target] and len(store.documents) == chunks
+
+
+def test_manifest_persisted_and_derived_for_legacy_indexes(corpus, tmp_path):
+    store = make_store(corpus, tmp_path)
+    entry = store.manifest[str(corpus / "agents.md")]
+    assert store.documents[entry.chunk_start].source_path == str(corpus / "agents.md")
+    assert store.documents[entry.chunk_end - 1].source_path == str(corpus / "agents.md")
+    assert entry.chunk_end - entry.chunk_start > 1
+
+    reloaded = make_store(corpus, tmp_path)
+    assert reloaded.manifest == store.manifest
+
+    (store.index_dir / "manifest.json").unlink()
+    legacy = make_store(corpus, tmp_path)
+    derived = legacy.manifest[str(corpus / "agents.md")]
+    assert (derived.chunk_start, derived.chunk_end, derived.hash) == (entry.chunk_start, entry.chunk_end, entry.hash)
+
+
+def test_sync_replaces_changed_and_removes_deleted_files(corpus, tmp_path):
+    store = make_store(corpus, tmp_path)
+    before = len(store.documents)
+    old_range = store.manifest[str(corpus / "retrieval.txt")]
+
+    (corpus / "retrieval.txt").write_text("Dense retrieval was replaced by hybrid ranking.", encoding="utf-8")
+    (corpus / "governance.md").unlink()
+    (corpus / "new.md").write_text("A brand new escalation protocol.", encoding="utf-8")
+    HashingEncoder.calls = []
+
+    stats = store.sync_corpus()
+    assert (stats.added, stats.changed, stats.deleted, stats.unchanged) == (1, 1, 1, 1)
+    # Only the two new texts were embedded
+    assert sum(HashingEncoder.calls) == 2
+    # governance.md (1 chunk) removed, new.md (1 chunk) added, retrieval.txt replaced 1:1
+    assert store.index.ntotal == len(store.documents) == before
+    assert stats.chunks_removed == stats.chunks_added == 2
+    assert old_range.chunk_start not in store.documents
+    assert str(corpus / "governance.md") not in store.manifest
+    sources = {doc.source_path for doc in store.documents}
+    assert str(corpus / "governance.md") not in sources
+
+    results = store.search("hybrid ranking replaced", k=1, min_score=0.1)
+    assert results[0].document.content.startswith("Dense retrieval was replaced")
+
+    reloaded = make_store(corpus, tmp_path)
+    assert reloaded.index.ntotal == len(reloaded.documents) == len(store.documents)
+    assert reloaded.sync_corpus().has_changes is False
+
+
+def test_legacy_positional_index_is_migrated(corpus, tmp_path):
+    import pickle
+
+    import faiss
+
+    store = make_store(corpus, tmp_path)
+    db = store.index_dir
+    flat = faiss.IndexFlatIP(store.embedding_dim)
+    flat.add(store.index.index.reconstruct_n(0, store.index.ntotal))
+    faiss.write_index(flat, str(db / "faiss_index.bin"))
+    legacy_docs = list(store.documents)
+    for doc in legacy_docs:
+        del doc.__dict__["vector_id"]
+    with open(db / "documents.pkl", "wb") as f:
+        pickle.dump(legacy_docs, f)
+    (db / "manifest.json").unlink()
+    for columnar in db.glob("documents.*"):
+        if columnar.suffix != ".pkl":
+            columnar.unlink()
+
+    migrated = make_store(corpus, tmp_path)
+    assert isinstance(migrated.index, faiss.IndexIDMap2)
+    assert [doc.vector_id for doc in migrated.documents] == list(range(len(legacy_docs)))
+    assert migrated.sync_corpus().has_changes is False
+
+
+def test_parallel_ingest_matches_sequential(corpus, tmp_path):
+    sequential = make_store(corpus, tmp_path / "seq")
+    # Start from an empty corpus, then ingest the same files through the process pool
+    parallel_corpus = tmp_path / "parallel_corpus"
+    parallel_corpus.mkdir()
+    parallel = make_store(parallel_corpus, tmp_path / "par")
+    write_corpus(parallel_corpus, {p.name: p.read_text(encoding="utf-8") for p in corpus.iterdir()})
+    stats = parallel.sync_corpus(save=False, workers=2)
+
+    assert stats.added == 3 and stats.failed == 0
+    assert stats.metrics.files_prepared == 3
+    assert stats.metrics.chunks_written == stats.chunks_added == parallel.index.ntotal
+    assert sorted(d.content for d in parallel.documents) == sorted(d.content for d in sequential.documents)
+    assert sorted(e.hash for e in parallel.manifest.values()) == sorted(e.hash for e in sequential.manifest.values())
+
+    # A second parallel pass finds nothing to do
+    again = parallel.sync_corpus(save=False, workers=2)
+    assert again.unchanged == 3 and not again.has_changes
+
+
+def test_ingest_pipeline_reports_progress(corpus, tmp_path):
+    from app.ingest_pipeline import IngestPipeline
+
+    store = make_store(corpus, tmp_path)
+    (corpus / "new.md").write_text("Fresh escalation policy text. It should be embedded.", encoding="utf-8")
+    snapshots = []
+    pipeline = IngestPipeline(store, workers=1, batch_size=1, queue_size=1,
+                              progress=lambda m: snapshots.append(m.chunks_written))
+    metrics = pipeline.run(store._discover_corpus_files())
+
+    assert metrics.files_added == 1 and metrics.files_unchanged == 3
+    assert metrics.chunks_written == metrics.chunks_embedded > 0
+    assert snapshots and snapshots[-1] == metrics.chunks_written
+    assert metrics.to_dict()["chunks_per_second"] >= 0
+
+
+@pytest.mark.parametrize("index_type", ["ivf_flat", "hnsw"])
+def test_approximate_index_built_and_kept_in_sync(corpus, tmp_path, monkeypatch, index_type):
+    monkeypatch.setattr(rag_system.Config, "VECTOR_INDEX_MIN_VECTORS", 1)
+    store = make_store(corpus, tmp_path, index_type=index_type)
+    assert rag_system.vector_index.index_type_of(store.index) == index_type
+    results = store.search("governance breach logged immutably", k=3, min_score=0.1)
+    assert results and results[0].document.source_path.endswith("governance.md")
+
+    (corpus / "governance.md").unlink()
+    store.sync_corpus()
+    assert all(not r.document.source_path.endswith("governance.md")
+               for r in store.search("governance breach logged immutably", k=3, min_score=0.0))
+    reloaded = make_store(corpus, tmp_path, index_type=index_type)
+    assert rag_system.vector_index.index_type_of(reloaded.index) == index_type
+    assert len(reloaded.documents) == len(store.documents)
+
+
+def test_small_corpus_stays_on_flat_index(corpus, tmp_path):
+    store = make_store(corpus, tmp_path, index_type="ivf_pq")
+    assert rag_system.vector_index.index_type_of(store.index) == "flat"
+
+
+def test_documents_persisted_columnar_and_loaded_lazily(corpus, tmp_path):
+    store = make_store(corpus, tmp_path)
+    db = store.index_dir
+    assert rag_system.DocumentStore.exists(db) and not (db / "documents.pkl").exists()
+
+    reloaded = make_store(corpus, tmp_path)
+    assert not reloaded.documents._docs  # nothing materialized at startup
+    assert [(d.id, d.title, d.content, d.metadata, d.vector_id) for d in reloaded.documents] == \
+        [(d.id, d.title, d.content, d.metadata, d.vector_id) for d in store.documents]
+
+    # Removals and additions after opening are persisted by the next save
+    (corpus / "retrieval.txt").write_text("Retrieval now uses hybrid search. Sources are still cited.", encoding="utf-8")
+    stats = reloaded.sync_corpus()
+    assert stats.changed == 1
+    again = make_store(corpus, tmp_path)
+    assert len(again.documents) == again.index.ntotal == len(reloaded.documents)
+    assert any("hybrid search" in d.content for d in again.documents)
+
+
+def test_read_only_store_maps_index_and_refuses_writes(corpus, tmp_path):
+    writer = make_store(corpus, tmp_path)
+    reader = make_store(corpus, tmp_path, read_only=True)
+    assert reader.read_only and reader.index.ntotal == writer.index.ntotal
+    results = reader.search("governance breach logged immutably", k=3, min_score=0.1)
+    assert results and results[0].document.source_path.endswith("governance.md")
+
+    (corpus / "new.md").write_text("Readers pick up the writer's sync. Nothing is re-embedded.", encoding="utf-8")
+    before = reader.index.ntotal
+    assert not reader.sync_corpus().has_changes and reader.index.ntotal == before
+    assert reader.reload_if_changed() is False
+
+    writer.sync_corpus()
+    assert reader.reload_if_changed() is True
+    assert reader.index.ntotal == writer.index.ntotal > before
+
+
+def test_read_only_store_without_saved_index_waits_for_writer(corpus, tmp_path):
+    reader = make_store(corpus, tmp_path, read_only=True)
+    assert reader.read_only and not reader.documents and reader.index is None
+    assert not (tmp_path / "db" / rag_system.VERSIONS_DIR).exists()
+    assert reader.search("governance breach logged immutably", k=3, min_score=0.1) == []
+
+    writer = make_store(corpus, tmp_path)
+    assert reader.reload_if_changed() is True
+    assert reader.read_only and reader.index.ntotal == writer.index.ntotal > 0
+
+
+def test_reload_during_half_done_save_keeps_serving_old_version(corpus, tmp_path, monkeypatch):
+    writer = make_store(corpus, tmp_path)
+    reader = make_store(corpus, tmp_path, read_only=True)
+    live, before = reader.index_dir, len(reader.documents)
+    write_corpus(corpus, {"new.md": "SOP-SEC-009 quarantine protocol for leaked credentials."})
+
+    # Reload while the writer has saved the index and documents but not the rest
+    reloads = []
+    save_manifest = rag_system.VectorStore._save_manifest
+
+    def interrupted_save_manifest(self):
+        reloads.append(reader.reload_if_changed())
+        save_manifest(self)
+
+    monkeypatch.setattr(rag_system.VectorStore, "_save_manifest", interrupted_save_manifest)
+    writer.sync_corpus()
+    assert reloads == [False]
+    assert reader.index_dir == live and len(reader.documents) == reader.index.ntotal == before
+
+    assert reader.reload_if_changed() is True
+    assert reader.index_dir == writer.index_dir != live
+    assert len(reader.documents) == reader.index.ntotal == len(writer.documents) > before
+
+    # A published version that cannot be loaded is skipped, never rebuilt by the reader
+    served = reader.index_dir
+    broken = writer._new_version_dir()
+    for name in ("faiss_index.bin", "documents.bin", "documents.sqlite"):
+        shutil.copy(served / name, broken / name)
+    (broken / "documents.idx.npy").write_bytes(b"truncated")
+    writer._write_current_pointer(broken.name)
+    versions = sorted((tmp_path / "db" / rag_system.VERSIONS_DIR).iterdir())
+    assert reader.reload_if_changed() is False
+    assert reader.read_only and reader.index_dir == served
+    assert reader.search("SOP-SEC-009 quarantine protocol", k=1, min_score=0.0)[0].document.source_path.endswith("new.md")
+    assert sorted((tmp_path / "db" / rag_system.VERSIONS_DIR).iterdir()) == versions
+
+
+def test_background_rebuild_serves_old_version_until_swap(corpus, tmp_path, monkeypatch):
+    store = make_store(corpus, tmp_path)
+    first_version, before = store.index_dir, len(store.documents)
+    query = "SOP-SEC-009 quarantine protocol"
+    write_corpus(corpus, {"new.md": "SOP-SEC-009 quarantine protocol for leaked credentials."})
+
+    started, release = threading.Event(), threading.Event()
+    encode = HashingEncoder.encode
+
+    def gated_encode(self, texts, *args, **kwargs):
+        if threading.current_thread() is not threading.main_thread():
+            started.set()
+            release.wait(30)
+        return encode(self, texts, *args, **kwargs)
+
+    monkeypatch.setattr(HashingEncoder, "encode", gated_encode)
+    future = store.rebuild_in_background()
+    assert started.wait(30)
+    assert store.rebuild_in_background() is future
+    # Mid-rebuild the previous version is served in full
+    assert store.index_dir == first_version and len(store.documents) == store.index.ntotal == before
+    assert not any(r.document.source_path.endswith("new.md") for r in store.search(query, k=3, min_score=0.0))
+
+    release.set()
+    stats = future.result(timeout=60)
+    assert stats.indexed_files == 4
+    assert store.index_dir != first_version and store.index_dir.parent == tmp_path / "db" / "versions"
+    assert (tmp_path / "db" / "CURRENT").read_text(encoding="utf-8") == store.index_dir.name
+    assert store.search(query, k=1, min_score=0.0)[0].document.source_path.endswith("new.md")
+    # DVC tracking ran off the rebuild's critical path
+    store._dvc_thread.join(10)
+    assert not store._dvc_thread.is_alive()
+
+
+def test_sync_serves_old_generation_until_swap(corpus, tmp_path, monkeypatch):
+    store = make_store(corpus, tmp_path)
+    before = len(store.documents)
+    query = "SOP-SEC-009 quarantine protocol"
+    write_corpus(corpus, {"new.md": "SOP-SEC-009 quarantine protocol for leaked credentials."})
+    (corpus / "retrieval.txt").unlink()
+
+    saving, release = threading.Event(), threading.Event()
+    save_index = rag_system.VectorStore._save_index
+
+    def gated_save(self):
+        saving.set()
+        release.wait(30)
+        return save_index(self)
+
+    monkeypatch.setattr(rag_system.VectorStore, "_save_index", gated_save)
+    sync = threading.Thread(target=store.sync_corpus)
+    sync.start()
+    try:
+        assert saving.wait(30)
+        # Mid-sync (and mid-save) the previous generation is served in full
+        assert len(store.documents) == store.index.ntotal == before
+        results = store.search("vector index over the trusted corpus", k=3, min_score=0.0)
+        assert any(r.document.source_path.endswith("retrieval.txt") for r in results)
+        assert not any(r.document.source_path.endswith("new.md") for r in store.search(query, k=3, min_score=0.0))
+    finally:
+        release.set()
+        sync.join(60)
+    assert store.search(query, k=1, min_score=0.0)[0].document.source_path.endswith("new.md")
+    assert not any(r.document.source_path.endswith("retrieval.txt")
+                   for r in store.search("vector index over the trusted corpus", k=5, min_score=0.0))
+    assert len(store.documents) == store.index.ntotal
+
+
+def test_rebuild_prunes_old_versions_and_readers_switch(corpus, tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_system.Config, "INDEX_VERSIONS_KEPT", 2)
+    store = make_store(corpus, tmp_path)
+    reader = make_store(corpus, tmp_path, read_only=True)
+    assert reader.index_dir == store.index_dir
+
+    for _ in range(3):
+        store._rebuild_index()
+    versions = sorted(path.name for path in (tmp_path / "db" / "versions").iterdir())
+    assert len(versions) == 2 and versions[-1] == store.index_dir.name
+    assert not (tmp_path / "db" / "faiss_index.bin").exists()
+
+    assert reader.reload_if_changed() is True
+    assert reader.index_dir == store.index_dir and reader.index.ntotal == store.index.ntotal
+
+    # A version that cannot be saved is discarded and the live one kept
+    monkeypatch.setattr(rag_system.VectorStore, "_save_index", lambda self: False)
+    live = store.index_dir
+    store._rebuild_index()
+    assert store.index_dir == live and store.search("governance breach logged immutably", k=1, min_score=0.1)
+    assert sorted(path.name for path in (tmp_path / "db" / "versions").iterdir()) == versions
+
+
+def test_vector_store_registry_shares_one_store(corpus, tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_system.Config, "CORPUS_PATH", str(corpus))
+    monkeypatch.setattr(rag_system.Config, "VECTOR_DB_PATH", str(tmp_path / "db"))
+    rag_system.clear_vector_store_registry()
+    try:
+        shared = rag_system.get_vector_store()
+        assert rag_system.get_vector_store(str(corpus), str(tmp_path / "db")) is shared
+        assert rag_system.ResearchAgent().vector_store is shared
+        assert rag_system.get_vector_store(read_only=True) is not shared
+    finally:
+        rag_system.clear_vector_store_registry()
+
+
+def test_stores_share_one_model_and_warm_up(corpus, tmp_path, monkeypatch):
+    first = make_store(corpus, tmp_path / "a")
+    second = make_store(corpus, tmp_path / "b")
+    assert first.model is second.model
+
+    monkeypatch.setattr(rag_system.Config, "CORPUS_PATH", str(corpus))
+    monkeypatch.setattr(rag_system.Config, "VECTOR_DB_PATH", str(tmp_path / "a" / "db"))
+    rag_system.clear_vector_store_registry()
+    try:
+        assert rag_system.warm_up() is True
+        assert rag_system.get_vector_store().model is first.model
+    finally:
+        rag_system.clear_vector_store_registry()
+
+
+def test_search_many_matches_single_searches_with_one_encode(corpus, tmp_path):
+    store = make_store(corpus, tmp_path)
+    queries = ["governance breach logged immutably", "vector index trusted corpus", "agent escalation number 7"]
+    HashingEncoder.calls = []
+    batched = store.search_many(queries, k=2, min_score=0.1)
+    assert HashingEncoder.calls == [len(queries)]
+    for query, results in zip(queries, batched):
+        single = store.search(query, k=2, min_score=0.1)
+        assert [(r.document.vector_id, round(r.score, 5)) for r in results] == \
+            [(r.document.vector_id, round(r.score, 5)) for r in single]
+    assert store.search_many([], k=2) == []
+
+
+def test_excerpts_are_extracted_only_when_read(corpus, tmp_path, monkeypatch):
+    store = make_store(corpus, tmp_path)
+    extracted = []
+    original = rag_system.extract_excerpt
+    monkeypatch.setattr(rag_system, "extract_excerpt", lambda *args: extracted.append(args) or original(*args))
+    results = store.search("governance breach logged immutably", k=3, min_score=0.0)
+    assert len(results) == 3 and extracted == []
+    assert "breach" in results[0].excerpt and results[0].excerpt == results[0].excerpt
+    assert len(extracted) == 1
+    assert rag_system.SearchResult(results[0].document, 1.0, excerpt="given").excerpt == "given"
+
+
+@pytest.mark.parametrize("mode", ["dense", "lexical", "hybrid"])
+def test_ids_only_search_matches_full_results(corpus, tmp_path, mode):
+    store = make_store(corpus, tmp_path)
+    queries = ["governance breach logged immutably", "SOP-GOV-001", "no such words anywhere"]
+    expected = store.search_many(queries, k=4, min_score=0.1, mode=mode)
+    ids, scores = store.search_ids_many(queries, k=4, min_score=0.1, mode=mode)
+    assert ids.shape == scores.shape == (3, 4) and ids.dtype == np.int64 and scores.dtype == np.float32
+    for row, results in enumerate(expected):
+        assert ids[row, :len(results)].tolist() == [r.document.vector_id for r in results]
+        assert np.allclose(scores[row, :len(results)], [r.score for r in results], atol=1e-5)
+        assert (ids[row, len(results):] == -1).all() and np.isneginf(scores[row, len(results):]).all()
+
+    single_ids, single_scores = store.search_ids(queries[0], k=4, min_score=0.1, mode=mode,
+                                                 filters={"file_types": [".md"]})
+    assert len(single_ids) == len(single_scores) > 0
+    assert all(store.documents[i].source_path.endswith(".md") for i in single_ids.tolist())
+
+
+def test_verifier_checks_claims_with_one_batched_search(tmp_path):
+    from app.verifier_agent import VerifierAgent
+
+    root = tmp_path / "kb"
+    write_corpus(root, {
+        "approval.md": "All escalations require human approval before execution.",
+        "audit.md": "Every governance decision is written to immutable storage.",
+    })
+    store = make_store(root, tmp_path)
+    verifier = VerifierAgent(rag_vector_store=store)
+    HashingEncoder.calls = []
+    result = verifier.verify_output(
+        "All escalations require human approval before execution. "
+        "Every governance decision is written to immutable storage. "
+        "The sources say this directly.",
+        ["The sources say this directly."],
+    )
+    assert result["is_valid"] and not result["unsupported_claims"]
+    assert [entry["method"] for entry in result["audit_log"]] == ["rag_search", "rag_search", "direct_match"]
+    assert result["audit_log"][0]["doc_id"].startswith(store.manifest[str(root / "approval.md")].doc_id)
+    assert HashingEncoder.calls == [2]
+
+
+def test_verifier_resolves_claim_ids_in_the_generation_searched(tmp_path):
+    from app.verifier_agent import VerifierAgent
+
+    root = tmp_path / "kb"
+    claim = "All escalations require human approval before execution."
+    write_corpus(root, {
+        "approval.md": claim,
+        "audit.md": "Every governance decision is written to immutable storage.",
+    })
+    store = make_store(root, tmp_path)
+    verifier = VerifierAgent(rag_vector_store=store)
+    search_ids_many = store._search_ids_many
+    swapped = []
+
+    def search_then_swap(*args):
+        found = search_ids_many(*args)
+        if not swapped:
+            # A sync lands between the id search and the document lookup; the
+            # changed file is re-indexed under new vector ids
+            swapped.append(True)
+            write_corpus(root, {"approval.md": claim + "\n"})
+            store.sync_corpus()
+        return found
+
+    store._search_ids_many = search_then_swap
+    doc_id, score = verifier._search_claims([claim])[claim]
+    assert swapped and score >= 0.7
+    assert doc_id.startswith(store.manifest[str(root / "approval.md")].doc_id)
+    assert store.search_documents_many([claim], k=1, min_score=0.7)[0][0][0].id == doc_id
+
+
+def test_repeated_queries_served_from_embedding_cache(corpus, tmp_path):
+    store = make_store(corpus, tmp_path)
+    first = store.search("governance breach logged immutably", k=2, min_score=0.1)
+    HashingEncoder.calls = []
+    again = store.search_many(["governance breach logged immutably", "trusted corpus citations"], k=2, min_score=0.1)
+    # Only the new query reaches the model
+    assert HashingEncoder.calls == [1]
+    assert [r.document.vector_id for r in again[0]] == [r.document.vector_id for r in first]
+    stats = store.query_cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["bytes"] == 2 * 64 * 4
+
+
+def test_rebuild_reuses_cached_chunk_embeddings(corpus, tmp_path):
+    store = make_store(corpus, tmp_path)
+    HashingEncoder.calls = []
+    store._rebuild_index()
+    assert HashingEncoder.calls == []
+    assert store.index.ntotal == len(store.documents) > 0
+
+    # Only the chunk text that actually changed is embedded again
+    (corpus / "governance.md").write_text("The governance core enforces SOP-GOV-002 now.", encoding="utf-8")
+    store.sync_corpus()
+    assert HashingEncoder.calls == [1]
+    results = store.search("governance core enforces SOP-GOV-002", k=1, min_score=0.1)
+    assert results and "SOP-GOV-002" in results[0].document.content
+
+
+def test_hybrid_search_ranks_exact_sop_id_matches(tmp_path):
+    root = tmp_path / "sops"
+    write_corpus(root, {
+        "SOP-GOV-001_ Governance Core.md": "The governance core logs every breach to the audit ledger.",
+        "SOP-GOV-002_ Audit Ledger.md": "Per SOP-GOV-002 the audit ledger stores decisions immutably.",
+        "SOP-EXE-001_ Executor.md": "The executor agent runs approved governance workflows.",
+    })
+    store = make_store(root, tmp_path)
+    for mode in ("lexical", "hybrid"):
+        results = store.search("SOP-GOV-002", k=2, min_score=0.0, mode=mode)
+        assert results[0].document.source_path.endswith("SOP-GOV-002_ Audit Ledger.md")
+        assert results[0].score <= 1.0
+    with pytest.raises(ValueError):
+        store.search("SOP-GOV-002", mode="fuzzy")
+
+
+def test_lexical_index_follows_syncs_and_persists(corpus, tmp_path):
+    store = make_store(corpus, tmp_path)
+    assert len(store.lexical) == len(store.documents)
+    (corpus / "governance.md").unlink()
+    (corpus / "new.md").write_text("The quarantine procedure follows SOP-SEC-009.", encoding="utf-8")
+    store.sync_corpus()
+    assert len(store.lexical) == len(store.documents)
+    sources = [r.document.source_path for r in store.search("SOP-GOV-001", k=5, min_score=0.0, mode="lexical")]
+    assert str(corpus / "governance.md") not in sources
+
+    reloaded = make_store(corpus, tmp_path)
+    assert reloaded.lexical is None
+    results = reloaded.search("SOP-SEC-009 quarantine", k=1, mode="hybrid")
+    assert results[0].document.source_path.endswith("new.md")
+    assert "SOP-SEC-009" in results[0].excerpt
+
+    # Indexes saved without a lexical index get one built from their documents
+    for name in ("lexical_postings.npy", "lexical_docs.npy", "lexical_index.json"):
+        (store.index_dir / name).unlink()
+    legacy = make_store(corpus, tmp_path)
+    assert legacy.search("SOP-SEC-009", k=1, mode="lexical")[0].document.source_path.endswith("new.md")
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+def test_filtered_search_only_scores_matching_files(corpus, tmp_path, monkeypatch, index_type):
+    monkeypatch.setattr(rag_system.Config, "VECTOR_INDEX_MIN_VECTORS", 1)
+    write_corpus(corpus / "policies", {"escalation.md": "Escalation policy: breaches go to the governance core."})
+    write_corpus(corpus / "policies_archive", {"old.md": "Archived policy: breaches went to the governance core."})
+    store = make_store(corpus, tmp_path, index_type=index_type)
+    query = "governance breach logged immutably"
+
+    # k results even though every agents.md chunk scores below governance.md
+    results = store.search(query, k=3, min_score=-1.0, filters={"file_types": ["md"], "path_prefix": "agents.md"})
+    assert len(results) == 3 and all(r.document.source_path.endswith("agents.md") for r in results)
+    # Prefixes match whole path components: policies/ does not cover policies_archive/
+    for prefix in ("policies/", "policies"):
+        results = store.search(query, k=5, min_score=0.0, filters={"path_prefix": prefix})
+        assert [r.document.source_path for r in results] == [str(corpus / "policies" / "escalation.md")]
+    assert store.search(query, k=5, min_score=0.0, filters={"path_prefix": "agents"}) == []
+    txt = store.search_many([query, "trusted corpus"], k=5, min_score=-1.0, filters={"file_types": [".txt"]})
+    assert all(r.document.source_path.endswith(".txt") for results in txt for r in results) and txt[0]
+    assert store.search(query, k=3, mode="hybrid", filters={"file_types": [".txt"]})[0].document.source_path.endswith(".txt")
+
+    assert store.search(query, filters={"indexed_after": "2999-01-01"}) == []
+    assert store.search(query, k=1, min_score=0.0, filters={"indexed_before": "2999-01-01T00:00:00+00:00"})
+    with pytest.raises(ValueError):
+        store.search(query, filters={"size": 3})
+
+
+def test_quantized_index_reranks_with_exact_vectors(corpus, tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_system.Config, "VECTOR_INDEX_MIN_VECTORS", 1)
+    exact = make_store(corpus, tmp_path / "exact")
+    store = make_store(corpus, tmp_path, index_type="sq8")
+    assert rag_system.vector_index.index_type_of(store.index) == "sq8"
+    assert store.rerank_index.ntotal == store.index.ntotal
+    query = "governance breach logged immutably"
+    expected = [(r.document.vector_id, round(r.score, 5)) for r in exact.search(query, k=3, min_score=0.0)]
+    assert [(r.document.vector_id, round(r.score, 5)) for r in store.search(query, k=3, min_score=0.0)] == expected
+
+    (corpus / "governance.md").unlink()
+    store.sync_corpus()
+    assert store.rerank_index.ntotal == store.index.ntotal == len(store.documents)
+    assert (store.index_dir / "faiss_rerank.bin").exists()
+    served = make_store(corpus, tmp_path, index_type="sq8", read_only=True)
+    assert served.rerank_index is not None
+    assert all(not r.document.source_path.endswith("governance.md") for r in served.search(query, k=3, min_score=0.0))
+
+    monkeypatch.setattr(rag_system.Config, "VECTOR_RERANK_FACTOR", 0)
+    codes_only = make_store(corpus, tmp_path / "codes", index_type="sq8")
+    assert codes_only.rerank_index is None and codes_only.search(query, k=1, min_score=0.0)
+    assert not (codes_only.index_dir / "faiss_rerank.bin").exists()
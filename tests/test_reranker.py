@@ -0,0 +1,166 @@
+"""
+test_reranker.py - Cross-encoder re-ranking and latency budget tests
+SOP-RAG-001
+"""
+import re
+import time
+
+import pytest
+
+from app import model_registry, rag_system, reranker
+from app.reranker import CrossEncoderReranker
+from tests.test_rag_system import offline_encoder, write_corpus  # noqa: F401 (autouse fixture)
+
+
+class OverlapCrossEncoder:
+    """Offline stand-in for CrossEncoder: share of query words found in the passage."""
+
+    seconds_per_pair = 0.0
+    batches = []
+
+    def __init__(self, model_name, device=None):
+        self.model_name = model_name
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=None):
+        OverlapCrossEncoder.batches.append(len(pairs))
+        time.sleep(self.seconds_per_pair * len(pairs))
+        scores = []
+        for query, passage in pairs:
+            words = set(re.findall(r"\w+", query.lower()))
+            scores.append(len(words & set(re.findall(r"\w+", passage.lower()))) / max(len(words), 1))
+        return scores
+
+
+@pytest.fixture(autouse=True)
+def offline_cross_encoder(monkeypatch):
+    OverlapCrossEncoder.seconds_per_pair = 0.0
+    OverlapCrossEncoder.batches = []
+    monkeypatch.setattr(reranker, "CrossEncoder", OverlapCrossEncoder)
+    model_registry.clear_model_registry()
+    yield
+    model_registry.clear_model_registry()
+
+
+def make_results(passages):
+    # Dense scores deliberately rank the passages in the order given
+    results = []
+    for i, text in enumerate(passages):
+        doc = rag_system.Document(id=f"doc{i}", title=f"Doc {i}", content=text, source_path=f"doc{i}.md",
+                                  metadata={}, hash="", indexed_at="")
+        results.append(rag_system.SearchResult(doc, 0.9 - i * 0.05))
+    return results
+
+
+PASSAGES = [f"Filler passage {i} about unrelated onboarding steps." for i in range(9)]
+PASSAGES.append("Leaked credentials must be quarantined within one hour.")
+
+
+def test_candidates_reordered_in_batches():
+    results = make_results(PASSAGES)
+    outcome = CrossEncoderReranker(candidates=10, batch_size=4, budget_ms=0).rerank(
+        "quarantine leaked credentials", results)
+
+    assert outcome.reranked and outcome.pairs_scored == 10
+    assert OverlapCrossEncoder.batches == [4, 4, 2]
+    assert outcome.results[0].document.id == "doc9"
+    assert outcome.scores == sorted(outcome.scores, reverse=True) and outcome.scores[0] > 0.5
+    assert sorted(r.document.id for r in outcome.results) == sorted(r.document.id for r in results)
+
+
+def test_budget_overrun_keeps_dense_ranking():
+    OverlapCrossEncoder.seconds_per_pair = 0.01
+    results = make_results(PASSAGES)
+    ranker = CrossEncoderReranker(candidates=10, batch_size=4, budget_ms=50)
+
+    first = ranker.rerank("quarantine leaked credentials", results)
+    assert not first.reranked and first.reason == "budget"
+    assert first.results == results and first.scores == [r.score for r in results]
+    # Batches are sized to the measured time per pair, so the overrun is at most one batch
+    assert first.pairs_scored < 10 and first.elapsed_ms < 50 + 4 * 10 + 30
+
+    OverlapCrossEncoder.seconds_per_pair = 0.0
+    second = ranker.rerank("quarantine leaked credentials", results)
+    third = ranker.rerank("quarantine leaked credentials", results)
+    # The single pair scored per query brings the estimate back down once the model is fast again
+    assert third.reranked or second.reranked
+    assert ranker.stats.queries == 3 and ranker.stats.fallbacks.get("budget", 0) >= 1
+
+
+def test_first_query_batches_are_budgeted_with_or_without_warm_up():
+    OverlapCrossEncoder.seconds_per_pair = 0.01
+    results = make_results(PASSAGES)
+
+    cold = CrossEncoderReranker(candidates=10, batch_size=10, budget_ms=50)
+    cold.rerank("quarantine leaked credentials", results)
+    assert OverlapCrossEncoder.batches[0] == 1
+
+    OverlapCrossEncoder.batches = []
+    warm = CrossEncoderReranker(candidates=10, batch_size=10, budget_ms=50)
+    assert warm.warm_up() is True and warm.seconds_per_pair is not None
+    outcome = warm.rerank("quarantine leaked credentials", results)
+    # The warm-up pair seeds the estimate, so the first batch already fits the budget
+    assert OverlapCrossEncoder.batches[0] == 1 and OverlapCrossEncoder.batches[1] < 10
+    assert not outcome.reranked and outcome.reason == "budget"
+
+
+def test_model_load_failure_keeps_dense_ranking(monkeypatch):
+    def unavailable(model_name, device=None):
+        raise OSError("model not available offline")
+
+    monkeypatch.setattr(reranker, "CrossEncoder", unavailable)
+    results = make_results(PASSAGES)
+    ranker = CrossEncoderReranker(candidates=10)
+
+    outcome = ranker.rerank("quarantine leaked credentials", results)
+    assert not outcome.reranked and outcome.reason == "model_unavailable" and outcome.results == results
+    assert ranker.warm_up() is False
+
+
+def test_research_agent_ranks_and_scores_with_cross_encoder(tmp_path):
+    root = tmp_path / "corpus"
+    write_corpus(root, {f"policy{i}.md": f"Leaked credentials policy {i} covers escalation {i}." for i in range(8)})
+    write_corpus(root, {"security.txt": "Leaked credentials must be quarantined within one hour."})
+    store = rag_system.VectorStore(corpus_path=str(root), vector_db_path=str(tmp_path / "db"))
+    question = "leaked credentials policy: quarantined within one hour?"
+
+    dense = rag_system.ResearchAgent(vector_store=store).query(question, max_sources=2)
+    assert dense["ranking"] == {"method": "dense"}
+
+    agent = rag_system.ResearchAgent(vector_store=store, reranker=CrossEncoderReranker(candidates=10, budget_ms=0))
+    result = agent.query(question, max_sources=2)
+    assert result["ranking"]["method"] == "cross_encoder"
+    assert result["sources"][0]["source_path"].endswith("security.txt")
+    scores = [source["relevance_score"] for source in result["sources"]]
+    assert result["confidence"] == round(sum(scores) / len(scores), 3)
+    assert [source["rerank_score"] for source in result["sources"]] == sorted(
+        (source["rerank_score"] for source in result["sources"]), reverse=True)
+    assert "rerank_score" not in dense["sources"][0]
+
+
+def test_confidence_stays_on_dense_scale_with_logit_scores(tmp_path, monkeypatch):
+    # ms-marco style cross-encoders return unbounded logits rather than 0-1 scores
+    predict = OverlapCrossEncoder.predict
+    monkeypatch.setattr(OverlapCrossEncoder, "predict",
+                        lambda self, pairs, **kwargs: [20.0 * s - 5.0 for s in predict(self, pairs, **kwargs)])
+    root = tmp_path / "corpus"
+    write_corpus(root, {f"policy{i}.md": f"Leaked credentials policy {i} covers escalation {i}." for i in range(8)})
+    store = rag_system.VectorStore(corpus_path=str(root), vector_db_path=str(tmp_path / "db"))
+
+    agent = rag_system.ResearchAgent(vector_store=store, reranker=CrossEncoderReranker(candidates=10, budget_ms=0))
+    result = agent.query("leaked credentials policy 3 escalation", max_sources=3)
+    assert result["ranking"]["method"] == "cross_encoder"
+    assert any(not 0.0 <= source["rerank_score"] <= 1.0 for source in result["sources"])
+    assert 0.0 <= result["confidence"] <= 1.0
+    assert all(0.0 <= source["relevance_score"] <= 1.0 for source in result["sources"])
+
+
+def test_agents_share_reranker_from_config(monkeypatch, tmp_path):
+    monkeypatch.setattr(rag_system.Config, "RERANK_ENABLED", True)
+    reranker.clear_reranker()
+    try:
+        store = rag_system.VectorStore(corpus_path=str(tmp_path / "empty"), vector_db_path=str(tmp_path / "db"))
+        first, second = rag_system.ResearchAgent(vector_store=store), rag_system.ResearchAgent(vector_store=store)
+        assert first.reranker is second.reranker is reranker.get_reranker()
+        assert first.reranker.warm_up() is True
+    finally:
+        reranker.clear_reranker()
@@ -0,0 +1,85 @@
+"""
+test_ruleset.py - Shared, process-wide governance ruleset tests
+SOP-GOV-001
+"""
+import json
+import os
+
+import pytest
+
+from app.cgo_agent import CGOAgent
+from app.governance import GovernanceCore
+from app.ruleset import load_ruleset, clear_ruleset_cache
+from app.utils.config_loader import load_rules
+
+
+RULES = {
+    "SOP_AS_LAW": True,
+    "rules": [
+        {"action_name": "RESEARCH", "risk_tier": "LOW", "trusted_sources": ["arxiv"]},
+        {"action_name": "SYSTEM_ADMIN", "risk_tier": "CRITICAL", "blocked": True},
+    ],
+}
+
+
+@pytest.fixture
+def rules_path(tmp_path):
+    clear_ruleset_cache()
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(RULES))
+    yield str(path)
+    clear_ruleset_cache()
+
+
+def test_all_consumers_share_one_ruleset(rules_path):
+    core = GovernanceCore(rules_path)
+    agent = CGOAgent(rules_path=rules_path)
+    data = load_rules(rules_path)
+
+    ruleset = load_ruleset(rules_path)
+    assert core.ruleset is ruleset
+    assert agent._snapshot.ruleset is ruleset
+    assert ruleset.rules_data is agent.rules_data is core.rules_data
+    # config_loader hands out a copy of the shared rules
+    assert data == ruleset.rules_data and data is not ruleset.rules_data
+    # Compiled validation plans are shared between agents too
+    assert CGOAgent(rules_path=rules_path)._snapshot.validation_plans is agent._snapshot.validation_plans
+
+
+def test_changing_loaded_rules_leaves_shared_ruleset_alone(rules_path):
+    data = load_rules(rules_path)
+    data["SOP_AS_LAW"] = "changed"
+    for rule in data.values():
+        if isinstance(rule, dict):
+            rule.clear()
+    assert load_rules(rules_path) == load_ruleset(rules_path).rules_data != data
+
+
+def test_governance_core_lookup_stays_exact(rules_path):
+    core = GovernanceCore(rules_path)
+    assert core.get_rule_for_action("RESEARCH")["risk_tier"] == "LOW"
+    assert core.get_rule_for_action("research") is None
+
+
+def test_changed_file_yields_new_ruleset(rules_path):
+    first = load_ruleset(rules_path)
+    updated = dict(RULES, rules=RULES["rules"][:1])
+    with open(rules_path, "w") as f:
+        json.dump(updated, f)
+    stat = os.stat(rules_path)
+    os.utime(rules_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = load_ruleset(rules_path)
+    assert second is not first and second.version != first.version
+    assert len(second.rules) == 1
+    # Re-reading identical content keeps the existing object
+    assert load_ruleset(rules_path, force=True) is second
+
+
+def test_cgo_reload_publishes_to_shared_registry(rules_path):
+    agent = CGOAgent(rules_path=rules_path)
+    with open(rules_path, "w") as f:
+        json.dump(dict(RULES, SOP_AS_LAW=False), f)
+    assert agent.reload_rules()
+    assert load_ruleset(rules_path) is agent._snapshot.ruleset
+    assert load_rules(rules_path)["SOP_AS_LAW"] is False
@@ -0,0 +1,145 @@
+"""
+test_sharded_store.py - Sharded VectorStore partitioning and merged search tests
+SOP-RAG-001
+"""
+from pathlib import Path
+
+import pytest
+
+from app import rag_system
+from app.sharded_store import ShardedVectorStore, ShardStore, shard_of
+from tests.test_rag_system import HashingEncoder, offline_encoder, write_corpus  # noqa: F401 (autouse fixture)
+
+QUERIES = ["governance breach logged immutably", "SOP-SEC-009 quarantine", "agent escalation number 7"]
+
+
+class OfflineShardStore(ShardStore):
+    """ShardStore embedding with HashingEncoder, also inside spawned worker processes."""
+
+    def __init__(self, *args, **kwargs):
+        rag_system.SentenceTransformer = HashingEncoder
+        super().__init__(*args, **kwargs)
+
+
+class OfflineShardedStore(ShardedVectorStore):
+    shard_class = OfflineShardStore
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "corpus"
+    files = {f"policy{i}.md": f"Policy {i} covers escalation number {i}. Agent {i} reviews it." for i in range(10)}
+    files["governance.md"] = "The governance core enforces SOP-GOV-001. Every breach is logged immutably."
+    files["security.txt"] = "SOP-SEC-009 requires quarantine of leaked credentials within one hour."
+    write_corpus(root, files)
+    write_corpus(root / "sub", {"nested.md": "Nested policies are indexed like any other file."})
+    return root
+
+
+def _signature(results):
+    # Order among equal scores is arbitrary
+    return sorted((-round(r.score, 5), r.document.source_path, r.document.content) for r in results)
+
+
+def make_sharded(corpus, tmp_path, cls=ShardedVectorStore, **kwargs):
+    kwargs.setdefault("shards", 3)
+    kwargs.setdefault("processes", 0)
+    return cls(corpus_path=str(corpus), vector_db_path=str(tmp_path / "sharded"), **kwargs)
+
+
+def test_files_are_partitioned_and_dense_search_matches_single_store(corpus, tmp_path):
+    single = rag_system.VectorStore(corpus_path=str(corpus), vector_db_path=str(tmp_path / "single"))
+    sharded = make_sharded(corpus, tmp_path)
+
+    owned = [set(store.manifest) for store in sharded.stores]
+    assert all(owned) and sum(len(paths) for paths in owned) == len(set().union(*owned)) == 13
+    for store in sharded.stores:
+        assert all(shard_of(Path(path).relative_to(corpus).as_posix(), 3) == store.shard for path in store.manifest)
+    assert sharded.corpus_stats()["total_documents"] == len(single.documents)
+    assert (tmp_path / "sharded" / "shard-02-of-03").is_dir()
+
+    for k in (3, 50):
+        for expected, results in zip(single.search_many(QUERIES, k=k, min_score=-1.0, mode="dense"),
+                                     sharded.search_many(QUERIES, k=k, min_score=-1.0, mode="dense")):
+            assert [round(r.score, 5) for r in results] == [round(r.score, 5) for r in expected]
+            if k == 50:
+                assert _signature(results) == _signature(expected)
+    assert sharded.search("SOP-SEC-009", k=1, mode="lexical")[0].document.source_path.endswith("security.txt")
+    hybrid = sharded.search("governance breach logged immutably", k=3, min_score=0.0, mode="hybrid")
+    assert len(hybrid) == 3 and hybrid[0].document.source_path.endswith("governance.md")
+    assert all(r.document.source_path.endswith("nested.md")
+               for r in sharded.search("policies", k=5, min_score=-1.0, filters={"path_prefix": "sub/"}))
+    with pytest.raises(ValueError):
+        sharded.search("policies", filters={"size": 3})
+    sharded.close()
+
+
+def test_sync_touches_only_owning_shards(corpus, tmp_path):
+    sharded = make_sharded(corpus, tmp_path)
+    (corpus / "policy3.md").write_text("Policy 3 was rewritten for hybrid retrieval.", encoding="utf-8")
+    (corpus / "policy4.md").unlink()
+    (corpus / "new.md").write_text("SOP-NET-002 isolates compromised hosts.", encoding="utf-8")
+    HashingEncoder.calls = []
+
+    stats = sharded.sync_corpus()
+    assert (stats.added, stats.changed, stats.deleted, stats.unchanged) == (1, 1, 1, 11)
+    assert sum(HashingEncoder.calls) == 2
+    owner = sharded.stores[sharded.shard_for(corpus / "new.md")]
+    assert str(corpus / "new.md") in owner.manifest
+    assert sharded.search("SOP-NET-002", k=1, mode="lexical")[0].document.source_path.endswith("new.md")
+    sharded.close()
+
+
+def test_registry_builds_sharded_store_from_config(corpus, tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_system.Config, "VECTOR_STORE_SHARDS", 2)
+    rag_system.clear_vector_store_registry()
+    try:
+        store = rag_system.get_vector_store(str(corpus), str(tmp_path / "db"))
+        assert isinstance(store, ShardedVectorStore) and store.shards == 2
+        stats = rag_system.ResearchAgent(vector_store=store).get_corpus_stats()
+        assert stats["shards"] == 2 and stats["total_documents"] == stats["index_size"] > 0
+    finally:
+        rag_system.clear_vector_store_registry()
+
+
+def test_warm_up_loads_sharded_store(corpus, tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_system.Config, "VECTOR_STORE_SHARDS", 2)
+    monkeypatch.setattr(rag_system.Config, "CORPUS_PATH", str(corpus))
+    monkeypatch.setattr(rag_system.Config, "VECTOR_DB_PATH", str(tmp_path / "db"))
+    rag_system.clear_vector_store_registry()
+    try:
+        assert rag_system.warm_up() is True
+        assert isinstance(rag_system.get_vector_store(), ShardedVectorStore)
+    finally:
+        rag_system.clear_vector_store_registry()
+
+
+def test_verifier_searches_sharded_store_in_one_batch(corpus, tmp_path, monkeypatch):
+    from app.verifier_agent import VerifierAgent
+    sharded = make_sharded(corpus, tmp_path)
+    calls = []
+    search_many = sharded.search_many
+    monkeypatch.setattr(sharded, "search_many", lambda queries, **kwargs: calls.append(queries) or search_many(queries, **kwargs))
+    claims = ["The governance core enforces SOP-GOV-001.", "Lunar mining quotas are set weekly."]
+    matches = VerifierAgent(rag_vector_store=sharded)._search_claims(claims)
+    assert len(calls) == 1 and list(matches) == claims[:1]
+    sharded.close()
+
+
+def test_worker_processes_serve_shards_read_only(corpus, tmp_path):
+    writer = make_sharded(corpus, tmp_path)
+    served = make_sharded(corpus, tmp_path, cls=OfflineShardedStore, processes=2)
+    try:
+        assert served.read_only and not served.stores
+        for expected, results in zip(writer.search_many(QUERIES, k=50, min_score=-1.0),
+                                     served.search_many(QUERIES, k=50, min_score=-1.0)):
+            assert _signature(results) == _signature(expected)
+        assert not served.sync_corpus().has_changes
+
+        (corpus / "new.md").write_text("SOP-NET-002 isolates compromised hosts.", encoding="utf-8")
+        writer.sync_corpus()
+        assert served.reload_if_changed() is True
+        assert served.search("SOP-NET-002", k=1, mode="lexical")[0].document.source_path.endswith("new.md")
+    finally:
+        served.close()
+        writer.close()
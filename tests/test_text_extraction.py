@@ -0,0 +1,134 @@
+"""
+test_text_extraction.py - Streaming extraction and chunking tests
+SOP-RAG-001
+"""
+import os
+import re
+import json
+import random
+import tracemalloc
+
+import pytest
+
+from app import text_extraction
+from app.text_extraction import chunk_file, chunk_text, extract_text_from_file, iter_sentences
+
+# Size of the generated file in test_large_file_streams_in_bounded_memory (raise for soak runs)
+LARGE_FILE_MB = int(os.getenv("NOTREKT_TEST_LARGE_FILE_MB", "16"))
+
+
+def _legacy_chunk_text(text, chunk_size=500):
+    """Chunking as it was before streaming (minus its empty chunks)."""
+    chunks, current = [], ""
+    for s in re.split(r'(?<=[.!?]) +', text):
+        if len(current) + len(s) < chunk_size:
+            current += s + " "
+        else:
+            chunks.append(current.strip())
+            current = s + " "
+    if current:
+        chunks.append(current.strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+def _random_text(seed, sentences=400):
+    rng = random.Random(seed)
+    words = ["audit", "agent", "ledger", "policy", "SOP-GOV-001", "review", "x" * 40, "trust"]
+    parts = []
+    for _ in range(sentences):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(1, 30)))
+        parts.append(sentence + rng.choice([".", "!", "?", ""]) + " " * rng.randint(1, 3))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("chunk_size", [80, 500])
+def test_chunk_boundaries_match_legacy_chunking(seed, chunk_size):
+    text = _random_text(seed)
+    assert chunk_text(text, chunk_size) == _legacy_chunk_text(text, chunk_size)
+
+
+@pytest.mark.parametrize("block_chars", [1, 7, 64, 1 << 20])
+def test_sentence_split_does_not_depend_on_block_boundaries(block_chars):
+    text = _random_text(11)
+    blocks = [text[i:i + block_chars] for i in range(0, len(text), block_chars)]
+    expected = [s for s in re.split(r'(?<=[.!?]) +', text) if s]
+    assert list(iter_sentences(blocks)) == expected
+
+
+def test_overlong_sentences_are_split_at_whitespace():
+    text = " ".join(["word"] * 5000)
+    sentences = list(iter_sentences([text], max_chars=1000))
+    assert all(len(s) <= 1000 for s in sentences)
+    assert " ".join(sentences) == text
+
+
+def test_overlap_repeats_trailing_sentences():
+    text = " ".join(f"Sentence number {i} is here." for i in range(40))
+    chunks = chunk_text(text, chunk_size=120, overlap=60)
+    assert len(chunks) > 1
+    for previous, current in zip(chunks, chunks[1:]):
+        shared = re.split(r'(?<=[.!?]) +', current)[:2]
+        # Two 27-character sentences fit in the overlap, a third would not
+        assert previous.endswith(" ".join(shared))
+        assert len(current) < 120
+    # Overlap never stalls progress or emits empty chunks
+    assert all(chunks) and chunks[-1].endswith("Sentence number 39 is here.")
+
+
+def test_token_unit_counts_tokenizer_tokens(monkeypatch):
+    monkeypatch.setattr(text_extraction, "token_counter", lambda model_name="": lambda s: len(s.split()))
+    text = " ".join(f"one two three four {i}." for i in range(20))
+    chunks = chunk_text(text, chunk_size=12, unit="tokens")
+    assert [len(chunk.split()) for chunk in chunks] == [10] * 10
+    with pytest.raises(ValueError):
+        chunk_text(text, unit="bytes")
+
+
+def test_json_is_streamed_in_indented_form(tmp_path):
+    data = {"policy": "SOP-GOV-001", "rules": [{"id": i, "text": f"Rule {i}."} for i in range(50)]}
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    content, metadata = extract_text_from_file(path)
+    assert content == json.dumps(data, indent=2)
+    assert metadata["json_keys"] == ["policy", "rules"]
+    chunks, _ = chunk_file(path, chunk_size=200)
+    assert list(chunks) == _legacy_chunk_text(content, 200)
+
+
+def test_unsupported_and_unreadable_files(tmp_path):
+    path = tmp_path / "image.png"
+    path.write_bytes(b"\x89PNG")
+    chunks, metadata = chunk_file(path)
+    assert list(chunks) == [] and metadata["error"] == "unsupported_format"
+    bad = tmp_path / "bad.txt"
+    bad.write_bytes(b"\xff\xfe not utf-8 \xff")
+    chunks, _ = chunk_file(bad)
+    with pytest.raises(UnicodeDecodeError):
+        list(chunks)
+
+
+def test_large_file_streams_in_bounded_memory(tmp_path):
+    path = tmp_path / "large.txt"
+    paragraph = _random_text(3, sentences=2000)
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(max(1, LARGE_FILE_MB * (1 << 20) // len(paragraph))):
+            f.write(paragraph)
+    size = path.stat().st_size
+
+    tracemalloc.start()
+    try:
+        chunks, _ = chunk_file(path, chunk_size=500)
+        count = total = longest = 0
+        for chunk in chunks:
+            count += 1
+            total += len(chunk)
+            longest = max(longest, len(chunk))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert count > 0 and total > size * 0.9
+    assert longest < 500 * text_extraction.SENTENCE_LIMIT_FACTOR
+    # A few blocks in flight, independent of the file size
+    assert peak < 16 * (1 << 20)
@@ -0,0 +1,124 @@
+"""
+test_vector_index.py - FAISS index factory and query-time tuning tests
+SOP-RAG-001
+"""
+import numpy as np
+import pytest
+
+from app import vector_index
+
+
+def clustered_vectors(n=3000, dim=32, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))
+    vectors = vectors.astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def recall_at_10(index, vectors, queries, id_offset=0):
+    exact = vector_index.build_index("flat", vectors, np.arange(len(vectors)) + id_offset)
+    _, truth = exact.search(queries, 10)
+    _, found = index.search(queries, 10)
+    return np.mean([len(set(t) & set(f)) / 10 for t, f in zip(truth, found)])
+
+
+@pytest.mark.parametrize("index_type,knob", [
+    ("fp16", {}),
+    ("sq8", {}),
+    ("ivf_flat", {"nprobe": 16}),
+    ("ivf_pq", {"nprobe": 16}),
+    ("hnsw", {"ef_search": 128}),
+])
+def test_approximate_indexes_recall_against_flat(index_type, knob):
+    vectors = clustered_vectors()
+    ids = np.arange(len(vectors)) + 1000
+    index = vector_index.build_index(index_type, vectors, ids, train_sample=2000)
+    assert vector_index.index_type_of(index) == index_type
+    assert index.ntotal == len(vectors)
+
+    vector_index.configure_search(index, **knob)
+    _, found = index.search(vectors[:5], 1)
+    assert set(found[:, 0]) <= set(ids)
+    assert recall_at_10(index, vectors, vectors[:200], id_offset=1000) >= (0.3 if index_type == "ivf_pq" else 0.9)
+
+
+def test_rerank_recovers_quantization_loss():
+    vectors = clustered_vectors()
+    queries = vectors[:200]
+    exact = vector_index.build_index("flat", vectors, np.arange(len(vectors)))
+    pq = vector_index.build_index("ivf_pq", vectors, np.arange(len(vectors)), train_sample=2000)
+    vector_index.configure_search(pq, nprobe=64)
+    _, truth = exact.search(queries, 10)
+    _, candidates = pq.search(queries, 40)
+    reranked = [vector_index.rerank(exact, q, ids, 10) for q, ids in zip(queries, candidates)]
+    recall = np.mean([len(set(t) & set(ids)) / 10 for t, (_, ids) in zip(truth, reranked)])
+    assert recall >= 0.8 > recall_at_10(pq, vectors, queries)
+    scores, ids = reranked[0]
+    assert np.allclose(scores, vectors[ids] @ queries[0], atol=1e-5)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_nprobe_trades_recall_for_speed():
+    vectors = clustered_vectors()
+    index = vector_index.build_index("ivf_flat", vectors, np.arange(len(vectors)), nlist=64)
+    vector_index.configure_search(index, nprobe=1)
+    low = recall_at_10(index, vectors, vectors[:200])
+    vector_index.configure_search(index, nprobe=64)
+    assert recall_at_10(index, vectors, vectors[:200]) == pytest.approx(1.0)
+    assert low < 1.0
+
+
+@pytest.mark.parametrize("index_type,knob", [("ivf_flat", {"nprobe": 64}), ("hnsw", {"ef_search": 256})])
+def test_search_parameters_apply_knobs_per_call(index_type, knob):
+    vectors = clustered_vectors()
+    index = vector_index.build_index(index_type, vectors, np.arange(len(vectors)), nlist=64)
+    vector_index.configure_search(index, nprobe=1, ef_search=16)
+    params = vector_index.search_parameters(index, None, **knob)
+    exact = vector_index.build_index("flat", vectors, np.arange(len(vectors)))
+    _, truth = exact.search(vectors[:200], 10)
+    _, found = index.search(vectors[:200], 10, params=params)
+    assert np.mean([len(set(t) & set(f)) / 10 for t, f in zip(truth, found)]) > recall_at_10(index, vectors, vectors[:200])
+    # The index keeps its own settings
+    ivf = vector_index.faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        assert ivf.nprobe == 1
+    else:
+        assert vector_index.faiss.downcast_index(index.index).hnsw.efSearch == 16
+    assert vector_index.search_parameters(exact, None, nprobe=8) is None
+
+
+def test_remove_and_export_by_id():
+    vectors = clustered_vectors(n=1000)
+    ids = np.arange(len(vectors), dtype="int64") * 3
+    ivf = vector_index.build_index("ivf_flat", vectors, ids)
+    assert vector_index.supports_remove(ivf)
+    ivf.remove_ids(ids[:10])
+    assert ivf.ntotal == 990
+    exported, exported_ids = vector_index.export_vectors(ivf, ids[10:20])
+    assert np.allclose(exported, vectors[10:20], atol=1e-6)
+
+    hnsw = vector_index.build_index("hnsw", vectors, ids)
+    assert not vector_index.supports_remove(hnsw)
+    exported, exported_ids = vector_index.export_vectors(hnsw)
+    assert list(exported_ids) == list(ids) and np.allclose(exported, vectors, atol=1e-6)
+
+
+def test_unknown_index_type_rejected():
+    with pytest.raises(ValueError):
+        vector_index.build_index("lsh", clustered_vectors(n=10), np.arange(10))
+
+
+def test_rewriting_index_file_leaves_mapped_readers_intact(tmp_path):
+    vectors = clustered_vectors(n=2000)
+    path = str(tmp_path / "faiss_index.bin")
+    vector_index.write_index(vector_index.build_index("flat", vectors, np.arange(len(vectors))), path)
+    mapped = vector_index.read_index(path, mmap=True)
+    _, before = mapped.search(vectors[:5], 3)
+    # A smaller index replaces the file; the mapped pages must stay valid
+    vector_index.write_index(vector_index.build_index("flat", vectors[:10], np.arange(10)), path)
+    _, after = mapped.search(vectors[:5], 3)
+    assert (before == after).all()
+    assert vector_index.read_index(path).ntotal == 10
+    assert not (tmp_path / "faiss_index.bin.tmp").exists()